@@ -6,16 +6,76 @@ US Code Navigator HTML Generator with Schema-based Data Integration
 reference.txt의 HTML 구조를 유지하면서 JSON 데이터를 통합합니다.
 """
 
+import argparse
+import contextlib
+import cProfile
+import hashlib
+import html
+import heapq
+import io
 import json
-from bs4 import BeautifulSoup
+import math
+import operator
+import os
+import pickle
+import platform
+import pstats
+import random
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from array import array
+from bs4 import BeautifulSoup, Comment
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import compress, repeat
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter, OrderedDict, defaultdict
+from collections.abc import Mapping, Sequence
+from urllib.parse import parse_qs, quote, unquote, urlsplit
 
 # 파일 경로
 BASE_DIR = Path("/home/user/us-code-navigator")
 REFERENCE_FILE = BASE_DIR / "reference.txt"
 SCHEMA_FILE = BASE_DIR / "schema-meta.json"
 OUTPUT_FILE = BASE_DIR / "index.html"
+CACHE_DIR = BASE_DIR / ".render-cache"
+SHARD_DIR = BASE_DIR / "shards"
+SNAPSHOT_FILE = BASE_DIR / ".data-snapshot.pickle"
+SQLITE_FILE = BASE_DIR / ".data.sqlite"
+BENCHMARK_FILE = BASE_DIR / "benchmark-results.json"
+REPORT_FILE = BASE_DIR / "build-report.json"
+SEARCH_INDEX_FILE = BASE_DIR / ".search-index.pickle"
+
+# 렌더링 결과가 바뀌는 변경을 하면 올려서 렌더 캐시를 무효화합니다
+GENERATOR_VERSION = "3"
+
+# DataHierarchy에 저장되는 구조를 바꾸면 올려서 데이터 스냅샷을 무효화합니다
+SNAPSHOT_VERSION = "2"
+
+# Bm25Index의 구조나 토큰화/점수 계산을 바꾸면 올려서 저장된 검색 색인을 무효화합니다
+SEARCH_INDEX_VERSION = "2"
+
+# DataHierarchy 레코드 저장 방식 (--storage)
+STORAGE_BACKENDS = ('dict', 'compact', 'sqlite')
+
+# SQLite 데이터베이스를 만들 때 한 번에 INSERT하는 행 수
+SQLITE_BATCH_SIZE = 1000
+
+# --profile 리포트에 싣는 함수/메모리 할당 위치 수
+PROFILE_TOP_ENTRIES = 30
+
+# benchmark_build()가 측정하는 빌드 단계
+BENCHMARK_PHASES = ('load', 'hierarchy', 'library_cards', 'library_content', 'generate_html', 'write')
 
 # JSON 파일들
 JSON_FILES = {
@@ -30,14 +90,211 @@ JSON_FILES = {
     'CodeAttachment': 'CodeAttachment.json'
 }
 
+class BuildMetrics:
+    """빌드 단계별 시간과 카운터를 모읍니다 (빌드 리포트용)
+
+    phase()는 중첩할 수 있으며 '바깥/안쪽' 경로로 기록됩니다. 같은 경로가 여러 번
+    실행되면 시간과 호출 횟수가 누적됩니다. count()는 렌더링한 행 수, 참조 링크 수처럼
+    빌드 중에 센 값을 더합니다.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.timings = {}
+        self.counters = defaultdict(int)
+        self._stack = []
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """name 단계의 실행 시간을 잽니다."""
+        # 시작할 때 항목을 만들어 timings가 단계 시작 순서를 따르도록 함
+        entry = self._entry(name)
+        self._stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry['seconds'] += time.perf_counter() - start
+            entry['calls'] += 1
+            self._stack.pop()
+
+    def _entry(self, name):
+        return self.timings.setdefault('/'.join(self._stack + [name]), {'seconds': 0.0, 'calls': 0})
+
+    def record(self, name, seconds, calls=1):
+        """현재 단계 아래 name에 측정한 시간을 더합니다 (병렬 워커 결과 합산용)."""
+        entry = self._entry(name)
+        entry['seconds'] += seconds
+        entry['calls'] += calls
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def merge_counters(self, counters):
+        for name, n in counters.items():
+            self.counters[name] += n
+
+    def summary(self):
+        """단계별 시간 표 (최상위 단계와 그 아래 단계, 코드별 시간 제외)"""
+        lines = []
+        for path, entry in self.timings.items():
+            depth = path.count('/')
+            if depth > 1 or path.rsplit('/', 1)[-1].startswith('code:'):
+                continue
+            lines.append(f"  {'  ' * depth}{path.rsplit('/', 1)[-1]:<{30 - 2 * depth}} {entry['seconds']:>8.3f}s")
+        return '\n'.join(lines)
+
+# 현재 빌드의 시간/카운터 (렌더링 워커 프로세스에도 하나씩 있음)
+metrics = BuildMetrics()
+
+class _Missing:
+    """CompactRecord에서 값이 없는(키가 없는) 칸을 표시하는 값"""
+
+    def __repr__(self):
+        return 'MISSING'
+
+    def __reduce__(self):
+        return 'MISSING'
+
+MISSING = _Missing()
+
+class RecordLayout:
+    """테이블의 CompactRecord들이 공유하는 열 배치 (열 이름 → 값 튜플의 위치)
+
+    스키마 열이 먼저 오고, 스키마에 없는 키는 처음 나올 때 뒤에 추가됩니다.
+    interned 열(PK/FK/인덱스 문자열 열)의 값은 sys.intern으로 한 객체를 공유합니다.
+    """
+
+    def __init__(self, columns, interned=()):
+        self.columns = list(columns)
+        self.positions = {column: i for i, column in enumerate(self.columns)}
+        self.interned = {self.positions[column] for column in interned if column in self.positions}
+
+    def pack(self, record):
+        """dict 레코드를 이 배치의 CompactRecord로 바꿉니다."""
+        positions = self.positions
+        values = [MISSING] * len(self.columns)
+        for key, value in record.items():
+            i = positions.get(key)
+            if i is None:
+                i = positions[key] = len(self.columns)
+                self.columns.append(key)
+                values.append(MISSING)
+            if i in self.interned and type(value) is str:
+                value = sys.intern(value)
+            values[i] = value
+        return CompactRecord(self, tuple(values))
+
+class CompactRecord(Mapping):
+    """dict 대신 쓰는 읽기 전용 레코드 (--storage compact)
+
+    키는 테이블의 RecordLayout에 한 번만 두고 값은 튜플 하나에 저장합니다.
+    record['Col'], record.get('Col')처럼 dict와 같은 방식으로 읽습니다.
+    """
+    __slots__ = ('_layout', '_values')
+
+    def __init__(self, layout, values):
+        self._layout = layout
+        self._values = values
+
+    def __reduce__(self):
+        return (CompactRecord, (self._layout, self._values))
+
+    def __getitem__(self, key):
+        i = self._layout.positions.get(key)
+        if i is None or i >= len(self._values) or self._values[i] is MISSING:
+            raise KeyError(key)
+        return self._values[i]
+
+    def get(self, key, default=None):
+        i = self._layout.positions.get(key)
+        if i is None or i >= len(self._values):
+            return default
+        value = self._values[i]
+        return default if value is MISSING else value
+
+    def __iter__(self):
+        for column, value in zip(self._layout.columns, self._values):
+            if value is not MISSING:
+                yield column
+
+    def __len__(self):
+        return sum(1 for value in self._values if value is not MISSING)
+
+    def __repr__(self):
+        return f"CompactRecord({dict(self)!r})"
+
+def record_json_default(value):
+    """json.dumps의 default: CompactRecord와 SQLite 테이블/레코드 뷰를 dict/list로 직렬화합니다."""
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, Sequence):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# DataHierarchy 인덱스 키 함수가 "색인하지 않음"을 나타내는 값
+NO_KEY = object()
+
 class DataHierarchy:
-    """스키마를 기반으로 데이터 계층 구조를 관리하는 클래스"""
+    """스키마를 기반으로 데이터 계층 구조를 관리하는 클래스
 
-    def __init__(self, schema, data):
+    storage='dict'는 JSON 레코드(dict)를 그대로, 'compact'는 CompactRecord로 저장합니다.
+    SQLite 저장 방식은 SqliteHierarchy를 사용합니다.
+    """
+
+    # catalog 속성이 처음 조회될 때 만드는 CodeCatalog (테이블이 바뀌면 None으로 되돌림)
+    _catalog = None
+
+    def __init__(self, schema, data, storage='dict'):
+        if storage not in ('dict', 'compact'):
+            raise ValueError(f"Unknown storage backend: {storage}")
         self.schema = schema
-        self.data = data
+        self.storage = storage
+        self.data = {}
+        self.layouts = {}
         self.relationships = self._parse_relationships()
-        self.indexes = self._build_indexes()
+        self.indexes = {}
+        self.child_indexes = self._build_child_indexes()
+        self.secondary_indexes = self._build_secondary_indexes()
+        for table_name, records in data.items():
+            self.add_records(table_name, records)
+
+    def add_records(self, table_name, records):
+        """레코드를 테이블에 추가하고 모든 인덱스에 반영합니다.
+
+        records는 리스트 대신 iter_json_array() 같은 이터레이터여도 되며,
+        레코드는 하나씩 저장/인덱싱되므로 원본 리스트를 따로 들고 있지 않습니다.
+        """
+        self._catalog = None
+        table = self.data.setdefault(table_name, [])
+        indexers = self._record_indexers(table_name)
+        layout = self._layout(table_name) if self.storage == 'compact' else None
+        for record in records:
+            if layout is not None:
+                record = layout.pack(record)
+            table.append(record)
+            for index, key_of, unique in indexers:
+                key = key_of(record)
+                if key is NO_KEY:
+                    continue
+                if unique:
+                    index[key] = record
+                else:
+                    index.setdefault(key, []).append(record)
+
+    def _layout(self, table_name):
+        """테이블의 RecordLayout을 반환합니다 (PK/FK/인덱스 문자열 열은 intern)."""
+        if table_name not in self.layouts:
+            table_info = self.schema['tables'].get(table_name, {})
+            columns = table_info.get('columns', {})
+            keys = list(table_info.get('pk', []))
+            keys += [col for fk in table_info.get('fks', []) for col in fk['columns']]
+            keys += [col for index_def in table_info.get('indexes', []) for col in index_def['columns']]
+            interned = [col for col in keys if columns.get(col, {}).get('type') == 'string']
+            self.layouts[table_name] = RecordLayout(columns, interned)
+        return self.layouts[table_name]
 
     def _parse_relationships(self):
         """스키마에서 관계를 파싱합니다."""
@@ -54,30 +311,172 @@ class DataHierarchy:
 
         return relationships
 
-    def _build_indexes(self):
-        """빠른 조회를 위한 인덱스를 생성합니다."""
-        indexes = {}
+    def _record_indexers(self, table_name):
+        """테이블 레코드가 들어가는 인덱스 목록을 반환합니다.
 
-        # 각 테이블의 PK 인덱스 생성
-        for table_name, records in self.data.items():
-            if table_name not in self.schema['tables']:
-                continue
+        각 항목은 (인덱스 dict, 레코드 → 키 함수, 고유 여부)이며 키 함수가 NO_KEY를 반환하면
+        색인하지 않습니다. 고유 인덱스(PK)는 키 → 레코드, 나머지는 키 → 레코드 리스트입니다.
+        """
+        indexers = []
 
+        # PK 인덱스
+        if table_name in self.schema['tables']:
             pk_columns = self.schema['tables'][table_name]['pk']
-            indexes[table_name] = {}
+            pk_index = self.indexes.setdefault(table_name, {})
 
-            for record in records:
+            def pk_key(record):
                 # PK 값으로 인덱스 생성
                 if len(pk_columns) == 1:
-                    key = record.get(pk_columns[0])
-                    if key:
-                        indexes[table_name][key] = record
+                    return record.get(pk_columns[0]) or NO_KEY
+                # 복합 키
+                return tuple(record.get(col) for col in pk_columns)
+            indexers.append((pk_index, pk_key, True))
+
+        # 스키마에 선언된 보조 인덱스
+        for columns, index in self.secondary_indexes.get(table_name, {}).values():
+            def secondary_key(record, columns=columns):
+                return self._index_key(table_name, columns, [record.get(col) for col in columns])
+            indexers.append((index, secondary_key, False))
+
+        # 부모 테이블별 역방향 FK 인덱스 (_build_child_indexes와 같은 관계 순서)
+        positions = defaultdict(int)
+        for rel in self.relationships.get(table_name, []):
+            _, index = self.child_indexes[rel['ref_table']][table_name][positions[rel['ref_table']]]
+            positions[rel['ref_table']] += 1
+            def child_key(record, columns=rel['columns']):
+                if len(columns) == 1:
+                    key = record.get(columns[0])
+                    return NO_KEY if key is None else key
+                # 복합 키
+                return tuple(record.get(col) for col in columns)
+            indexers.append((index, child_key, False))
+
+        return indexers
+
+    def update_table(self, table_name, records):
+        """테이블 내용을 records로 바꾸고, PK로 비교해 추가/변경/삭제된 행만 인덱스에 반영합니다.
+
+        바뀐 행의 (이전 레코드, 새 레코드) 리스트를 반환합니다 (추가는 이전이 None,
+        삭제는 새 레코드가 None). 인덱스의 레코드 리스트는 새 데이터의 행 순서를 따르므로
+        처음부터 만든 hierarchy와 같습니다.
+        """
+        pk_columns = self.schema['tables'][table_name]['pk']
+        layout = self._layout(table_name) if self.storage == 'compact' else None
+        old_table = self.data.get(table_name, [])
+        old_rows = {tuple(record.get(col) for col in pk_columns): record for record in old_table}
+
+        table = []
+        changes = []
+        seen = set()
+        for record in records:
+            if layout is not None:
+                record = layout.pack(record)
+            key = tuple(record.get(col) for col in pk_columns)
+            previous = old_rows.get(key)
+            if previous is not None and key not in seen and previous == record:
+                # 그대로인 행은 같은 객체를 유지해 인덱스를 건드리지 않음
+                record = previous
+            else:
+                changes.append((previous if key not in seen else None, record))
+            seen.add(key)
+            table.append(record)
+        kept = {id(record) for record in table}
+        replaced = {id(previous) for previous, _ in changes if previous is not None}
+        changes += [(record, None) for record in old_table if id(record) not in kept and id(record) not in replaced]
+        # 그대로인 행끼리의 순서가 바뀌었으면 모든 리스트를 다시 정렬
+        old_ids = {id(record) for record in old_table}
+        reordered = ([id(record) for record in old_table if id(record) in kept]
+                     != [id(record) for record in table if id(record) in old_ids])
+
+        self.data[table_name] = table
+        if not changes and not reordered:
+            return changes
+        self._catalog = None
+
+        positions = {id(record): i for i, record in enumerate(table)}
+        for index, key_of, unique in self._record_indexers(table_name):
+            touched = set(index) if reordered and not unique else set()
+            for previous, record in changes:
+                if previous is not None and id(previous) not in kept:
+                    key = key_of(previous)
+                    if key is NO_KEY:
+                        continue
+                    if unique:
+                        if index.get(key) is previous:
+                            del index[key]
+                    else:
+                        index[key] = [r for r in index.get(key, []) if r is not previous]
+                        touched.add(key)
+            for previous, record in changes:
+                if record is None:
+                    continue
+                key = key_of(record)
+                if key is NO_KEY:
+                    continue
+                if unique:
+                    index[key] = record
                 else:
-                    # 복합 키
-                    key = tuple(record.get(col) for col in pk_columns)
-                    indexes[table_name][key] = record
+                    index.setdefault(key, []).append(record)
+                    touched.add(key)
+            for key in touched:
+                if index[key]:
+                    index[key].sort(key=lambda r: positions[id(r)])
+                else:
+                    del index[key]
+        return changes
+
+    @property
+    def catalog(self):
+        """ModelCode별 최신 버전/표시 이름/배지를 한 번만 계산한 CodeCatalog"""
+        if self._catalog is None:
+            self._catalog = CodeCatalog(self)
+        return self._catalog
+
+    def _index_key(self, table_name, columns, values):
+        """보조 인덱스 키를 만듭니다. 스키마상 string 컬럼은 문자열로 정규화합니다."""
+        column_info = self.schema['tables'][table_name]['columns']
+        key = []
+        for col, value in zip(columns, values):
+            if value is not None and column_info.get(col, {}).get('type') == 'string':
+                value = str(value)
+            key.append(value)
+        return key[0] if len(key) == 1 else tuple(key)
+
+    def _build_secondary_indexes(self):
+        """schema-meta.json에 선언된 보조 인덱스(indexes)를 만듭니다 (레코드는 add_records에서 추가)."""
+        secondary_indexes = {}
+
+        for table_name, table_info in self.schema['tables'].items():
+            declared = table_info.get('indexes', [])
+            if not declared:
+                continue
+
+            secondary_indexes[table_name] = {}
+            for index_def in declared:
+                secondary_indexes[table_name][index_def['name']] = (index_def['columns'], {})
+
+        return secondary_indexes
+
+    def lookup(self, table_name, index_name, *values):
+        """선언된 보조 인덱스로 레코드 리스트를 조회합니다.
+
+        예: hierarchy.lookup('CodeAttachment', 'byPlace', 'MCV002', 3, 307, 1)
+        """
+        try:
+            columns, index = self.secondary_indexes[table_name][index_name]
+        except KeyError:
+            raise KeyError(f"Unknown index {table_name}.{index_name}") from None
+        if len(values) != len(columns):
+            raise ValueError(f"{table_name}.{index_name} expects {len(columns)} values ({', '.join(columns)}), got {len(values)}")
 
-        return indexes
+        return list(index.get(self._index_key(table_name, columns, values), []))
+
+    def _find_index(self, table_name, columns):
+        """주어진 컬럼 구성과 일치하는 보조 인덱스 이름을 찾습니다."""
+        for index_name, (index_columns, _) in self.secondary_indexes.get(table_name, {}).items():
+            if index_columns == list(columns):
+                return index_name
+        return None
 
     def get_related(self, table_name, record, ref_table):
         """관련된 레코드를 가져옵니다."""
@@ -90,57 +489,959 @@ class DataHierarchy:
                     key = record.get(rel['columns'][0])
                     return self.indexes.get(ref_table, {}).get(key)
                 else:
-                    # 복합 키
-                    key = tuple(record.get(col) for col in rel['columns'])
-                    return self.indexes.get(ref_table, {}).get(key)
+                    # 복합 키 - PK가 아니면 같은 컬럼 구성의 보조 인덱스 사용
+                    values = [record.get(col) for col in rel['columns']]
+                    index_name = self._find_index(ref_table, rel['ref_columns'])
+                    if index_name:
+                        matches = self.lookup(ref_table, index_name, *values)
+                        return matches[0] if matches else None
+                    return self.indexes.get(ref_table, {}).get(tuple(values))
 
         return None
 
-    def get_children(self, table_name, record):
-        """자식 레코드들을 가져옵니다."""
-        pk_columns = self.schema['tables'][table_name]['pk']
-        pk_value = record.get(pk_columns[0]) if len(pk_columns) == 1 else tuple(record.get(col) for col in pk_columns)
-
-        children = {}
+    def _build_child_indexes(self):
+        """관계별 역방향 FK 인덱스(부모 키 → 자식 레코드 목록)를 만듭니다 (레코드는 add_records에서 추가)."""
+        child_indexes = defaultdict(dict)
 
-        # 모든 테이블을 순회하며 현재 레코드를 참조하는 것을 찾음
         for child_table, child_rels in self.relationships.items():
             for rel in child_rels:
-                if rel['ref_table'] == table_name:
-                    # 이 테이블이 현재 레코드를 참조함
-                    matching_records = []
-                    for child_record in self.data.get(child_table, []):
-                        if len(rel['columns']) == 1:
-                            if child_record.get(rel['columns'][0]) == pk_value:
-                                matching_records.append(child_record)
-                        else:
-                            child_key = tuple(child_record.get(col) for col in rel['columns'])
-                            if child_key == pk_value:
-                                matching_records.append(child_record)
-
-                    if matching_records:
-                        if child_table not in children:
-                            children[child_table] = []
-                        children[child_table].extend(matching_records)
+                by_parent = child_indexes[rel['ref_table']].setdefault(child_table, [])
+                by_parent.append((rel['ref_columns'], {}))
+
+        return child_indexes
+
+    def get_children(self, table_name, record, child_table=None):
+        """자식 레코드들을 가져옵니다.
+
+        child_table을 지정하면 해당 테이블의 자식 레코드 리스트만 반환합니다.
+        """
+        by_child = self.child_indexes.get(table_name, {})
+        tables = [child_table] if child_table is not None else list(by_child)
+
+        children = {}
+        for table in tables:
+            matching_records = []
+            for ref_columns, index in by_child.get(table, []):
+                # 부모 레코드의 참조 컬럼 값으로 조회
+                if len(ref_columns) == 1:
+                    key = record.get(ref_columns[0])
+                else:
+                    key = tuple(record.get(col) for col in ref_columns)
+                matching_records.extend(index.get(key, []))
 
+            if matching_records:
+                children[table] = matching_records
+
+        if child_table is not None:
+            return children.get(child_table, [])
         return children
 
-def load_json_data():
+# 분야 배지 기본값 (ModelCodeDiscipline이 없거나 Discipline을 찾을 수 없는 코드)
+DEFAULT_BADGE_TEXT = '기타'
+DEFAULT_BADGE_COLOR = '#A8D0E6'
+
+def discipline_badge(discipline):
+    """라이브러리 카드 분야 배지의 (텍스트, 색상)"""
+    if not discipline:
+        return DEFAULT_BADGE_TEXT, DEFAULT_BADGE_COLOR
+    discipline_name = discipline['DisciplineNameKR']
+    if '소방' in discipline_name or '안전' in discipline_name:
+        return discipline_name, '#F76C6C'
+    if '전기' in discipline_name:
+        return discipline_name, '#FFA500'  # Orange for electrical
+    return discipline_name, DEFAULT_BADGE_COLOR
+
+class CodeCatalog:
+    """ModelCode별 표시 정보를 테이블을 한 번씩만 읽어 계산한 조회 테이블 (hierarchy.catalog)
+
+    entries는 ModelCode 순서의 항목 dict 리스트이고 by_code는 ModelCodeID → 항목입니다.
+    항목: code_id, model_code, code_base ('IBC'), latest_version (Year가 가장 큰 버전, 없으면 None),
+    version_id, display_name ('IBC 2024'), chapters (최신 버전의 챕터, Chapter 순), chapter_count,
+    active (최신 버전에 챕터가 있으면 True), discipline, badge_text, badge_color.
+    versions는 모든 버전의 ModelCodeVersionID → {'code', 'year', 'display_name'}입니다 (이전 버전은 'IBC 2021' 등,
+    ModelCode를 찾을 수 없는 버전은 code가 None).
+    """
+
+    def __init__(self, hierarchy):
+        data = hierarchy.data
+        latest = {}
+        for version in data['ModelCodeVersion']:
+            current = latest.get(version['ModelCodeID'])
+            # max(key=Year)와 같이 Year가 같으면 먼저 나온 버전
+            if current is None or (version.get('Year') or 0) > (current.get('Year') or 0):
+                latest[version['ModelCodeID']] = version
+
+        # 코드마다 Discipline을 찾을 수 있는 첫 번째 ModelCodeDiscipline
+        disciplines = {}
+        for link in data['ModelCodeDiscipline']:
+            if link['ModelCodeID'] not in disciplines:
+                discipline = hierarchy.get_related('ModelCodeDiscipline', link, 'Discipline')
+                if discipline:
+                    disciplines[link['ModelCodeID']] = discipline
+
+        self.entries = []
+        self.by_code = {}
+        for model_code in data['ModelCode']:
+            code_id = model_code['ModelCodeID']
+            code_base = model_code['ModelCodeName'].split(':')[0].strip()
+            latest_version = latest.get(code_id)
+            chapters = []
+            if latest_version:
+                chapters = sorted(hierarchy.get_children('ModelCodeVersion', latest_version, child_table='CodeChapter'),
+                                  key=lambda x: x['Chapter'])
+            badge_text, badge_color = discipline_badge(disciplines.get(code_id))
+            entry = {
+                'code_id': code_id,
+                'model_code': model_code,
+                'code_base': code_base,
+                'latest_version': latest_version,
+                'version_id': latest_version['ModelCodeVersionID'] if latest_version else None,
+                'display_name': self._display_name(code_base, latest_version),
+                'chapters': chapters,
+                'chapter_count': len(chapters),
+                'active': len(chapters) > 0,
+                'discipline': disciplines.get(code_id),
+                'badge_text': badge_text,
+                'badge_color': badge_color,
+            }
+            self.entries.append(entry)
+            self.by_code.setdefault(code_id, entry)
+
+        self.versions = {}
+        for version in data['ModelCodeVersion']:
+            entry = self.by_code.get(version['ModelCodeID'])
+            code_base = entry['code_base'] if entry else None
+            self.versions.setdefault(version['ModelCodeVersionID'], {
+                'code': code_base,
+                'year': int(version['Year']) if version.get('Year') else '',
+                'display_name': self._display_name(code_base or '', version).strip(),
+            })
+
+    @staticmethod
+    def _display_name(code_base, version):
+        if version and version.get('Year'):
+            return f"{code_base} {int(version['Year'])}"
+        return code_base
+
+    def active_entries(self):
+        """라이브러리에 표시할(최신 버전에 챕터가 있는) 항목 리스트"""
+        return [entry for entry in self.entries if entry['active']]
+
+def load_json_data(data_dir=None):
     """모든 JSON 파일을 로드합니다."""
+    data_dir = BASE_DIR if data_dir is None else Path(data_dir)
     data = {}
     for key, filename in JSON_FILES.items():
-        file_path = BASE_DIR / filename
+        file_path = data_dir / filename
         print(f"Loading {filename}...")
         with open(file_path, 'r', encoding='utf-8') as f:
             data[key] = json.load(f)
     return data
 
-def load_schema():
+# 스트리밍 로드 시 한 번에 읽는 문자 수
+STREAM_CHUNK_SIZE = 1 << 16
+JSON_NUMBER_END_RE = re.compile(r'[,\]\s]')
+
+def iter_json_array(path, chunk_size=STREAM_CHUNK_SIZE):
+    """최상위가 배열인 JSON 파일의 원소를 하나씩 파싱해 반환합니다.
+
+    파일 전체나 파싱된 리스트를 메모리에 두지 않고, 읽은 조각과 현재 원소만 유지합니다.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+
+        def read_more():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        def next_char():
+            # 공백을 건너뛴 다음 글자 (파일 끝이면 '')
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return buffer[pos] if pos < len(buffer) else ''
+                read_more()
+
+        if next_char() != '[':
+            raise ValueError(f"{path}: expected a top-level JSON array")
+        pos += 1
+        if next_char() == ']':
+            return
+        while True:
+            if next_char() in '-0123456789':
+                # 숫자는 앞부분만으로도 파싱되므로 ("2.5"의 "2") 뒤의 구분자까지 읽어 둠
+                while not eof and not JSON_NUMBER_END_RE.search(buffer, pos):
+                    read_more()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    read_more()
+                    continue
+                break
+            pos = end
+            yield value
+            separator = next_char()
+            pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"{path}: expected ',' or ']' in JSON array")
+
+def load_schema(schema_file=None):
     """스키마 파일을 로드합니다."""
-    print(f"Loading schema from {SCHEMA_FILE}...")
-    with open(SCHEMA_FILE, 'r', encoding='utf-8') as f:
+    schema_file = SCHEMA_FILE if schema_file is None else schema_file
+    print(f"Loading schema from {schema_file}...")
+    with open(schema_file, 'r', encoding='utf-8') as f:
         return json.load(f)
 
+class DataSnapshot:
+    """로드된 DataHierarchy(테이블 + 인덱스)를 pickle로 저장하는 스냅샷
+
+    파일에는 헤더(SNAPSHOT_VERSION, 소스 파일별 크기/mtime/sha256)와 hierarchy가
+    차례로 들어 있습니다. 크기와 mtime이 같으면 해시 계산을 건너뛰고, mtime만
+    바뀐 파일은 해시가 같으면 그대로 유효합니다.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    @staticmethod
+    def signature(path, previous=None):
+        """파일의 (크기, mtime_ns, sha256)을 반환합니다."""
+        stat = path.stat()
+        if previous is not None and tuple(previous[:2]) == (stat.st_size, stat.st_mtime_ns):
+            return tuple(previous)
+        return (stat.st_size, stat.st_mtime_ns, hashlib.sha256(path.read_bytes()).hexdigest())
+
+    @classmethod
+    def sources_unchanged(cls, stored, sources):
+        """저장된 {경로: 서명}이 현재 소스 파일 목록, 크기, 해시와 같은지 확인합니다."""
+        if set(stored) != {str(path) for path in sources}:
+            return False
+        for path in sources:
+            current = cls.signature(path, stored[str(path)])
+            if (current[0], current[2]) != (stored[str(path)][0], stored[str(path)][2]):
+                return False
+        return True
+
+    def load(self, sources, storage='dict'):
+        """소스 파일과 저장 방식이 같으면 저장된 hierarchy를, 아니면 None을 반환합니다."""
+        try:
+            with open(self.path, 'rb') as f:
+                header = pickle.load(f)
+                if header.get('version') != SNAPSHOT_VERSION or header.get('storage') != storage:
+                    return None
+                if not self.sources_unchanged(header['sources'], sources):
+                    return None
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, TypeError) as e:
+            print(f"⚠ Ignoring unreadable data snapshot {self.path}: {e}")
+            return None
+
+    def save(self, sources, hierarchy):
+        """hierarchy와 소스 파일 서명을 저장합니다 (임시 파일에 쓴 뒤 교체)."""
+        header = {'version': SNAPSHOT_VERSION,
+                  'storage': hierarchy.storage,
+                  'sources': {str(path): self.signature(path) for path in sources}}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(hierarchy, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(self.path)
+
+def sqlite_quote(name):
+    """SQLite 식별자를 따옴표로 감쌉니다 (Index 같은 예약어 열 이름용)."""
+    return '"' + name.replace('"', '""') + '"'
+
+def sqlite_ddl(schema):
+    """schema-meta.json으로 SQLite DDL을 만듭니다. (CREATE TABLE 목록, CREATE INDEX 목록)
+
+    열에는 타입을 선언하지 않아 JSON 값의 타입(int/float/str)이 그대로 보존됩니다.
+    데이터가 nullable 선언을 지키지 않는 경우가 있어 NOT NULL은 두지 않습니다.
+    선언된 인덱스의 string 열은 DataHierarchy._index_key처럼 CAST(... AS TEXT)로 색인합니다.
+    """
+    q = sqlite_quote
+    tables = []
+    indexes = []
+    for table_name, table_info in schema['tables'].items():
+        lines = [q(column) for column in table_info['columns']]
+        lines.append(f"PRIMARY KEY ({', '.join(map(q, table_info['pk']))})")
+        for fk in table_info.get('fks', []):
+            lines.append(f"FOREIGN KEY ({', '.join(map(q, fk['columns']))}) "
+                         f"REFERENCES {q(fk['ref']['table'])} ({', '.join(map(q, fk['ref']['columns']))})")
+        tables.append(f"CREATE TABLE {q(table_name)} (\n    " + ',\n    '.join(lines) + "\n)")
+
+        for index_def in table_info.get('indexes', []):
+            expressions = [f"CAST({q(col)} AS TEXT)" if table_info['columns'].get(col, {}).get('type') == 'string' else q(col)
+                           for col in index_def['columns']]
+            indexes.append(f"CREATE INDEX {q(table_name + '_' + index_def['name'])} "
+                           f"ON {q(table_name)} ({', '.join(expressions)})")
+        # 역방향 FK 조회(get_children)용 인덱스
+        for fk in table_info.get('fks', []):
+            indexes.append(f"CREATE INDEX {q(table_name + '_fk_' + '_'.join(fk['columns']))} "
+                           f"ON {q(table_name)} ({', '.join(map(q, fk['columns']))})")
+    return tables, indexes
+
+class SqliteTable(Sequence):
+    """hierarchy.data[테이블]처럼 쓰는 SQLite 테이블 (삽입 순서대로 dict 레코드)"""
+
+    def __init__(self, hierarchy, table_name):
+        self.hierarchy = hierarchy
+        self.table_name = table_name
+
+    def __len__(self):
+        return self.hierarchy.connection.execute(f"SELECT COUNT(*) FROM {sqlite_quote(self.table_name)}").fetchone()[0]
+
+    def __getitem__(self, i):
+        # 데이터베이스는 삭제 없이 새로 만들므로 i번째 행의 rowid는 i + 1
+        if i < 0:
+            i += len(self)
+        rows = self.hierarchy._select(self.table_name, "WHERE rowid = ?", (i + 1,))
+        if not rows:
+            raise IndexError(f"{self.table_name} index out of range")
+        return rows[0]
+
+    def __iter__(self):
+        return self.hierarchy._iter_select(self.table_name, "ORDER BY rowid")
+
+class SqliteTables(Mapping):
+    """hierarchy.data처럼 쓰는 테이블 이름 → SqliteTable"""
+
+    def __init__(self, hierarchy):
+        self.hierarchy = hierarchy
+
+    def __getitem__(self, table_name):
+        if table_name not in self.hierarchy.schema['tables']:
+            raise KeyError(table_name)
+        return SqliteTable(self.hierarchy, table_name)
+
+    def __iter__(self):
+        return iter(self.hierarchy.schema['tables'])
+
+    def __len__(self):
+        return len(self.hierarchy.schema['tables'])
+
+class SqlitePkIndex:
+    """hierarchy.indexes[테이블]처럼 PK 값으로 레코드를 찾는 SQL 조회"""
+
+    def __init__(self, hierarchy, table_name):
+        self.hierarchy = hierarchy
+        self.table_name = table_name
+
+    def get(self, key, default=None):
+        pk_columns = self.hierarchy.schema['tables'][self.table_name]['pk']
+        if len(pk_columns) == 1:
+            # DataHierarchy의 PK 인덱스처럼 빈 키는 색인하지 않음
+            if not key:
+                return default
+            key = (key,)
+        where = ' AND '.join(f"{sqlite_quote(col)} IS ?" for col in pk_columns)
+        rows = self.hierarchy._select(self.table_name, f"WHERE {where} LIMIT 1", tuple(key))
+        return rows[0] if rows else default
+
+    def __getitem__(self, key):
+        record = self.get(key)
+        if record is None:
+            raise KeyError(key)
+        return record
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+class SqliteHierarchy(DataHierarchy):
+    """DataHierarchy와 같은 조회 API를 SQLite 데이터베이스로 제공합니다 (--storage sqlite)
+
+    레코드를 메모리에 들고 있지 않고 data, indexes, lookup, get_related, get_children을
+    SQL 질의로 처리합니다. 데이터베이스에는 소스 파일 서명이 함께 저장되어, 소스가
+    바뀌지 않았으면 다음 빌드에서 그대로 다시 엽니다.
+    """
+    storage = 'sqlite'
+
+    def __init__(self, schema, path):
+        self.schema = schema
+        self.path = Path(path)
+        self._connection = None
+        self._connection_pid = None
+        self._keys = None
+        self.relationships = self._parse_relationships()
+        self.secondary_indexes = {
+            table_name: {index_def['name']: (index_def['columns'], None) for index_def in table_info['indexes']}
+            for table_name, table_info in schema['tables'].items() if table_info.get('indexes')
+        }
+        self.data = SqliteTables(self)
+        self.indexes = {table_name: SqlitePkIndex(self, table_name) for table_name in schema['tables']}
+
+    @property
+    def connection(self):
+        """현재 프로세스의 데이터베이스 연결 (fork된 렌더링 작업 프로세스는 새로 연결)"""
+        if self._connection is None or self._connection_pid != os.getpid():
+            self._connection = sqlite3.connect(self.path)
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        return state
+
+    @classmethod
+    def open(cls, path, schema, sources):
+        """소스 파일이 바뀌지 않았으면 기존 데이터베이스를, 아니면 None을 반환합니다."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with contextlib.closing(sqlite3.connect(path)) as connection:
+                version = connection.execute("SELECT value FROM _meta WHERE key = 'version'").fetchone()
+                stored = {row[0]: row[1:] for row in connection.execute("SELECT * FROM _sources")}
+        except sqlite3.Error as e:
+            print(f"⚠ Ignoring unreadable SQLite database {path}: {e}")
+            return None
+        if version != (SNAPSHOT_VERSION,) or not DataSnapshot.sources_unchanged(stored, sources):
+            return None
+        return cls(schema, path)
+
+    @classmethod
+    def build(cls, path, schema, data_dir, sources):
+        """JSON 파일들을 스트리밍으로 읽어 데이터베이스를 새로 만듭니다 (임시 파일에 쓴 뒤 교체)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.unlink(missing_ok=True)
+
+        hierarchy = cls(schema, tmp_path)
+        connection = hierarchy.connection
+        tables, indexes = sqlite_ddl(schema)
+        for statement in tables:
+            connection.execute(statement)
+        connection.execute("CREATE TABLE _columns (table_name TEXT, column_name TEXT, key TEXT)")
+        for key, filename in JSON_FILES.items():
+            print(f"Loading {filename} into SQLite...")
+            hierarchy.add_records(key, iter_json_array(Path(data_dir) / filename))
+        # 인덱스는 데이터를 모두 넣은 뒤 한 번에 생성
+        for statement in indexes:
+            connection.execute(statement)
+        connection.execute("CREATE TABLE _meta (key TEXT PRIMARY KEY, value TEXT)")
+        connection.execute("INSERT INTO _meta VALUES ('version', ?)", (SNAPSHOT_VERSION,))
+        connection.execute("CREATE TABLE _sources (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT)")
+        connection.executemany("INSERT INTO _sources VALUES (?, ?, ?, ?)",
+                               [(str(source), *DataSnapshot.signature(source)) for source in sources])
+        connection.commit()
+        connection.close()
+
+        tmp_path.replace(path)
+        return cls(schema, path)
+
+    def _column_keys(self, table_name):
+        """SQL 열 이름 → 레코드 키 (대소문자만 다른 키 때문에 이름을 바꾼 열만)"""
+        if self._keys is None:
+            self._keys = defaultdict(dict)
+            for table, column, key in self.connection.execute("SELECT * FROM _columns"):
+                self._keys[table][column] = key
+        return self._keys[table_name]
+
+    def add_records(self, table_name, records):
+        """레코드를 SQLITE_BATCH_SIZE개씩 INSERT합니다. 스키마에 없는 키는 열로 추가합니다.
+
+        SQLite 열 이름은 대소문자를 구분하지 않으므로 (예: 스키마의 Subindex와 데이터의
+        SubIndex) 겹치는 키는 다른 열 이름으로 저장하고 _columns에 원래 키를 기록합니다.
+        """
+        self._catalog = None
+        q = sqlite_quote
+        connection = self.connection
+        column_keys = self._column_keys(table_name)
+        columns = [row[1] for row in connection.execute(f"PRAGMA table_info({q(table_name)})")]
+        keys = [column_keys.get(column, column) for column in columns]
+        known = set(keys)
+        taken = {column.lower() for column in columns}
+        batch = []
+
+        def flush():
+            if batch:
+                connection.executemany(f"INSERT INTO {q(table_name)} ({', '.join(map(q, columns))}) "
+                                       f"VALUES ({', '.join('?' * len(columns))})", batch)
+                batch.clear()
+
+        for record in records:
+            new_keys = [key for key in record if key not in known]
+            if new_keys:
+                flush()
+                for key in new_keys:
+                    column = key
+                    suffix = 2
+                    while column.lower() in taken:
+                        column = f"{key}_{suffix}"
+                        suffix += 1
+                    connection.execute(f"ALTER TABLE {q(table_name)} ADD COLUMN {q(column)}")
+                    if column != key:
+                        connection.execute("INSERT INTO _columns VALUES (?, ?, ?)", (table_name, column, key))
+                        column_keys[column] = key
+                    columns.append(column)
+                    keys.append(key)
+                    known.add(key)
+                    taken.add(column.lower())
+            batch.append(tuple(record.get(key) for key in keys))
+            if len(batch) >= SQLITE_BATCH_SIZE:
+                flush()
+        flush()
+
+    def _iter_select(self, table_name, clause='', params=()):
+        cursor = self.connection.execute(f"SELECT * FROM {sqlite_quote(table_name)} {clause}", params)
+        column_keys = self._column_keys(table_name)
+        keys = [column_keys.get(description[0], description[0]) for description in cursor.description]
+        for row in cursor:
+            yield dict(zip(keys, row))
+
+    def _select(self, table_name, clause='', params=()):
+        return list(self._iter_select(table_name, clause, params))
+
+    def lookup(self, table_name, index_name, *values):
+        """선언된 보조 인덱스로 레코드 리스트를 조회합니다 (CAST 인덱스 사용)."""
+        try:
+            columns, _ = self.secondary_indexes[table_name][index_name]
+        except KeyError:
+            raise KeyError(f"Unknown index {table_name}.{index_name}") from None
+        if len(values) != len(columns):
+            raise ValueError(f"{table_name}.{index_name} expects {len(columns)} values ({', '.join(columns)}), got {len(values)}")
+
+        key = self._index_key(table_name, columns, values)
+        column_info = self.schema['tables'][table_name]['columns']
+        where = ' AND '.join(
+            f"CAST({sqlite_quote(col)} AS TEXT) IS ?" if column_info.get(col, {}).get('type') == 'string'
+            else f"{sqlite_quote(col)} IS ?"
+            for col in columns)
+        return self._select(table_name, f"WHERE {where} ORDER BY rowid", key if len(columns) > 1 else (key,))
+
+    def get_children(self, table_name, record, child_table=None):
+        """자식 레코드들을 가져옵니다 (FK 인덱스로 조회).
+
+        child_table을 지정하면 해당 테이블의 자식 레코드 리스트만 반환합니다.
+        """
+        if child_table is not None:
+            tables = [child_table]
+        else:
+            tables = [table for table, rels in self.relationships.items()
+                      if any(rel['ref_table'] == table_name for rel in rels)]
+
+        children = {}
+        for table in tables:
+            matching_records = []
+            for rel in self.relationships.get(table, []):
+                if rel['ref_table'] != table_name:
+                    continue
+                values = tuple(record.get(col) for col in rel['ref_columns'])
+                if len(values) == 1 and values[0] is None:
+                    continue
+                where = ' AND '.join(f"{sqlite_quote(col)} IS ?" for col in rel['columns'])
+                matching_records.extend(self._select(table, f"WHERE {where} ORDER BY rowid", values))
+            if matching_records:
+                children[table] = matching_records
+
+        if child_table is not None:
+            return children.get(child_table, [])
+        return children
+
+def data_sources(data_dir=None):
+    """DataHierarchy를 만드는 소스 파일 (스키마 + JSON 파일) 경로 리스트"""
+    schema_file = SCHEMA_FILE if data_dir is None else Path(data_dir) / SCHEMA_FILE.name
+    data_dir = BASE_DIR if data_dir is None else Path(data_dir)
+    return [schema_file] + [data_dir / filename for filename in JSON_FILES.values()]
+
+def load_hierarchy(data_dir=None, snapshot=None, stream=False, storage='dict'):
+    """스키마와 JSON 데이터로 DataHierarchy를 만듭니다.
+
+    snapshot(DataSnapshot)이 주어지면 소스 파일이 그대로일 때 스냅샷에서 읽고,
+    바뀌었거나 스냅샷이 없으면 JSON에서 만든 뒤 스냅샷을 다시 씁니다.
+    stream=True이면 JSON 배열을 레코드 단위로 읽어 바로 hierarchy에 추가합니다.
+    storage는 DataHierarchy의 레코드 저장 방식입니다. 'sqlite'이면 SQLite 데이터베이스가
+    스냅샷 역할을 하며 (snapshot이 None이면 항상 다시 만듦) JSON은 항상 스트리밍으로 읽습니다.
+    """
+    sources = data_sources(data_dir)
+    schema_file = sources[0]
+    sqlite_file = SQLITE_FILE if data_dir is None else Path(data_dir) / SQLITE_FILE.name
+    data_dir = BASE_DIR if data_dir is None else Path(data_dir)
+
+    if storage == 'sqlite':
+        schema = load_schema(schema_file)
+        with metrics.phase('open_sqlite'):
+            hierarchy = SqliteHierarchy.open(sqlite_file, schema, sources) if snapshot is not None else None
+        if hierarchy is not None:
+            print(f"✓ Opened SQLite database {sqlite_file.name}")
+            return hierarchy
+        print(f"\nBuilding SQLite database {sqlite_file.name}...")
+        with metrics.phase('build_sqlite'):
+            hierarchy = SqliteHierarchy.build(sqlite_file, schema, data_dir, sources)
+        print(f"✓ SQLite database built with {len(hierarchy.relationships)} table relationships")
+        return hierarchy
+
+    if snapshot is not None:
+        with metrics.phase('read_snapshot'):
+            hierarchy = snapshot.load(sources, storage)
+        if hierarchy is not None:
+            print(f"✓ Loaded data hierarchy from snapshot {snapshot.path.name}")
+            return hierarchy
+
+    # 스키마 로드
+    schema = load_schema(schema_file)
+
+    if stream:
+        # 레코드를 하나씩 파싱해 바로 저장/인덱싱 (원본 리스트를 따로 만들지 않음)
+        print("\nStreaming JSON data into data hierarchy...")
+        with metrics.phase('stream_json'):
+            hierarchy = DataHierarchy(schema, {}, storage)
+            for key, filename in JSON_FILES.items():
+                print(f"Streaming {filename}...")
+                hierarchy.add_records(key, iter_json_array(data_dir / filename))
+    else:
+        # JSON 데이터 로드
+        with metrics.phase('load_json'):
+            data = load_json_data(data_dir)
+
+        # 데이터 계층 구조 생성
+        print("\nBuilding data hierarchy from schema...")
+        with metrics.phase('build_hierarchy'):
+            hierarchy = DataHierarchy(schema, data, storage)
+    print(f"✓ Data hierarchy built with {len(hierarchy.relationships)} table relationships")
+
+    if snapshot is not None:
+        with metrics.phase('write_snapshot'):
+            snapshot.save(sources, hierarchy)
+        print(f"✓ Wrote data snapshot {snapshot.path.name}")
+    return hierarchy
+
+def peak_rss_bytes():
+    """현재 프로세스의 최대 RSS(바이트)를 반환합니다. 알 수 없으면 None."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+def benchmark_startup(scales=(1, 50)):
+    """JSON 로드 + 인덱스 생성과 스냅샷 로드의 시작 시간을 데이터 배율별로 비교합니다.
+
+    배율 n은 CodeContent 행을 n번 복제(ContentID에 접미사)한 데이터셋입니다.
+    """
+    results = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_dir = Path(tmp)
+            shutil.copy(SCHEMA_FILE, tmp_dir / SCHEMA_FILE.name)
+            for key, filename in JSON_FILES.items():
+                if key != 'CodeContent':
+                    shutil.copy(BASE_DIR / filename, tmp_dir / filename)
+            with open(BASE_DIR / JSON_FILES['CodeContent'], 'r', encoding='utf-8') as f:
+                contents = json.load(f)
+            scaled = [dict(row, ContentID=f"{row['ContentID']}-{copy}") if copy else row
+                      for copy in range(scale) for row in contents]
+            with open(tmp_dir / JSON_FILES['CodeContent'], 'w', encoding='utf-8') as f:
+                json.dump(scaled, f, ensure_ascii=False)
+
+            snapshot = DataSnapshot(tmp_dir / SNAPSHOT_FILE.name)
+            timings = {}
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                load_hierarchy(tmp_dir)
+                timings['json'] = time.perf_counter() - start
+                load_hierarchy(tmp_dir, snapshot)
+                start = time.perf_counter()
+                load_hierarchy(tmp_dir, snapshot)
+                timings['snapshot'] = time.perf_counter() - start
+            results.append((scale, len(scaled), timings, snapshot.path.stat().st_size))
+
+    print(f"{'scale':>6} {'rows':>9} {'json+index':>11} {'snapshot':>9} {'speedup':>8} {'snapshot size':>14}")
+    for scale, rows, timings, size in results:
+        print(f"{scale:>5}x {rows:>9,} {timings['json']:>10.3f}s {timings['snapshot']:>8.3f}s "
+              f"{timings['json'] / timings['snapshot']:>7.1f}x {size:>13,}B")
+    return results
+
+def synthetic_content_rows(count, contents):
+    """CodeContent 행을 복제해 count개의 합성 행을 만듭니다.
+
+    ContentID는 고유하게 바꾸고, 짧은 문자열 값은 JSON에서 읽은 것처럼 행마다
+    새 객체로 만듭니다. 본문처럼 긴 문자열은 행끼리 공유합니다.
+    """
+    for i in range(count):
+        template = contents[i % len(contents)]
+        row = {}
+        for key, value in template.items():
+            if type(value) is str and len(value) <= 32:
+                value = value[:1] + value[1:]
+            row[key] = value
+        row['ContentID'] = f"{template['ContentID']}-{i}"
+        yield row
+
+def benchmark_storage(row_counts=(100_000, 1_000_000)):
+    """CodeContent 행 수별로 dict / compact 저장 방식의 메모리 사용량을 비교합니다.
+
+    행을 하나씩 만들어 바로 추가하므로, 측정값은 hierarchy가 붙잡고 있는
+    레코드 + 인덱스 + 짧은 문자열 값의 크기입니다 (tracemalloc).
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        schema = load_schema()
+        data = load_json_data()
+    contents = data.pop('CodeContent')
+
+    results = []
+    for count in row_counts:
+        measured = {}
+        for storage in ('dict', 'compact'):
+            tracemalloc.start()
+            start = time.perf_counter()
+            hierarchy = DataHierarchy(schema, data, storage)
+            hierarchy.add_records('CodeContent', synthetic_content_rows(count, contents))
+            elapsed = time.perf_counter() - start
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del hierarchy
+            measured[storage] = (size, elapsed)
+        results.append((count, measured))
+
+    print(f"{'rows':>10} {'dict':>10} {'compact':>10} {'reduction':>10} {'dict build':>11} {'compact build':>14}")
+    for count, measured in results:
+        (dict_size, dict_time), (compact_size, compact_time) = measured['dict'], measured['compact']
+        print(f"{count:>10,} {dict_size / 2**20:>8.1f}MB {compact_size / 2**20:>8.1f}MB "
+              f"{100 * (1 - compact_size / dict_size):>9.0f}% {dict_time:>10.2f}s {compact_time:>13.2f}s")
+    return results
+
+# --watch에서 소스 파일을 확인하는 간격 (초)
+WATCH_INTERVAL = 0.5
+
+# serve 모드 기본 주소, 응답 LRU 캐시 크기, 검색 결과 기본 개수
+SERVE_HOST = '127.0.0.1'
+SERVE_PORT = 8000
+SERVE_CACHE_SIZE = 256
+SERVE_SEARCH_LIMIT = 50
+# serve 모드 조각 경로: 코드별 챕터 리스트/본문, 챕터 하나의 본문
+SERVE_FRAGMENT_RE = re.compile(r'/fragments/(?P<code_id>[^/]+)-(?P<part>chapters|content)\.html')
+# serve 모드 코드별 본문 텍스트 샤드 경로 (content_text_shards)
+SERVE_TEXT_RE = re.compile(r'/fragments/(?P<code_id>[^/]+)-text\.json')
+SERVE_CHAPTER_RE = re.compile(r'/fragments/(?P<code_id>[^/]+)/(?P<chapter_id>[^/]+)\.html')
+
+# search 서브커맨드의 BM25 매개변수, 필드 가중치 (제목 > 본문), 기본 결과 수와 발췌 길이
+BM25_K1 = 1.2
+BM25_B = 0.75
+BM25_FIELD_BOOSTS = (('TitleEN', 3.0), ('TitleKR', 3.0), ('ContentEN', 1.0), ('ContentKR', 1.0))
+SEARCH_RESULT_LIMIT = 10
+SEARCH_SNIPPET_LENGTH = 160
+# Bm25Index.search가 검색어 posting을 한 번에 읽는 개수
+SEARCH_SCAN_BATCH = 128
+# 문서 수의 1/SEARCH_DENSE_RATIO 이상에 나오는 검색어는 문서 번호 -> 점수 배열을 색인에 함께 저장
+SEARCH_DENSE_RATIO = 16
+# code_ids의 문서가 전체의 1/SEARCH_FILTER_SCAN_RATIO 이하이면 Bm25Index.search가 그 문서들을 모두 계산
+SEARCH_FILTER_SCAN_RATIO = 8
+
+# 합성 데이터 문장 재료 (generate_synthetic_data)
+SYNTHETIC_EN_SUBJECTS = ('Exit access doorways', 'Automatic sprinkler systems', 'Fire barriers', 'Standpipe hose connections',
+                         'Interior exit stairways', 'Smoke control systems', 'Fire pumps', 'Occupant load calculations',
+                         'Corridor walls', 'Emergency escape openings', 'Fire alarm control units', 'Accessible routes')
+SYNTHETIC_EN_VERBS = ('shall be provided', 'shall be installed', 'shall be designed', 'shall be maintained',
+                      'shall not be required', 'shall be permitted')
+SYNTHETIC_EN_OBJECTS = ('in each story of the building', 'where the occupant load exceeds 49',
+                        'with a fire-resistance rating of not less than 1 hour', 'in accordance with the approved plans',
+                        'at the most remote point of the system', 'throughout Group H occupancies',
+                        'without the use of keys, tools or special knowledge')
+SYNTHETIC_EN_WORDS = ('General', 'Scope', 'Means', 'Egress', 'Fire', 'Protection', 'Systems', 'Separation', 'Height',
+                      'Area', 'Occupancy', 'Construction', 'Sprinkler', 'Pump', 'Alarm', 'Accessibility', 'Design')
+SYNTHETIC_KR_SUBJECTS = ('비상구 출입문', '자동 스프링클러 설비', '방화 구획벽', '옥내 소화전 연결구', '피난 계단',
+                         '제연 설비', '소방 펌프', '재실자 수용 인원', '복도 벽', '비상 탈출구', '화재 경보 수신기')
+SYNTHETIC_KR_CLAUSES = ('건물의 각 층에 설치하여야 한다', '재실자 수가 49명을 초과하는 경우 설치하여야 한다',
+                        '1시간 이상의 내화 성능을 가져야 한다', '승인된 도면에 따라 설치하여야 한다',
+                        '설비의 최원점에서 확인하여야 한다', '열쇠나 공구 없이 열 수 있어야 한다')
+SYNTHETIC_KR_WORDS = ('일반', '적용 범위', '피난', '방화', '설비', '구획', '높이', '면적', '용도', '구조', '경보', '설계')
+
+def generate_synthetic_data(data_dir, scale=1, seed=0):
+    """schema-meta.json을 따르는 합성 데이터셋을 data_dir에 씁니다.
+
+    1배는 지금 데이터와 비슷한 크기입니다 (콘텐츠가 있는 코드 4개 × 챕터 5개 × 섹션 10개 ×
+    행 5개 = CodeContent 1,000행, 콘텐츠 없는 코드 6개). 배율만큼 코드 수가 늘어납니다.
+    본문에는 영어/한국어 문장과 같은 버전의 Section X.Y / Chapter Y 참조가 섞여 있습니다.
+    반환값은 테이블별 행 수입니다.
+    """
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
+    def title_en():
+        return ' '.join(rng.sample(SYNTHETIC_EN_WORDS, rng.randint(2, 4)))
+
+    def title_kr():
+        return ' '.join(rng.sample(SYNTHETIC_KR_WORDS, rng.randint(2, 3)))
+
+    tables = {key: [] for key in JSON_FILES}
+    tables['CodeType'] = [
+        {'CodeTypeID': 'CT001', 'CodeTypeName': 'Model Codes', 'Description': '모델 코드'},
+        {'CodeTypeID': 'CT002', 'CodeTypeName': 'Standards', 'Description': '표준'},
+    ]
+    tables['Discipline'] = [
+        {'DisciplineID': 'D001', 'DisciplineNameEN': 'Architecture', 'DisciplineNameKR': '건축'},
+        {'DisciplineID': 'D002', 'DisciplineNameEN': 'Fire', 'DisciplineNameKR': '소방'},
+        {'DisciplineID': 'D003', 'DisciplineNameEN': 'Electrical', 'DisciplineNameKR': '전기'},
+    ]
+    tables['Jurisdiction'] = [
+        {'JurisdictionID': 'J001', 'JurisdictionName': 'California', 'StateName': 'California', 'StateCode': 'CA'},
+    ]
+
+    for code in range(10 * scale):
+        model_code_id = f"MC{code + 1:05d}"
+        code_name = f"SC{code + 1}"
+        discipline = tables['Discipline'][code % len(tables['Discipline'])]
+        tables['ModelCode'].append({'ModelCodeID': model_code_id, 'CodeTypeID': 'CT001', 'ModelCodeName': code_name,
+                                    'Description': f"Synthetic {discipline['DisciplineNameEN']} Code {code + 1}"})
+        tables['ModelCodeDiscipline'].append({'ModelCodeID': model_code_id, 'DisciplineID': discipline['DisciplineID'],
+                                              'ModelCodeName': code_name})
+        # 코드 10개 중 4개만 콘텐츠가 있음 (최신 버전)
+        has_content = code % 10 < 4
+        for year in (2021.0, 2024.0) if has_content else (2024.0,):
+            tables['ModelCodeVersion'].append({
+                'ModelCodeVersionID': f"MCV{code + 1:05d}-{int(year)}", 'ModelCodeID': model_code_id,
+                'Year': year, 'Description': f"{code_name} {int(year)} Edition"})
+        if not has_content:
+            continue
+
+        version_id = f"MCV{code + 1:05d}-2024"
+        sections = []
+        for chapter in range(1, 6):
+            chapter_id = f"CH{code + 1:05d}-{chapter:02d}"
+            tables['CodeChapter'].append({
+                'ChapterID': chapter_id, 'ModelCodeVersionID': version_id, 'Chapter': chapter,
+                'TitleEN': title_en(), 'TitleKR': title_kr(),
+                'ChapterComment': f"Chapter {chapter} 에서는 {rng.choice(SYNTHETIC_KR_SUBJECTS)}에 관해 기술하고 있습니다." if rng.random() < 0.3 else None})
+            for number in range(1, 11):
+                section_number = chapter * 100 + number
+                section = f"[F]{section_number}" if rng.random() < 0.1 else section_number
+                sections.append((chapter, chapter_id, section_number, section))
+
+        for chapter, chapter_id, section_number, section in sections:
+            subsections = [None, 1, 2, 3, '3.1' if rng.random() < 0.2 else 4]
+            for subsection in subsections:
+                def sentence_en():
+                    text = f"{rng.choice(SYNTHETIC_EN_SUBJECTS)} {rng.choice(SYNTHETIC_EN_VERBS)} {rng.choice(SYNTHETIC_EN_OBJECTS)}"
+                    roll = rng.random()
+                    if roll < 0.25:
+                        _, _, ref_number, _ = rng.choice(sections)
+                        text += f" in accordance with Section {ref_number}.{rng.randint(1, 3)}"
+                    elif roll < 0.35:
+                        text += f" as specified in Chapter {rng.randint(1, 6)}"
+                    return text + '.'
+
+                def sentence_kr():
+                    text = f"{rng.choice(SYNTHETIC_KR_SUBJECTS)}는 {rng.choice(SYNTHETIC_KR_CLAUSES)}"
+                    if rng.random() < 0.2:
+                        _, _, ref_number, _ = rng.choice(sections)
+                        text = f"Section {ref_number} 에 따라 " + text
+                    return text + '.'
+
+                content_id = f"C{len(tables['CodeContent']) + 1:07d}"
+                tables['CodeContent'].append({
+                    'ContentID': content_id, 'CodeTypeID': 'CT001', 'ModelCodeID': model_code_id,
+                    'ModelCodeVersionID': version_id, 'JurisdictionID': None, 'ChapterID': chapter_id,
+                    'Chapter': chapter, 'Section': section, 'Subsection': subsection,
+                    'OrderKey': f"{chapter:04d}", 'Index': f"ASTM E{rng.randint(100, 2999)}" if rng.random() < 0.05 else None,
+                    'SubIndex': None, 'TitleEN': title_en(), 'TitleKR': title_kr(),
+                    'ContentEN': ' '.join(sentence_en() for _ in range(rng.randint(1, 4))),
+                    'ContentKR': ' '.join(sentence_kr() for _ in range(rng.randint(1, 3))),
+                    'Comment': f"{rng.choice(SYNTHETIC_KR_SUBJECTS)} 관련 주의 사항입니다." if rng.random() < 0.05 else None})
+                if rng.random() < 0.02:
+                    attachment_type = rng.choice(('F', 'T'))
+                    tables['CodeAttachment'].append({
+                        'AttachmentID': f"D{len(tables['CodeAttachment']) + 1:07d}", 'ModelCodeVersionID': version_id,
+                        'Type': attachment_type, 'Number': rng.randint(1, 9) if attachment_type == 'T' else None,
+                        'FileName': f"{code_name}_{chapter}_{section}.{subsection}_{attachment_type}",
+                        'Chapter': chapter, 'Section': section, 'Subsection': subsection,
+                        'AttachTitleEN': title_en(), 'AttachTitleKR': title_kr(),
+                        'AttachContentEN': None, 'AttachContentKR': None, 'AttachComment': None})
+
+    shutil.copy(SCHEMA_FILE, data_dir / SCHEMA_FILE.name)
+    for key, filename in JSON_FILES.items():
+        with open(data_dir / filename, 'w', encoding='utf-8') as f:
+            json.dump(tables[key], f, ensure_ascii=False, indent=2)
+    return {key: len(rows) for key, rows in tables.items()}
+
+def _benchmark_build_phases(data_dir):
+    """합성 데이터셋 하나로 빌드 단계별 시간과 최대 RSS를 측정합니다 (별도 프로세스에서 실행)."""
+    phases = {}
+
+    @contextlib.contextmanager
+    def phase(name):
+        start = time.perf_counter()
+        yield
+        phases[name] = {'seconds': time.perf_counter() - start, 'peak_rss_bytes': peak_rss_bytes()}
+
+    data_dir = Path(data_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        with phase('load'):
+            schema = load_schema(data_dir / SCHEMA_FILE.name)
+            data = load_json_data(data_dir)
+        with phase('hierarchy'):
+            hierarchy = DataHierarchy(schema, data)
+            del data
+        with phase('library_cards'):
+            sidebar_library_submenu_items(hierarchy)
+            create_library_cards(hierarchy)
+        with phase('library_content'):
+            create_all_library_content(hierarchy)
+        with phase('generate_html'):
+            final_html = generate_html(hierarchy)
+        with phase('write'):
+            output = final_html.encode('utf-8')
+            (data_dir / OUTPUT_FILE.name).write_bytes(output)
+    return {'phases': phases, 'output_bytes': len(output), 'peak_rss_bytes': peak_rss_bytes()}
+
+def benchmark_build(scales=(1, 10, 100), seed=0, results_file=None):
+    """합성 데이터 배율별로 빌드 단계 시간, 최대 메모리, 출력 크기를 측정합니다.
+
+    배율마다 새 프로세스에서 측정하며, 결과는 results_file(JSON)의 'runs' 목록에
+    추가되어 실행 간 비교에 쓸 수 있습니다. library_cards와 library_content는
+    generate_html 안에서도 다시 실행되므로, generate_html은 페이지 전체 생성 시간입니다.
+    """
+    results_file = BENCHMARK_FILE if results_file is None else Path(results_file)
+    run = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'generator_version': GENERATOR_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'scales': [],
+    }
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            rows = generate_synthetic_data(tmp, scale, seed)
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                measured = executor.submit(_benchmark_build_phases, tmp).result()
+        run['scales'].append({'scale': scale, 'rows': rows, **measured})
+
+    print(f"{'scale':>6} {'content rows':>13} " + ' '.join(f"{name:>15}" for name in BENCHMARK_PHASES)
+          + f" {'peak RSS':>10} {'output':>13}")
+    for result in run['scales']:
+        print(f"{result['scale']:>5}x {result['rows']['CodeContent']:>13,} "
+              + ' '.join(f"{result['phases'][name]['seconds']:>14.2f}s" for name in BENCHMARK_PHASES)
+              + f" {result['peak_rss_bytes'] / 2**20:>8.0f}MB {result['output_bytes']:>12,}B")
+
+    history = {'runs': []}
+    if results_file.exists():
+        with open(results_file, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+    history['runs'].append(run)
+    with open(results_file, 'w', encoding='utf-8') as f:
+        json.dump(history, f, ensure_ascii=False, indent=2)
+    print(f"✓ Benchmark results appended to {results_file}")
+    return run
+
 def load_html():
     """reference.txt HTML 파일을 로드합니다."""
     print(f"Loading {REFERENCE_FILE}...")
@@ -219,53 +1520,22 @@ def create_library_cards(hierarchy):
     codes_with_data = []
     codes_without_data = []
 
-    # ModelCode와 관련 데이터를 조인
-    for model_code in hierarchy.data['ModelCode']:
-        model_code_id = model_code['ModelCodeID']
-        code_name = model_code['ModelCodeName']
-        description = model_code['Description']
-
-        # ModelCodeDiscipline을 통해 Discipline 찾기
-        discipline_name = '기타'
-        badge_color = '#A8D0E6'
-        badge_text = '기타'
-
-        for mcd in hierarchy.data['ModelCodeDiscipline']:
-            if mcd['ModelCodeID'] == model_code_id:
-                discipline = hierarchy.get_related('ModelCodeDiscipline', mcd, 'Discipline')
-                if discipline:
-                    discipline_name = discipline['DisciplineNameKR']
-                    badge_text = discipline_name
-                    # Set badge color based on discipline
-                    if '소방' in discipline_name or '안전' in discipline_name:
-                        badge_color = '#F76C6C'
-                    elif '전기' in discipline_name:
-                        badge_color = '#FFA500'  # Orange for electrical
-                    else:
-                        badge_color = '#A8D0E6'  # Default blue
-                    break
-
-        # 최신 버전 찾기
-        versions = [v for v in hierarchy.data['ModelCodeVersion'] if v['ModelCodeID'] == model_code_id]
-        latest_version = max(versions, key=lambda v: v.get('Year') or 0) if versions else None
-
-        # 버전 텍스트
-        if latest_version and latest_version.get('Year'):
-            year = int(latest_version['Year']) if latest_version['Year'] else ''
-            version_text = f"{code_name.split(':')[0].strip()} {year}" if year else code_name
-        else:
-            version_text = code_name.split(':')[0].strip()
+    # 최신 버전, 분야 배지, 활성화 여부(챕터가 있는 코드만)는 hierarchy.catalog에서 조회
+    for entry in hierarchy.catalog.entries:
+        model_code_id = entry['code_id']
+        code_name = entry['model_code']['ModelCodeName']
+        description = entry['model_code']['Description']
+        badge_color = entry['badge_color']
+        badge_text = entry['badge_text']
+        version_text = entry['display_name']
+        is_active = entry['active']
 
         # 아이콘
         icon_svg = get_icon_svg(code_name)
 
-        # 활성화 여부 (챕터가 있는 코드만 활성화)
-        chapters = hierarchy.get_children('ModelCodeVersion', latest_version) if latest_version else {}
-        is_active = 'CodeChapter' in chapters and len(chapters['CodeChapter']) > 0
-
         opacity_class = '' if is_active else 'opacity-50'
         cursor_class = 'cursor-pointer' if is_active else 'cursor-not-allowed'
-        data_attrs = f'data-code-id="{model_code_id}" data-version-id="{latest_version["ModelCodeVersionID"]}"' if is_active and latest_version else ''
+        data_attrs = f'data-code-id="{model_code_id}" data-version-id="{entry["version_id"]}"' if is_active else ''
 
         card_html = f'''
               <div class="code-card bg-white p-4 rounded-lg border-2 border-gray-200 {cursor_class} relative {opacity_class}" data-nav="library" {data_attrs}>
@@ -292,68 +1562,488 @@ def escape_js_string(s):
         return ''
     return s.replace('\\', '\\\\').replace("'", "\\'").replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
 
-def create_all_library_content(hierarchy):
-    """라이브러리 섹션의 모든 코드 콘텐츠를 생성합니다."""
-    all_codes_content = []
-    first_code_id = None
+class CrossReferenceLinker:
+    """콘텐츠 본문의 Section/Chapter 참조를 하이퍼링크로 변환합니다.
 
-    for model_code in hierarchy.data['ModelCode']:
-        model_code_id = model_code['ModelCodeID']
-
-        # 최신 버전 찾기
-        versions = [v for v in hierarchy.data['ModelCodeVersion'] if v['ModelCodeID'] == model_code_id]
-        latest_version = max(versions, key=lambda v: v.get('Year') or 0) if versions else None
+    버전별 챕터 번호 → ChapterID, 섹션 번호 → ChapterID 맵을 한 번만 만들고
+    하나의 정규식으로 한 번에 치환합니다.
+    """
 
-        if not latest_version:
-            continue
+    # "Section [number]" / "Section [number].[number]" 또는 "Chapter [number]"
+    PATTERN = re.compile(r'Section (\d+(?:\.\d+)?)|Chapter (\d+)')
+    # "403", "[F]414" 같은 최상위 섹션 번호
+    SECTION_NUMBER = re.compile(r'^(?:\[[A-Z]+\])?(\d+)$')
 
-        # 챕터가 있는지 확인
-        chapters = hierarchy.get_children('ModelCodeVersion', latest_version)
-        if 'CodeChapter' not in chapters or len(chapters['CodeChapter']) == 0:
-            continue
+    def __init__(self, hierarchy):
+        self.chapter_ids = defaultdict(dict)
+        for ch in hierarchy.data['CodeChapter']:
+            try:
+                chapter_num = int(ch.get('Chapter'))
+            except (TypeError, ValueError):
+                continue
+            self.chapter_ids[ch['ModelCodeVersionID']].setdefault(chapter_num, ch['ChapterID'])
 
-        # 첫 번째 활성 코드 찾음!
-        chapter_list = sorted(chapters['CodeChapter'], key=lambda x: x['Chapter'])
+        self.section_chapters = defaultdict(dict)
+        for content in hierarchy.data['CodeContent']:
+            if not content.get('ChapterID') or content.get('Section') is None:
+                continue
+            match = self.SECTION_NUMBER.match(str(content['Section']))
+            if match:
+                self.section_chapters[content['ModelCodeVersionID']].setdefault(match.group(1), content['ChapterID'])
+        self._digests = {}
+
+    def digest(self, version_id):
+        """버전의 챕터/섹션 맵 해시 (RenderCache 키용, 버전마다 한 번만 계산)"""
+        if version_id not in self._digests:
+            encoded = json.dumps([sorted(self.chapter_ids.get(version_id, {}).items()),
+                                  sorted(self.section_chapters.get(version_id, {}).items())], ensure_ascii=False)
+            self._digests[version_id] = hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+        return self._digests[version_id]
+
+    def link(self, text, version_id, current_chapter_id):
+        """text 안의 참조를 링크로 바꿉니다. 소유 챕터를 모르는 섹션은 현재 챕터로 연결합니다."""
+        if not text:
+            return text
+
+        chapter_ids = self.chapter_ids.get(version_id, {})
+        section_chapters = self.section_chapters.get(version_id, {})
+
+        def replace(match):
+            section_ref, chapter_ref = match.groups()
+            if section_ref is not None:
+                metrics.count('cross_references_linked')
+                chapter_id = section_chapters.get(section_ref.split('.')[0], current_chapter_id)
+                section_id = f"section-{chapter_id}-{section_ref}"
+                return f'<a href="#section-{section_id.replace(".", "-")}" class="text-[#F76C6C] hover:underline font-semibold" onclick="scrollToSection(\'{chapter_id}\', \'{section_ref}\')">Section {section_ref}</a>'
+
+            chapter_id = chapter_ids.get(int(chapter_ref))
+            if chapter_id is None:
+                metrics.count('cross_references_unresolved')
+                return match.group(0)  # Return original if not found
+            metrics.count('cross_references_linked')
+            return f'<a href="#chapter-{chapter_id}" class="text-[#F76C6C] hover:underline font-semibold" onclick="scrollToChapter(\'{chapter_id}\')">Chapter {chapter_ref}</a>'
+
+        return self.PATTERN.sub(replace, text)
+
+def render_chapter_content(hierarchy, linker, model_code, latest_version, chapter, content_source='data'):
+    """챕터 하나의 본문 HTML 블록을 생성합니다. 콘텐츠가 없으면 None을 반환합니다.
+
+    content_source='dom'이면 페이지 스크립트가 본문을 읽을 data-content-id/data-field 표시를 붙입니다.
+    """
+    dom_fields = content_source == 'dom'
+
+    def field_attr(field):
+        return f' data-field="{field}"' if dom_fields else ''
+
+    chapter_id = chapter['ChapterID']
+    chapter_num = chapter['Chapter']
+
+    # 이 챕터의 콘텐츠 가져오기
+    contents = hierarchy.get_children('CodeChapter', chapter, child_table='CodeContent')
+
+    # Helper function to parse section/subsection for sorting
+    def parse_section_key(value):
+        if not value:
+            return (0,)
+        # Handle both "1,1" and "2.1.1" formats
+        value_str = str(value).replace(',', '.')
+        try:
+            parts = [float(p) for p in value_str.split('.')]
+            return tuple(parts)
+        except:
+            return (0,)
+
+    contents.sort(key=lambda x: (
+        parse_section_key(x.get('Section')),
+        parse_section_key(x.get('Subsection'))
+    ))
+
+    if not contents:
+        return None
+    metrics.count('chapters_rendered')
+    metrics.count('rows_rendered', len(contents))
+
+    # 챕터 시작
+    content_html = []
+    content_html.append(f'''
+    <div class="bg-white rounded-lg shadow-sm p-8 mb-6" id="chapter-{chapter_id}">
+        <div class="mb-6">
+            <h2 class="text-2xl font-bold text-[#24305E] mb-2">Chapter {chapter_num}: {chapter['TitleEN'] or ''}</h2>
+            {f'<p class="text-base text-gray-600">{chapter["TitleKR"]}</p>' if chapter.get('TitleKR') else ''}
+        </div>
+        {f'<div class="mb-6 p-4 bg-blue-50 border-l-4 border-blue-400 rounded"><p class="text-base text-gray-700 whitespace-pre-line">{chapter["ChapterComment"]}</p></div>' if chapter.get('ChapterComment') else ''}
+    ''')
+
+    # 섹션별로 그룹화
+    sections = {}
+    for content in contents:
+        section = content.get('Section') or 'General'
+        if section not in sections:
+            sections[section] = []
+        sections[section].append(content)
+
+    # 각 섹션 출력
+    def get_section_sort_key(section_str):
+        import re
+        if section_str == 'General':
+            return (0, 'General')
+        # Extract numeric part from formats like "[F]414", "[BS]403", or plain "123"
+        match = re.search(r'\d+', str(section_str))
+        if match:
+            return (int(match.group()), str(section_str))
+        return (999999, str(section_str))  # Put unparseable sections at the end
+
+    for section_num in sorted(sections.keys(), key=get_section_sort_key):
+        section_contents = sections[section_num]
+        first_content = section_contents[0]
+
+        # Display only "General" for General sections, not "Section General"
+        section_title = section_num if section_num == 'General' else f'Section {section_num}'
+        title_suffix = f' - {first_content["TitleEN"]}' if first_content.get('TitleEN') else ''
+
+        content_html.append(f'''
+        <div class="content-section mb-8" id="section-{chapter_id}-{section_num}">
+            <h3 class="text-xl font-semibold text-[#374785] mb-3">{section_title}{title_suffix}</h3>
+            {f'<p class="text-lg text-gray-600 mb-4">{first_content["TitleKR"]}</p>' if first_content.get('TitleKR') else ''}
+            <div class="space-y-4">''')
+
+        # 각 subsection
+        for content in section_contents:
+            subsection = f".{content['Subsection']}" if content.get('Subsection') else ''
+            section_number = f"{section_num}{subsection}"
+
+            # Attachments
+            attachments = hierarchy.lookup('CodeAttachment', 'byPlace',
+                                           latest_version['ModelCodeVersionID'], chapter_num,
+                                           content.get('Section'), content.get('Subsection'))
+
+            metrics.count('attachment_lookups')
+            attachment_html = ''
+            if attachments:
+                metrics.count('attachments_matched', len(attachments))
+                att_items = []
+                for att in attachments:
+                    icon = 'M3 10h18M3 14h18m-9-4v8m-7 0h14a2 2 0 002-2V8a2 2 0 00-2-2H5a2 2 0 00-2 2v8a2 2 0 002 2z' if att['Type'].lower() == 'table' else 'M4 16l4.586-4.586a2 2 0 012.828 0L16 16m-2-2l1.586-1.586a2 2 0 012.828 0L20 14m-6-6h.01M6 20h12a2 2 0 002-2V6a2 2 0 00-2-2H6a2 2 0 00-2 2v12a2 2 0 002 2z'
+                    att_items.append(f'''
+                    <div class="border border-gray-300 rounded p-2 hover:border-[#A8D0E6] transition-colors cursor-pointer flex-shrink-0" style="min-width: 120px;">
+                        <div class="bg-gray-100 h-16 rounded flex items-center justify-center mb-1">
+                            <svg class="w-6 h-6 text-gray-400" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                                <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="{icon}"></path>
+                            </svg>
+                        </div>
+                        <p class="text-xs font-medium text-gray-700 text-center">{att['Type']} {att.get('Number') or ''}</p>
+                    </div>''')
+                attachment_html = f'''
+                <div class="mt-3 pt-3 border-t border-gray-200">
+                    <div class="figures-scroll">
+                        {''.join(att_items)}
+                    </div>
+                </div>'''
+
+            # 코드 정보와 위치 생성
+            code_base = model_code['ModelCodeName'].split(':')[0].strip()
+            year = int(latest_version['Year']) if latest_version.get('Year') else ''
+            location_text = f"{code_base} {year}: Chapter {chapter_num} - {section_number}"
+
+            # Index tags 생성 (semicolon으로 분리된 키워드)
+            index_tags_html = ''
+            if content.get('Index'):
+                index_keywords = [k.strip() for k in str(content['Index']).split(';') if k.strip()]
+                index_tags = '\n                            '.join([
+                    f'<span class="text-xs bg-[#F8E9A1] text-[#24305E] px-2 py-0.5 rounded">{keyword}</span>'
+                    for keyword in index_keywords
+                ])
+                if index_tags:
+                    index_tags_html = '\n                            ' + index_tags
+            # Assume "건축" for IBC if no Index data
+            elif code_base == 'IBC':
+                index_tags_html = '\n                            <span class="text-xs bg-[#F8E9A1] text-[#24305E] px-2 py-0.5 rounded">건축</span>'
+
+            content_attr = f' data-content-id="{content["ContentID"]}"' if dom_fields else ''
+            title_en = ''
+            if content.get('TitleEN'):
+                title_en = f' <span data-field="TitleEN">{content["TitleEN"]}</span>' if dom_fields else ' ' + content['TitleEN']
 
-        # 챕터 리스트 HTML 생성 (섹션 포함)
-        chapters_html = []
-        for i, ch in enumerate(chapter_list):
-            active_class = 'active bg-[#F8E9A1]' if i == 0 else ''
-            chapter_id = ch['ChapterID']
-            chapter_num = ch['Chapter']
-
-            # 이 챕터의 섹션 목록 가져오기
-            chapter_contents = [c for c in hierarchy.data['CodeContent'] if c.get('ChapterID') == chapter_id]
-            sections = {}
-            for content in chapter_contents:
-                section = content.get('Section') or 'General'
-                if section not in sections:
-                    sections[section] = content.get('TitleEN', '')
-
-            # 섹션 HTML 생성
-            sections_html = []
-            def section_sort_key(x):
-                import re
-                if x == 'General':
-                    return (0, 'General')
-                match = re.search(r'\d+', str(x))
-                if match:
-                    return (int(match.group()), str(x))
-                return (999999, str(x))
-
-            for section_num in sorted(sections.keys(), key=section_sort_key):
-                section_title = sections[section_num]
-                sections_html.append(f'''
+            content_html.append(f'''
+            <div class="bg-gray-50 p-4 rounded-lg relative" id="section-{section_number.replace('.', '-')}"{content_attr}>
+                <div class="absolute top-3 right-3">
+                    <button class="p-1.5 hover:bg-gray-200 rounded transition-colors" title="Copy content" onclick="copyCodeContent('{section_number}')">
+                        <svg class="w-4 h-4 text-gray-500" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                            <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M8 16H6a2 2 0 01-2-2V6a2 2 0 012-2h8a2 2 0 012 2v2m-6 12h8a2 2 0 002-2v-8a2 2 0 00-2-2h-8a2 2 0 00-2 2v8a2 2 0 002 2z"></path>
+                        </svg>
+                    </button>
+                </div>
+                <div class="flex items-center gap-2 mb-3 flex-wrap">
+                    <span class="text-xs bg-[#A8D0E6] text-[#24305E] font-semibold px-2 py-0.5 rounded">{location_text}</span>{index_tags_html}
+                </div>
+                <div class="flex items-center gap-2 mb-2">
+                    <h4 class="font-semibold text-[#24305E]">{section_number}{title_en}</h4>
+                </div>
+                {f'<p class="text-base text-gray-600 mb-2"{field_attr("TitleKR")}>{content["TitleKR"]}</p>' if content.get('TitleKR') else ''}
+                {f'<p class="text-gray-700 leading-relaxed mb-2"{field_attr("ContentEN")}>{linker.link(content["ContentEN"], latest_version["ModelCodeVersionID"], chapter_id)}</p>' if content.get('ContentEN') else ''}
+                {f'<p class="text-gray-600 text-base leading-relaxed mb-3"{field_attr("ContentKR")}>{linker.link(content["ContentKR"], latest_version["ModelCodeVersionID"], chapter_id)}</p>' if content.get('ContentKR') else ''}
+                {f'<div class="mt-3 pt-3 border-t border-gray-200 bg-[#FEE9EC] bg-opacity-30 p-3 rounded-lg"><label class="text-xs font-semibold text-[#F76C6C] mb-1 block">Note</label><div class="w-full text-base p-2 bg-white border border-[#F76C6C] border-opacity-20 rounded text-gray-700 whitespace-pre-line"{field_attr("Comment")}>{content["Comment"]}</div></div>' if content.get('Comment') else ''}
+                {attachment_html}
+            </div>''')
+
+        content_html.append('</div></div>')
+
+    content_html.append('</div>')
+    return '\n'.join(content_html)
+
+# 병렬 렌더링 시 한 작업에 담을 최대 콘텐츠 행 수 (큰 코드는 챕터 단위로 나눔)
+PARALLEL_BATCH_ROWS = 200
+
+# 병렬 렌더링 워커 상태 (ProcessPoolExecutor initializer에서 설정)
+_render_worker_state = None
+
+def _init_render_worker(hierarchy, linker, content_source='data'):
+    """워커 프로세스마다 한 번 hierarchy, linker와 content_source를 받아 둡니다."""
+    global _render_worker_state
+    _render_worker_state = (hierarchy, linker, content_source)
+
+def _render_chapter_batch(task):
+    """워커: (ModelCodeID, ModelCodeVersionID, [ChapterID, ...]) 배치의 챕터 본문을 렌더링합니다.
+
+    (블록 리스트, 렌더링 시간, 이 배치에서 늘어난 카운터)를 반환합니다.
+    """
+    model_code_id, version_id, chapter_ids = task
+    hierarchy, linker, content_source = _render_worker_state
+    before = dict(metrics.counters)
+    start = time.perf_counter()
+    model_code = hierarchy.indexes['ModelCode'][model_code_id]
+    latest_version = hierarchy.indexes['ModelCodeVersion'][version_id]
+    blocks = [render_chapter_content(hierarchy, linker, model_code, latest_version, hierarchy.indexes['CodeChapter'][chapter_id],
+                                     content_source)
+              for chapter_id in chapter_ids]
+    counters = {name: n - before.get(name, 0) for name, n in metrics.counters.items() if n != before.get(name, 0)}
+    return blocks, time.perf_counter() - start, counters
+
+def _chapter_batches(hierarchy, model_code, latest_version, chapter_list):
+    """코드의 챕터들을 PARALLEL_BATCH_ROWS 단위의 렌더링 작업으로 나눕니다."""
+    batches = []
+    batch, rows = [], 0
+    for chapter in chapter_list:
+        if batch and rows >= PARALLEL_BATCH_ROWS:
+            batches.append(batch)
+            batch, rows = [], 0
+        batch.append(chapter['ChapterID'])
+        rows += len(hierarchy.get_children('CodeChapter', chapter, child_table='CodeContent'))
+    if batch:
+        batches.append(batch)
+    return [(model_code['ModelCodeID'], latest_version['ModelCodeVersionID'], batch) for batch in batches]
+
+class RenderCache:
+    """챕터 본문 HTML 조각을 입력 해시로 저장하는 디스크 캐시
+
+    키는 챕터 행, 챕터의 CodeContent 행, 해당 위치의 첨부, 링크용 챕터/섹션 맵의 해시
+    (CrossReferenceLinker.digest), 코드/버전 행, content_source와 GENERATOR_VERSION의 해시입니다. prune()은 이번 빌드에서
+    쓰이지 않은 항목을 지웁니다.
+    """
+
+    # 콘텐츠가 없는 챕터(None) 표시
+    EMPTY = '\0'
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.reset_stats()
+
+    def reset_stats(self):
+        """빌드마다 사용한 키와 적중/실패 횟수를 새로 셉니다."""
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, hierarchy, linker, model_code, latest_version, chapter, content_source='data'):
+        """챕터 렌더링 입력의 해시를 계산합니다."""
+        version_id = latest_version['ModelCodeVersionID']
+        contents = hierarchy.get_children('CodeChapter', chapter, child_table='CodeContent')
+        attachments = [hierarchy.lookup('CodeAttachment', 'byPlace', version_id, chapter['Chapter'],
+                                        content.get('Section'), content.get('Subsection'))
+                       for content in contents]
+        payload = {
+            'generator': GENERATOR_VERSION,
+            'content_source': content_source,
+            'model_code': model_code,
+            'version': latest_version,
+            'chapter': chapter,
+            'contents': contents,
+            'attachments': attachments,
+            'links': linker.digest(version_id),
+        }
+        encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True,
+                             default=lambda value: dict(value) if isinstance(value, CompactRecord) else str(value))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.html"
+
+    def get(self, key):
+        """캐시된 블록을 반환합니다. 없으면 KeyError."""
+        self.used.add(key)
+        try:
+            block = self._path(key).read_text(encoding='utf-8')
+        except FileNotFoundError:
+            self.misses += 1
+            raise KeyError(key) from None
+        self.hits += 1
+        return None if block == self.EMPTY else block
+
+    def put(self, key, block):
+        """블록을 저장합니다 (임시 파일에 쓴 뒤 교체)."""
+        self.used.add(key)
+        path = self._path(key)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(self.EMPTY if block is None else block, encoding='utf-8')
+        tmp_path.replace(path)
+
+    def prune(self):
+        """이번 빌드에서 쓰이지 않은 캐시 항목을 삭제하고 삭제 개수를 반환합니다."""
+        removed = 0
+        for path in self.cache_dir.glob('*.html'):
+            if path.stem not in self.used:
+                path.unlink()
+                removed += 1
+        return removed
+
+class MemoryRenderCache(RenderCache):
+    """RenderCache와 같은 키를 쓰되 블록을 메모리에 두는 캐시 (--watch)"""
+
+    def __init__(self):
+        self.blocks = {}
+        self.reset_stats()
+
+    def get(self, key):
+        """캐시된 블록을 반환합니다. 없으면 KeyError."""
+        self.used.add(key)
+        if key not in self.blocks:
+            self.misses += 1
+            raise KeyError(key)
+        self.hits += 1
+        return self.blocks[key]
+
+    def put(self, key, block):
+        self.used.add(key)
+        self.blocks[key] = block
+
+    def prune(self):
+        """이번 빌드에서 쓰이지 않은 블록을 버리고 버린 개수를 반환합니다."""
+        stale = [key for key in self.blocks if key not in self.used]
+        for key in stale:
+            del self.blocks[key]
+        return len(stale)
+
+def render_all_chapter_contents(hierarchy, linker, pending, jobs=1, cache=None, content_source='data'):
+    """코드별 챕터 본문 블록을 렌더링합니다.
+
+    pending은 (model_code, latest_version, chapter_list) 리스트이며, 같은 순서의
+    블록 리스트들을 반환합니다. cache가 있으면 입력이 바뀌지 않은 챕터는 캐시된
+    블록을 재사용합니다. jobs > 1이면 ProcessPoolExecutor로 코드/챕터 배치를
+    병렬 렌더링하고, 결과는 제출 순서대로 합쳐 직렬 빌드와 동일한 출력을 만듭니다.
+    content_source는 render_chapter_content에 그대로 전달됩니다.
+    """
+    results = [[None] * len(chapter_list) for _, _, chapter_list in pending]
+    keys = {}
+
+    # 캐시 조회 후 렌더링이 필요한 챕터만 남김
+    to_render = []
+    for i, (model_code, latest_version, chapter_list) in enumerate(pending):
+        missing = []
+        for j, chapter in enumerate(chapter_list):
+            if cache is not None:
+                keys[i, j] = cache.key(hierarchy, linker, model_code, latest_version, chapter, content_source)
+                try:
+                    results[i][j] = cache.get(keys[i, j])
+                    continue
+                except KeyError:
+                    pass
+            missing.append(j)
+        if missing:
+            to_render.append((i, missing))
+
+    if jobs <= 1:
+        for i, missing in to_render:
+            model_code, latest_version, chapter_list = pending[i]
+            with metrics.phase(f"code:{model_code['ModelCodeID']}"):
+                for j in missing:
+                    results[i][j] = render_chapter_content(hierarchy, linker, model_code, latest_version, chapter_list[j],
+                                                           content_source)
+    elif to_render:
+        tasks = []
+        owners = []
+        for i, missing in to_render:
+            model_code, latest_version, chapter_list = pending[i]
+            offset = 0
+            for task in _chapter_batches(hierarchy, model_code, latest_version, [chapter_list[j] for j in missing]):
+                tasks.append(task)
+                owners.append((i, missing[offset:offset + len(task[2])]))
+                offset += len(task[2])
+
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_render_worker,
+                                 initargs=(hierarchy, linker, content_source)) as executor:
+            # map은 제출 순서대로 결과를 돌려줌 (코드별 시간은 워커들의 렌더링 시간 합)
+            for (i, positions), (blocks, seconds, counters) in zip(owners, executor.map(_render_chapter_batch, tasks)):
+                for j, block in zip(positions, blocks):
+                    results[i][j] = block
+                metrics.record(f"code:{pending[i][0]['ModelCodeID']}", seconds)
+                metrics.merge_counters(counters)
+
+    if cache is not None:
+        for i, missing in to_render:
+            for j in missing:
+                cache.put(keys[i, j], results[i][j])
+
+    return [[block for block in blocks if block is not None] for blocks in results]
+
+def library_codes(hierarchy):
+    """라이브러리에 표시할 코드의 (model_code, latest_version, chapter_list)를 순서대로 생성합니다.
+
+    버전이 없거나 최신 버전에 챕터가 없는 코드는 건너뜁니다 (hierarchy.catalog의 active 항목).
+    """
+    for entry in hierarchy.catalog.active_entries():
+        yield entry['model_code'], entry['latest_version'], entry['chapters']
+
+def render_chapter_groups(hierarchy, chapter_list):
+    """코드 사이드바의 챕터 그룹(챕터 + 섹션 목록) HTML 리스트를 생성합니다."""
+    chapters_html = []
+    for i, ch in enumerate(chapter_list):
+        active_class = 'active bg-[#F8E9A1]' if i == 0 else ''
+        chapter_id = ch['ChapterID']
+        chapter_num = ch['Chapter']
+
+        # 이 챕터의 섹션 목록 가져오기
+        chapter_contents = hierarchy.get_children('CodeChapter', ch, child_table='CodeContent')
+        sections = {}
+        for content in chapter_contents:
+            section = content.get('Section') or 'General'
+            if section not in sections:
+                sections[section] = content.get('TitleEN', '')
+
+        # 섹션 HTML 생성
+        sections_html = []
+        def section_sort_key(x):
+            import re
+            if x == 'General':
+                return (0, 'General')
+            match = re.search(r'\d+', str(x))
+            if match:
+                return (int(match.group()), str(x))
+            return (999999, str(x))
+
+        for section_num in sorted(sections.keys(), key=section_sort_key):
+            section_title = sections[section_num]
+            sections_html.append(f'''
                   <div class="section-item px-4 py-2 text-xs text-gray-600 hover:bg-gray-100 rounded cursor-pointer"
                        onclick="scrollToSection('{chapter_id}', '{section_num}')">
                     Section {section_num}
                   </div>''')
 
-            # 챕터 그룹 (챕터 + 섹션)
-            expanded_class = 'max-h-96' if i == 0 else 'max-h-0'
-            icon_rotation = 'rotate-180' if i == 0 else ''
-            title_kr = ch.get('TitleKR', '')
-            chapters_html.append(f'''
+        # 챕터 그룹 (챕터 + 섹션)
+        expanded_class = 'max-h-96' if i == 0 else 'max-h-0'
+        icon_rotation = 'rotate-180' if i == 0 else ''
+        title_kr = ch.get('TitleKR', '')
+        chapters_html.append(f'''
               <div class="chapter-group">
                 <div class="chapter-item {active_class} px-4 py-3 rounded-lg cursor-pointer flex items-center justify-between"
                      data-chapter-id="{chapter_id}"
@@ -371,196 +2061,45 @@ def create_all_library_content(hierarchy):
                   {''.join(sections_html)}
                 </div>
               </div>''')
+    return chapters_html
 
-        # 모든 챕터의 콘텐츠 생성
-        content_html = []
-        for chapter in chapter_list:
-            chapter_id = chapter['ChapterID']
-            chapter_num = chapter['Chapter']
-
-            # 이 챕터의 콘텐츠 가져오기
-            contents = [c for c in hierarchy.data['CodeContent'] if c.get('ChapterID') == chapter_id]
-
-            # Helper function to parse section/subsection for sorting
-            def parse_section_key(value):
-                if not value:
-                    return (0,)
-                # Handle both "1,1" and "2.1.1" formats
-                value_str = str(value).replace(',', '.')
-                try:
-                    parts = [float(p) for p in value_str.split('.')]
-                    return tuple(parts)
-                except:
-                    return (0,)
-
-            contents.sort(key=lambda x: (
-                parse_section_key(x.get('Section')),
-                parse_section_key(x.get('Subsection'))
-            ))
+def create_all_library_content(hierarchy, linker=None, jobs=1, cache=None, first_code_only=False,
+                               content_source='data'):
+    """라이브러리 섹션의 모든 코드 콘텐츠를 생성합니다.
 
-            if not contents:
-                continue
+    first_code_only=True이면 첫 번째 코드의 챕터 본문만 렌더링하고 나머지 코드의
+    content_html/content_blocks는 None으로 둡니다 (본문을 요청 시 렌더링하는 serve 모드).
+    content_source='dom'이면 챕터 본문에 페이지 스크립트가 읽을 표시를 붙입니다 (render_chapter_content).
+    """
+    all_codes_content = []
+    pending = []
+    first_code_id = None
+    if linker is None:
+        linker = CrossReferenceLinker(hierarchy)
 
-            # 챕터 시작
-            content_html.append(f'''
-            <div class="bg-white rounded-lg shadow-sm p-8 mb-6" id="chapter-{chapter_id}">
-                <div class="mb-6">
-                    <h2 class="text-2xl font-bold text-[#24305E] mb-2">Chapter {chapter_num}: {chapter['TitleEN'] or ''}</h2>
-                    {f'<p class="text-base text-gray-600">{chapter["TitleKR"]}</p>' if chapter.get('TitleKR') else ''}
-                </div>
-                {f'<div class="mb-6 p-4 bg-blue-50 border-l-4 border-blue-400 rounded"><p class="text-base text-gray-700 whitespace-pre-line">{chapter["ChapterComment"]}</p></div>' if chapter.get('ChapterComment') else ''}
-            ''')
-
-            # 섹션별로 그룹화
-            sections = {}
-            for content in contents:
-                section = content.get('Section') or 'General'
-                if section not in sections:
-                    sections[section] = []
-                sections[section].append(content)
-
-            # Helper function to add hyperlinks to Section/Chapter references in content
-            def add_section_chapter_links(text, current_chapter_id):
-                if not text:
-                    return text
-                import re
-
-                # Find "Section [number]" or "Section [number].[number]"
-                def replace_section(match):
-                    section_ref = match.group(1)
-                    # Check if this section exists in current chapter
-                    section_id = f"section-{current_chapter_id}-{section_ref}"
-                    return f'<a href="#section-{section_id.replace(".", "-")}" class="text-[#F76C6C] hover:underline font-semibold" onclick="scrollToSection(\'{current_chapter_id}\', \'{section_ref}\')">Section {section_ref}</a>'
-
-                # Find "Chapter [number]"
-                def replace_chapter(match):
-                    chapter_ref = match.group(1)
-                    # Find chapter by number
-                    for ch in hierarchy.data['CodeChapter']:
-                        if ch.get('Chapter') == int(chapter_ref) and ch.get('ModelCodeVersionID') == latest_version['ModelCodeVersionID']:
-                            chapter_id = ch['ChapterID']
-                            return f'<a href="#chapter-{chapter_id}" class="text-[#F76C6C] hover:underline font-semibold" onclick="scrollToChapter(\'{chapter_id}\')">Chapter {chapter_ref}</a>'
-                    return match.group(0)  # Return original if not found
-
-                # Replace Section references
-                text = re.sub(r'Section (\d+(?:\.\d+)?)', replace_section, text)
-                # Replace Chapter references
-                text = re.sub(r'Chapter (\d+)', replace_chapter, text)
-
-                return text
-
-            # 각 섹션 출력
-            def get_section_sort_key(section_str):
-                import re
-                if section_str == 'General':
-                    return (0, 'General')
-                # Extract numeric part from formats like "[F]414", "[BS]403", or plain "123"
-                match = re.search(r'\d+', str(section_str))
-                if match:
-                    return (int(match.group()), str(section_str))
-                return (999999, str(section_str))  # Put unparseable sections at the end
-
-            for section_num in sorted(sections.keys(), key=get_section_sort_key):
-                section_contents = sections[section_num]
-                first_content = section_contents[0]
-
-                # Display only "General" for General sections, not "Section General"
-                section_title = section_num if section_num == 'General' else f'Section {section_num}'
-                title_suffix = f' - {first_content["TitleEN"]}' if first_content.get('TitleEN') else ''
-
-                content_html.append(f'''
-                <div class="content-section mb-8" id="section-{chapter_id}-{section_num}">
-                    <h3 class="text-xl font-semibold text-[#374785] mb-3">{section_title}{title_suffix}</h3>
-                    {f'<p class="text-lg text-gray-600 mb-4">{first_content["TitleKR"]}</p>' if first_content.get('TitleKR') else ''}
-                    <div class="space-y-4">''')
-
-                # 각 subsection
-                for content in section_contents:
-                    subsection = f".{content['Subsection']}" if content.get('Subsection') else ''
-                    section_number = f"{section_num}{subsection}"
-
-                    # Attachments
-                    attachments = [att for att in hierarchy.data['CodeAttachment']
-                                   if att.get('ModelCodeVersionID') == latest_version['ModelCodeVersionID']
-                                   and att.get('Chapter') == str(chapter_num)
-                                   and att.get('Section') == str(section_num)
-                                   and att.get('Subsection') == content.get('Subsection')]
-
-                    attachment_html = ''
-                    if attachments:
-                        att_items = []
-                        for att in attachments:
-                            icon = 'M3 10h18M3 14h18m-9-4v8m-7 0h14a2 2 0 002-2V8a2 2 0 00-2-2H5a2 2 0 00-2 2v8a2 2 0 002 2z' if att['Type'].lower() == 'table' else 'M4 16l4.586-4.586a2 2 0 012.828 0L16 16m-2-2l1.586-1.586a2 2 0 012.828 0L20 14m-6-6h.01M6 20h12a2 2 0 002-2V6a2 2 0 00-2-2H6a2 2 0 00-2 2v12a2 2 0 002 2z'
-                            att_items.append(f'''
-                            <div class="border border-gray-300 rounded p-2 hover:border-[#A8D0E6] transition-colors cursor-pointer flex-shrink-0" style="min-width: 120px;">
-                                <div class="bg-gray-100 h-16 rounded flex items-center justify-center mb-1">
-                                    <svg class="w-6 h-6 text-gray-400" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                                        <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="{icon}"></path>
-                                    </svg>
-                                </div>
-                                <p class="text-xs font-medium text-gray-700 text-center">{att['Type']} {att.get('Number') or ''}</p>
-                            </div>''')
-                        attachment_html = f'''
-                        <div class="mt-3 pt-3 border-t border-gray-200">
-                            <div class="figures-scroll">
-                                {''.join(att_items)}
-                            </div>
-                        </div>'''
-
-                    # 코드 정보와 위치 생성
-                    code_base = model_code['ModelCodeName'].split(':')[0].strip()
-                    year = int(latest_version['Year']) if latest_version.get('Year') else ''
-                    location_text = f"{code_base} {year}: Chapter {chapter_num} - {section_number}"
-
-                    # Index tags 생성 (semicolon으로 분리된 키워드)
-                    index_tags_html = ''
-                    if content.get('Index'):
-                        index_keywords = [k.strip() for k in str(content['Index']).split(';') if k.strip()]
-                        index_tags = '\n                            '.join([
-                            f'<span class="text-xs bg-[#F8E9A1] text-[#24305E] px-2 py-0.5 rounded">{keyword}</span>'
-                            for keyword in index_keywords
-                        ])
-                        if index_tags:
-                            index_tags_html = '\n                            ' + index_tags
-                    # Assume "건축" for IBC if no Index data
-                    elif code_base == 'IBC':
-                        index_tags_html = '\n                            <span class="text-xs bg-[#F8E9A1] text-[#24305E] px-2 py-0.5 rounded">건축</span>'
-
-                    content_html.append(f'''
-                    <div class="bg-gray-50 p-4 rounded-lg relative" id="section-{section_number.replace('.', '-')}">
-                        <div class="absolute top-3 right-3">
-                            <button class="p-1.5 hover:bg-gray-200 rounded transition-colors" title="Copy content" onclick="copyCodeContent('{section_number}')">
-                                <svg class="w-4 h-4 text-gray-500" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M8 16H6a2 2 0 01-2-2V6a2 2 0 012-2h8a2 2 0 012 2v2m-6 12h8a2 2 0 002-2v-8a2 2 0 00-2-2h-8a2 2 0 00-2 2v8a2 2 0 002 2z"></path>
-                                </svg>
-                            </button>
-                        </div>
-                        <div class="flex items-center gap-2 mb-3 flex-wrap">
-                            <span class="text-xs bg-[#A8D0E6] text-[#24305E] font-semibold px-2 py-0.5 rounded">{location_text}</span>{index_tags_html}
-                        </div>
-                        <div class="flex items-center gap-2 mb-2">
-                            <h4 class="font-semibold text-[#24305E]">{section_number}{' ' + content['TitleEN'] if content.get('TitleEN') else ''}</h4>
-                        </div>
-                        {f'<p class="text-base text-gray-600 mb-2">{content["TitleKR"]}</p>' if content.get('TitleKR') else ''}
-                        {f'<p class="text-gray-700 leading-relaxed mb-2">{add_section_chapter_links(content["ContentEN"], chapter_id)}</p>' if content.get('ContentEN') else ''}
-                        {f'<p class="text-gray-600 text-base leading-relaxed mb-3">{add_section_chapter_links(content["ContentKR"], chapter_id)}</p>' if content.get('ContentKR') else ''}
-                        {f'<div class="mt-3 pt-3 border-t border-gray-200 bg-[#FEE9EC] bg-opacity-30 p-3 rounded-lg"><label class="text-xs font-semibold text-[#F76C6C] mb-1 block">Note</label><div class="w-full text-base p-2 bg-white border border-[#F76C6C] border-opacity-20 rounded text-gray-700 whitespace-pre-line">{content["Comment"]}</div></div>' if content.get('Comment') else ''}
-                        {attachment_html}
-                    </div>''')
+    for model_code, latest_version, chapter_list in library_codes(hierarchy):
+        model_code_id = model_code['ModelCodeID']
 
-                content_html.append('</div></div>')
+        # 챕터 리스트 HTML 생성 (섹션 포함)
+        chapters_html = render_chapter_groups(hierarchy, chapter_list)
 
-            content_html.append('</div>')
+        # 챕터 본문은 모든 코드를 모은 뒤 한꺼번에 렌더링
+        pending.append((model_code, latest_version, chapter_list))
 
         # 코드 정보 저장
         code_data = {
             'code_id': model_code_id,
             'version_id': latest_version['ModelCodeVersionID'],
             'code_name': model_code['ModelCodeName'],
-            'code_title': f"{model_code['ModelCodeName'].split(':')[0].strip()} {int(latest_version['Year'])}",
+            'code_title': hierarchy.catalog.by_code[model_code_id]['display_name'],
             'code_subtitle': model_code['Description'],
             'chapters_html': '\n'.join(chapters_html),
-            'content_html': '\n'.join(content_html)
+            'chapter_ids': [ch['ChapterID'] for ch in chapter_list],
+            # 챕터 그룹/챕터 콘텐츠별 최상위 요소 (splice 모드에서 사용)
+            'chapter_groups': chapters_html,
+            # 본문은 아래에서 렌더링 (first_code_only이면 첫 번째 코드만)
+            'content_html': None,
+            'content_blocks': None,
         }
         all_codes_content.append(code_data)
 
@@ -568,40 +2107,30 @@ def create_all_library_content(hierarchy):
         if first_code_id is None:
             first_code_id = model_code_id
 
+    # 모든 챕터의 콘텐츠 생성
+    with metrics.phase('render_chapters'):
+        rendered = render_all_chapter_contents(hierarchy, linker, pending[:1] if first_code_only else pending,
+                                               jobs, cache, content_source)
+    for code_data, content_blocks in zip(all_codes_content, rendered):
+        code_data['content_html'] = '\n'.join(content_blocks)
+        code_data['content_blocks'] = content_blocks
+
     # 모든 코드 데이터와 첫 번째 코드 ID 반환
     return {
         'codes': all_codes_content,
         'first_code_id': first_code_id
     }
 
-def create_sidebar_library_submenu(hierarchy):
-    """사이드바 라이브러리 하위메뉴를 생성합니다."""
+def sidebar_library_submenu_items(hierarchy):
+    """사이드바 라이브러리 하위메뉴 항목 HTML 리스트를 생성합니다."""
     submenu_items = []
 
-    # 데이터가 있는 코드만 필터링
-    for model_code in hierarchy.data['ModelCode']:
-        model_code_id = model_code['ModelCodeID']
-        code_name = model_code['ModelCodeName']
-
-        # 최신 버전 찾기
-        versions = [v for v in hierarchy.data['ModelCodeVersion'] if v['ModelCodeID'] == model_code_id]
-        latest_version = max(versions, key=lambda v: v.get('Year') or 0) if versions else None
-
-        if not latest_version:
-            continue
-
-        # 챕터가 있는지 확인
-        chapters = hierarchy.get_children('ModelCodeVersion', latest_version)
-        if 'CodeChapter' not in chapters or len(chapters['CodeChapter']) == 0:
-            continue
-
-        # 버전 텍스트
-        code_base = code_name.split(':')[0].strip()
-        if latest_version.get('Year'):
-            year = int(latest_version['Year'])
-            display_name = f"{code_base} {year}"
-        else:
-            display_name = code_base
+    # 데이터가 있는 코드만 (최신 버전에 챕터가 있는 hierarchy.catalog 항목)
+    for entry in hierarchy.catalog.active_entries():
+        model_code_id = entry['code_id']
+        version_id = entry['version_id']
+        code_base = entry['code_base']
+        display_name = entry['display_name']
 
         # Icon SVG 가져오기 (sidebar용으로 크기 조정)
         icon_svg_full = get_icon_svg(code_base)
@@ -612,21 +2141,30 @@ def create_sidebar_library_submenu(hierarchy):
         <div class="submenu-item flex items-center pl-14 pr-6 py-2 text-sm text-gray-300 hover:text-white hover:bg-[#374785] rounded cursor-pointer transition-colors"
              data-section="library"
              data-code-id="{model_code_id}"
-             data-version-id="{latest_version['ModelCodeVersionID']}"
-             onclick="loadCodeFromSidebar('{latest_version['ModelCodeVersionID']}', '{model_code_id}')">
+             data-version-id="{version_id}"
+             onclick="loadCodeFromSidebar('{version_id}', '{model_code_id}')">
             {icon_svg}
             {display_name}
         </div>'''
 
         submenu_items.append(submenu_html)
 
-    return '\n'.join(submenu_items)
+    return submenu_items
+
+# 스플라이스 렌더링에서 데이터 삽입 지점을 표시하는 주석
+SPLICE_MARKER = 'us-code-navigator:splice:{}'
+SPLICE_MARKER_RE = re.compile(r'<!--us-code-navigator:splice:(\w+)-->')
 
-def generate_html(hierarchy):
-    """최종 HTML을 생성합니다."""
-    print("Parsing reference HTML...")
-    html_content = load_html()
-    soup = BeautifulSoup(html_content, 'lxml')
+# reference.txt를 파싱해 만든 스플라이스 템플릿 캐시 (has_library_content별)
+_page_templates = {}
+
+def prepare_reference_soup(soup, has_library_content):
+    """reference HTML에 정적 수정사항을 적용하고 데이터 삽입 지점 노드들을 반환합니다.
+
+    반환되는 노드는 비어 있으며, 생성된 콘텐츠는 soup 모드에서는 노드에 직접,
+    splice 모드에서는 직렬화된 템플릿의 해당 위치에 삽입됩니다.
+    """
+    points = {}
 
     # 사이드바의 라이브러리 메뉴에 접기/펴기 아이콘과 하위메뉴 추가
     print("Adding collapsible submenu to sidebar library...")
@@ -637,19 +2175,7 @@ def generate_html(hierarchy):
         if library_submenu:
             # 기존 내용 제거
             library_submenu.clear()
-
-            # 새로운 submenu 항목들 추가
-            submenu_items_html = create_sidebar_library_submenu(hierarchy)
-            submenu_soup = BeautifulSoup(submenu_items_html, 'lxml')
-
-            # body 안의 모든 요소들을 librarySubmenu에 추가
-            body = submenu_soup.find('body')
-            if body:
-                for element in body.children:
-                    if element.name:  # 텍스트 노드가 아닌 경우만
-                        library_submenu.append(element)
-
-            print("✓ Sidebar library submenu updated with database!")
+            points['library_submenu'] = library_submenu
         else:
             # librarySubmenu가 없으면 생성 (기존 로직)
             library_item = None
@@ -672,17 +2198,11 @@ def generate_html(hierarchy):
                 chevron_soup = BeautifulSoup(chevron_html, 'lxml')
                 library_item.append(chevron_soup.find('svg'))
 
-                # 하위메뉴 생성
-                submenu_html = f'''
-                <div class="library-submenu overflow-hidden transition-all duration-300" style="max-height: 0;" id="librarySubmenu">
-                    {create_sidebar_library_submenu(hierarchy)}
-                </div>
-                '''
-                submenu_soup = BeautifulSoup(submenu_html, 'lxml')
-
-                # 라이브러리 항목 다음에 하위메뉴 삽입
-                library_item.insert_after(submenu_soup.find('div'))
-                print("✓ Sidebar library submenu added!")
+                # 하위메뉴 생성 후 라이브러리 항목 다음에 삽입
+                library_submenu = soup.new_tag('div', id='librarySubmenu', style='max-height: 0;',
+                                               **{'class': 'library-submenu overflow-hidden transition-all duration-300'})
+                library_item.insert_after(library_submenu)
+                points['library_submenu'] = library_submenu
 
     # Make top search bar header sticky with proper z-index
     print("Ensuring top search bar is sticky with proper z-index...")
@@ -697,36 +2217,28 @@ def generate_html(hierarchy):
         main_header['class'] = header_classes
         print("✓ Top search bar header updated with z-20!")
 
-    # Libraries 섹션의 코드 카드들을 교체
-    print("Generating library cards from schema hierarchy...")
+    # Libraries 섹션의 코드 카드 그리드를 비워 둠
     h2_elements = soup.find_all('h2', string=lambda text: text and 'Libraries' in text)
-    if h2_elements:
-        for h2 in h2_elements:
-            parent_section = h2.find_parent('section')
-            if parent_section:
-                grid_div = parent_section.find('div', class_='grid')
-                if grid_div:
-                    library_cards_html = create_library_cards(hierarchy)
-                    new_grid = BeautifulSoup(f'<div class="grid grid-cols-4 gap-4">{library_cards_html}</div>', 'lxml')
-                    grid_div.replace_with(new_grid.find('div'))
-                    print("✓ Library cards updated with hierarchical data!")
-
-    # 라이브러리 섹션에 실제 데이터 삽입
-    print("Generating initial library content with actual database...")
-    all_content = create_all_library_content(hierarchy)
+    for h2 in h2_elements:
+        parent_section = h2.find_parent('section')
+        if parent_section:
+            grid_div = parent_section.find('div', class_='grid')
+            if grid_div:
+                new_grid = soup.new_tag('div', **{'class': 'grid grid-cols-4 gap-4'})
+                grid_div.replace_with(new_grid)
+                points['library_cards'] = new_grid
 
     library_section = soup.find('div', id='librarySection')
-    if library_section and all_content and all_content['codes']:
-        # 첫 번째 코드로 초기화
-        first_code = all_content['codes'][0]
-
-        # 헤더 업데이트
+    if library_section and has_library_content:
+        # 헤더 (첫 번째 코드 제목)
         code_title = library_section.find('h1', id='codeTitle')
         code_subtitle = library_section.find('p', id='codeSubtitle')
         if code_title:
-            code_title.string = first_code['code_title']
+            code_title.clear()
+            points['code_title'] = code_title
         if code_subtitle:
-            code_subtitle.string = first_code['code_subtitle']
+            code_subtitle.clear()
+            points['code_subtitle'] = code_subtitle
 
         # 라이브러리 헤더를 sticky로 만들기
         library_header = library_section.find('header')
@@ -767,41 +2279,12 @@ def generate_html(hierarchy):
         # 콘텐츠 영역 찾기
         content_area = library_section.find('div', id='contentArea')
 
-        # 모든 코드의 챕터 리스트와 콘텐츠 생성
+        # 모든 코드의 챕터 리스트와 콘텐츠가 들어갈 자리
         if chapters_container and content_area:
             chapters_container.clear()
             content_area.clear()
-
-            for i, code_data in enumerate(all_content['codes']):
-                is_first = (i == 0)
-                # 첫 번째는 명시적으로 display: block, 나머지는 display: none
-                display_style = 'display: block;' if is_first else 'display: none;'
-
-                # 챕터 리스트 추가
-                chapter_wrapper = soup.new_tag('div',
-                                               id=f"chapters-{code_data['code_id']}",
-                                               style=display_style,
-                                               **{'class': 'code-chapters'})
-                chapters_soup = BeautifulSoup(code_data['chapters_html'], 'lxml')
-                body = chapters_soup.find('body')
-                if body:
-                    for element in body.find_all('div', class_='chapter-group', recursive=False):
-                        chapter_wrapper.append(element)
-                chapters_container.append(chapter_wrapper)
-
-                # 콘텐츠 추가
-                content_wrapper = soup.new_tag('div',
-                                               id=f"content-{code_data['code_id']}",
-                                               style=display_style,
-                                               **{'class': 'code-content'})
-                content_soup = BeautifulSoup(code_data['content_html'], 'lxml')
-                body = content_soup.find('body')
-                if body:
-                    for element in body.find_all('div', class_='bg-white', recursive=False):
-                        content_wrapper.append(element)
-                content_area.append(content_wrapper)
-
-            print(f"✓ Library populated with {len(all_content['codes'])} codes")
+            points['chapters_container'] = chapters_container
+            points['content_area'] = content_area
 
     # Remove ONLY keyword search input from advanced search, keep filters
     print("Removing keyword search input from advanced search...")
@@ -843,57 +2326,1090 @@ def generate_html(hierarchy):
             h3.string = '코드 비교'
             print("✓ Updated 'Code Compare' to '코드 비교'")
 
+    # script는 body 끝에 추가
+    body_tag = soup.find('body')
+    if body_tag:
+        points['body_end'] = body_tag
+
+    return points
+
+# soup 모드에서 생성된 조각 중 삽입하는 최상위 요소 (태그, class)
+SUBMENU_ITEM_FILTER = ('div', 'submenu-item')
+CHAPTER_GROUP_FILTER = ('div', 'chapter-group')
+CONTENT_BLOCK_FILTER = ('div', 'bg-white')
+
+def _fragment_nodes(html, element_filter=None, wrap=False):
+    """HTML 조각을 BeautifulSoup(lxml)으로 파싱해 삽입할 노드 리스트를 반환합니다 (soup 모드).
+
+    element_filter (태그, class)가 있으면 body의 해당 자식 요소만 고릅니다. wrap=True이면
+    <div>로 감싸 파싱해 요소 사이의 공백 텍스트까지 그대로 반환합니다.
+    """
+    if wrap:
+        return list(BeautifulSoup(f'<div>{html}</div>', 'lxml').find('div').contents)
+    body = BeautifulSoup(html, 'lxml').find('body')
+    if not body:
+        return []
+    if element_filter is None:
+        return list(body.contents)
+    return body.find_all(element_filter[0], class_=element_filter[1], recursive=False)
+
+def _append_fragment(node, html, element_filter=None):
+    """HTML 조각을 파싱해 body의 자식들을 node에 옮깁니다 (soup 모드)."""
+    for element in _fragment_nodes(html, element_filter):
+        node.append(element)
+
+def fill_reference_soup(soup, points, page):
+    """soup 모드: 생성된 조각을 DOM으로 파싱해 삽입 지점에 넣습니다."""
+    if 'library_submenu' in points:
+        _append_fragment(points['library_submenu'], page['submenu_html'], SUBMENU_ITEM_FILTER)
+        print("✓ Sidebar library submenu updated with database!")
+
+    if 'library_cards' in points:
+        for element in _fragment_nodes(page['cards_html'], wrap=True):
+            points['library_cards'].append(element)
+        print("✓ Library cards updated with hierarchical data!")
+
+    codes = page['all_content']['codes']
+    if 'code_title' in points:
+        points['code_title'].string = codes[0]['code_title']
+    if 'code_subtitle' in points:
+        points['code_subtitle'].string = codes[0]['code_subtitle']
+
+    if 'chapters_container' in points:
+        for i, code_data in enumerate(codes):
+            # 첫 번째는 명시적으로 display: block, 나머지는 display: none
+            display_style = 'display: block;' if i == 0 else 'display: none;'
+
+            # 챕터 리스트 추가
+            chapter_wrapper = soup.new_tag('div', id=f"chapters-{code_data['code_id']}", style=display_style,
+                                           **{'class': 'code-chapters'})
+            _append_fragment(chapter_wrapper, code_data['chapters_html'], CHAPTER_GROUP_FILTER)
+            points['chapters_container'].append(chapter_wrapper)
+
+            # 콘텐츠 추가
+            content_wrapper = soup.new_tag('div', id=f"content-{code_data['code_id']}", style=display_style,
+                                           **{'class': 'code-content'})
+            _append_fragment(content_wrapper, code_data['content_html'], CONTENT_BLOCK_FILTER)
+            points['content_area'].append(content_wrapper)
+
+        print(f"✓ Library populated with {len(codes)} codes")
+
+    if 'body_end' in points:
+        script_tag = soup.new_tag('script')
+        script_tag.string = page['script']
+        points['body_end'].append(script_tag)
+
+    return str(soup)
+
+class PageTemplate:
+    """reference 문서를 삽입 지점 기준으로 자른 정적 조각들 (splice 모드)"""
+
+    def __init__(self, html):
+        parts = SPLICE_MARKER_RE.split(html)
+        self.slices = parts[0::2]
+        self.points = parts[1::2]
+
+    def render(self, fragments):
+        """정적 조각과 생성된 조각을 이어 붙여 최종 HTML을 만듭니다."""
+        out = [self.slices[0]]
+        for name, static in zip(self.points, self.slices[1:]):
+            out.append(fragments.get(name, ''))
+            out.append(static)
+        return ''.join(out)
+
+def load_page_template(has_library_content):
+    """reference.txt를 한 번만 파싱해 스플라이스 템플릿을 만듭니다."""
+    if has_library_content not in _page_templates:
+        print("Parsing reference HTML...")
+        soup = BeautifulSoup(load_html(), 'lxml')
+        points = prepare_reference_soup(soup, has_library_content)
+        for name, node in points.items():
+            node.append(Comment(SPLICE_MARKER.format(name)))
+        _page_templates[has_library_content] = PageTemplate(str(soup))
+    return _page_templates[has_library_content]
+
+def escape_html_text(s):
+    """HTML 텍스트 노드용 이스케이프 (BeautifulSoup minimal 포매터와 동일)"""
+    return s.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+# 생성된 HTML 조각을 토큰 단위로 나누는 패턴 (주석 / 태그 / 텍스트)
+HTML_TOKEN_RE = re.compile(r'<!--.*?-->|<(/?)([A-Za-z][^\s/>]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>|[^<]+|<', re.S)
+HTML_ATTR_RE = re.compile(r'([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+HTML_VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'}
+HTML_SPACES = ' \t\n\r\f'
+# 열린 <p> 안에서 시작하면 파서가 <p>를 먼저 닫는 태그
+HTML_P_CLOSERS = frozenset('address article aside blockquote center dd details dialog dir div dl dt fieldset '
+                           'figcaption figure footer form h1 h2 h3 h4 h5 h6 header hgroup hr li listing main menu '
+                           'nav ol p pre section summary ul'.split())
+# 같은 태그 안에서 다시 시작하면 파서가 앞의 것을 닫는 태그
+HTML_NESTING_TAGS = frozenset('a button dd dt form li nobr option optgroup rb rp rt rtc select'.split())
+# 내용을 태그로 해석하지 않거나, 위치/구조를 파서가 바꾸는 태그 (항상 BeautifulSoup으로 처리)
+HTML_PARSER_TAGS = frozenset('base body caption col colgroup head html iframe link meta noembed noframes noscript '
+                             'plaintext script style table tbody td textarea tfoot th thead title tr xmp'.split())
+
+def normalize_html(fragment):
+    """생성된 HTML 조각을 BeautifulSoup(lxml) 직렬화와 같은 형태로 정규화합니다.
+
+    DOM을 만들지 않고 한 번의 토큰 순회로 처리합니다: 태그/속성 이름 소문자화,
+    속성 알파벳 정렬, class 공백 정리, 텍스트 이스케이프, 공백만 있는 텍스트 축약.
+    파서가 고쳐 쓰는 조각(닫히지 않거나 짝이 맞지 않는 태그, <p> 안의 블록 요소, HTML_PARSER_TAGS 등)은
+    같은 결과를 보장할 수 없으므로 None을 반환합니다 (호출자는 BeautifulSoup으로 직렬화).
+    """
+    out = []
+    open_tags = []
+    for match in HTML_TOKEN_RE.finditer(fragment):
+        token = match.group(0)
+        name = match.group(2)
+        if name is None:
+            if token.startswith('<!--'):
+                out.append(token)
+                continue
+            if token == '<' and fragment[match.end():match.end() + 1] in ('!', '?', '/'):
+                return None
+            text = html.unescape(token)
+            if not text.strip(HTML_SPACES):
+                out.append('\n' if '\n' in text else ' ')
+            else:
+                out.append(escape_html_text(text))
+            continue
+
+        name = name.lower()
+        if match.group(1):
+            if not open_tags or open_tags[-1] != name:
+                return None
+            open_tags.pop()
+            out.append(f'</{name}>')
+            continue
+
+        if (name in HTML_PARSER_TAGS or (name in HTML_P_CLOSERS and 'p' in open_tags)
+                or (name in HTML_NESTING_TAGS and name in open_tags)):
+            return None
+        if name not in HTML_VOID_TAGS:
+            if match.group(3).rstrip().endswith('/'):
+                return None
+            open_tags.append(name)
+
+        attrs = {}
+        for attr in HTML_ATTR_RE.finditer(match.group(3)):
+            attr_name = attr.group(1).lower()
+            if attr_name in attrs:
+                continue
+            value = next((v for v in attr.group(2, 3, 4) if v is not None), '')
+            value = html.unescape(value)
+            if attr_name == 'class':
+                value = ' '.join(value.split())
+            attrs[attr_name] = escape_html_text(value)
+
+        parts = [name]
+        for attr_name in sorted(attrs):
+            value = attrs[attr_name]
+            if '"' not in value:
+                parts.append(f'{attr_name}="{value}"')
+            elif "'" not in value:
+                parts.append(f"{attr_name}='{value}'")
+            else:
+                parts.append(f'{attr_name}="{value.replace(chr(34), "&quot;")}"')
+        out.append(f"<{' '.join(parts)}{'/' if name in HTML_VOID_TAGS else ''}>")
+
+    if open_tags:
+        return None
+    return ''.join(out)
+
+def soup_fragment_html(html, element_filter=None, wrap=False):
+    """soup 모드와 같이 조각을 파싱해 삽입될 노드들을 직렬화합니다 (normalize_html이 None인 조각)."""
+    metrics.count('splice_soup_fallbacks')
+    return ''.join(str(node) for node in _fragment_nodes(html, element_filter, wrap))
+
+def fragment_html(items, element_filter=None):
+    """챕터 그룹/챕터 본문 같은 최상위 요소 HTML들을 이어 붙여 정규화합니다 (코드 래퍼 안쪽 HTML).
+
+    element_filter는 soup 모드에서 삽입하는 최상위 요소이며, 정규화할 수 없는 조각을
+    soup 모드와 같게 직렬화할 때 씁니다.
+    """
+    normalized = normalize_html(''.join(item.strip() for item in items))
+    if normalized is None:
+        return soup_fragment_html('\n'.join(items), element_filter)
+    return normalized
+
+def render_splice_fragments(page, shard_dir=None, shard_url=None, written=None):
+    """splice 모드: 삽입 지점별 HTML 문자열을 만듭니다.
+
+    shard_dir이 있으면 첫 번째 코드만 인라인하고, 나머지 코드의 챕터 리스트와
+    콘텐츠는 shard_dir에 코드별 파일로 쓴 뒤 빈 래퍼에 data-shard-src만 남깁니다.
+    shard_url(code_id, part)이 있으면 파일을 쓰지 않고 그 URL을 data-shard-src로 남깁니다 (serve).
+    written은 이미 shard_dir에 쓴 파일 이름 집합이며 (텍스트 샤드), 그 밖의 오래된 샤드는 삭제합니다.
+    """
+    codes = page['all_content']['codes']
+    written = set() if written is None else written
+    cards_html = normalize_html(page['cards_html'])
+    if cards_html is None:
+        cards_html = soup_fragment_html(page['cards_html'], wrap=True)
+    fragments = {
+        'library_submenu': fragment_html(page['submenu_items'], SUBMENU_ITEM_FILTER),
+        'library_cards': cards_html,
+        'body_end': f"<script>{page['script']}</script>",
+    }
+    if codes:
+        fragments['code_title'] = escape_html_text(codes[0]['code_title'])
+        fragments['code_subtitle'] = escape_html_text(codes[0]['code_subtitle'])
+
+    chapters = []
+    contents = []
+    for i, code_data in enumerate(codes):
+        display_style = 'display: block;' if i == 0 else 'display: none;'
+        chapters_attrs = content_attrs = ''
+        if shard_url is not None and i > 0:
+            chapters_attrs = f' data-shard-src="{shard_url(code_data["code_id"], "chapters")}"'
+            content_attrs = f' data-shard-src="{shard_url(code_data["code_id"], "content")}"'
+            chapters_html = content_html = ''
+        else:
+            chapters_html = fragment_html(code_data['chapter_groups'], CHAPTER_GROUP_FILTER)
+            content_html = fragment_html(code_data['content_blocks'], CONTENT_BLOCK_FILTER)
+            if shard_dir is not None and i > 0:
+                chapters_attrs = f' data-shard-src="{_write_shard(shard_dir, code_data["code_id"], "chapters", chapters_html, written)}"'
+                content_attrs = f' data-shard-src="{_write_shard(shard_dir, code_data["code_id"], "content", content_html, written)}"'
+                chapters_html = content_html = ''
+
+        chapters.append(f'<div class="code-chapters"{chapters_attrs} id="chapters-{code_data["code_id"]}" style="{display_style}">')
+        chapters.append(chapters_html)
+        chapters.append('</div>')
+        contents.append(f'<div class="code-content"{content_attrs} id="content-{code_data["code_id"]}" style="{display_style}">')
+        contents.append(content_html)
+        contents.append('</div>')
+    fragments['chapters_container'] = ''.join(chapters)
+    fragments['content_area'] = ''.join(contents)
+
+    if shard_dir is not None:
+        # 더 이상 존재하지 않는 코드의 샤드 삭제
+        for path in [*Path(shard_dir).glob('*.html'), *Path(shard_dir).glob('*.json')]:
+            if path.name not in written:
+                path.unlink()
+        print(f"✓ Wrote {len(written)} code shards to {shard_dir}")
+    return fragments
+
+def _write_shard(shard_dir, code_id, part, text, written, suffix='html'):
+    """코드 샤드 파일을 쓰고 출력 HTML 기준 상대 경로를 반환합니다."""
+    shard_dir = Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    path = shard_dir / f"{code_id}-{part}.{suffix}"
+    path.write_text(text, encoding='utf-8')
+    written.add(path.name)
+    return Path(os.path.relpath(path, OUTPUT_FILE.parent)).as_posix()
+
+def generate_html(hierarchy, render_mode='splice', jobs=1, cache=None, shard_dir=None, content_source='data',
+                  shard_url=None):
+    """최종 HTML을 생성합니다.
+
+    render_mode='splice'는 reference 템플릿의 정적 조각 사이에 생성된 HTML을 이어 붙이고,
+    'soup'은 생성된 HTML을 BeautifulSoup으로 파싱해 DOM에 삽입합니다. 두 결과는 동일합니다.
+    shard_dir은 splice 모드에서만 지원하며, 첫 번째 코드 외에는 챕터 리스트/본문 HTML과 appData의
+    CodeContent 본문 텍스트를 코드별 샤드로 분리합니다 (검색 워커는 첫 검색 때 남은 텍스트 샤드를 가져옴).
+    shard_url(code_id, part)이 있으면 첫 번째 코드의 본문만 렌더링하고 나머지 코드는 그 URL에서
+    가져오게 합니다 (serve 모드, splice 전용).
+    content_source='dom'이면 미리 렌더링된 콘텐츠 행의 본문을 appData에서 빼고
+    검색/모달/복사가 DOM에서 읽습니다. 본문이 페이지에 모두 있어야 하므로 shard_dir과 함께 쓸 수 없습니다.
+    """
+    if content_source == 'dom' and (shard_dir is not None or shard_url is not None):
+        raise ValueError("content_source='dom' cannot be combined with sharded output")
+    print("Generating library sidebar and cards from schema hierarchy...")
+    with metrics.phase('sidebar_and_cards'):
+        submenu_items = sidebar_library_submenu_items(hierarchy)
+        page = {
+            'submenu_items': submenu_items,
+            'submenu_html': '\n'.join(submenu_items),
+            'cards_html': create_library_cards(hierarchy),
+        }
+
+    # 라이브러리 섹션에 실제 데이터 삽입
+    print("Generating initial library content with actual database...")
+    with metrics.phase('library_content'):
+        page['all_content'] = create_all_library_content(hierarchy, jobs=jobs, cache=cache,
+                                                         first_code_only=shard_url is not None,
+                                                         content_source=content_source)
+    if cache is not None:
+        print(f"✓ Render cache: {cache.hits} chapters reused, {cache.misses} rendered")
+        metrics.count('render_cache_hits', cache.hits)
+        metrics.count('render_cache_misses', cache.misses)
+    has_library_content = bool(page['all_content'] and page['all_content']['codes'])
+
     # JavaScript 데이터 및 기능 삽입
     print("Injecting JavaScript with schema-based data hierarchy...")
-    script_tag = soup.new_tag('script')
+    dom_chapter_ids = None
+    if content_source == 'dom' and has_library_content:
+        dom_chapter_ids = {chapter_id for code in page['all_content']['codes'] for chapter_id in code['chapter_ids']}
+    text_shards = None
+    written = set()
+    if (shard_dir is not None or shard_url is not None) and has_library_content:
+        with metrics.phase('text_shards'):
+            text_shards = write_text_shards(hierarchy, [code['code_id'] for code in page['all_content']['codes'][1:]],
+                                            shard_dir, shard_url, written)
+    with metrics.phase('app_script'):
+        page['script'] = build_app_script(hierarchy, dom_chapter_ids, text_shards)
+
+    if render_mode == 'soup':
+        if shard_dir is not None or shard_url is not None:
+            raise ValueError("Sharded output requires render_mode='splice'")
+        print("Parsing reference HTML...")
+        with metrics.phase('parse_reference'):
+            soup = BeautifulSoup(load_html(), 'lxml')
+            points = prepare_reference_soup(soup, has_library_content)
+        with metrics.phase('fill_reference'):
+            return fill_reference_soup(soup, points, page)
+
+    with metrics.phase('load_template'):
+        template = load_page_template(has_library_content)
+    with metrics.phase('splice_page'):
+        return template.render(render_splice_fragments(page, shard_dir, shard_url, written))
+
+# 페이지 스크립트가 실제로 읽는 열 (나머지 테이블/열은 appData에 싣지 않음)
+CLIENT_COLUMNS = {
+    'ModelCode': ('ModelCodeID', 'ModelCodeName', 'Description'),
+    'ModelCodeVersion': ('ModelCodeVersionID', 'ModelCodeID', 'Year'),
+    'Discipline': ('DisciplineID', 'DisciplineNameEN', 'DisciplineNameKR'),
+    'ModelCodeDiscipline': ('ModelCodeID', 'DisciplineID'),
+    'CodeChapter': ('ChapterID', 'ModelCodeVersionID', 'Chapter', 'TitleEN', 'TitleKR', 'ChapterComment'),
+    'CodeContent': ('ModelCodeID', 'ModelCodeVersionID', 'ChapterID', 'Chapter', 'Section', 'Subsection',
+                    'TitleEN', 'TitleKR', 'ContentEN', 'ContentKR', 'Comment'),
+    'CodeAttachment': ('AttachmentID', 'ModelCodeVersionID', 'Type', 'Number', 'Chapter', 'Section',
+                       'Subsection', 'AttachTitleEN', 'AttachContentEN'),
+}
+# 행마다 반복되는 ID 열은 공용 문자열 사전의 번호로 저장
+INTERNED_COLUMNS = ('ModelCodeID', 'ModelCodeVersionID', 'ChapterID', 'DisciplineID')
+
+# CodeContent 본문 필드: content_source='dom'이면 미리 렌더링된 행(data-field 속성)에서,
+# 샤드 출력이면 첫 번째 코드 외에는 코드별 텍스트 샤드(content_text_shards)에서 읽음
+CONTENT_TEXT_FIELDS = ('TitleEN', 'TitleKR', 'ContentEN', 'ContentKR', 'Comment')
+
+def encode_app_data(hierarchy, dom_chapter_ids=None, text_shards=None):
+    """appData를 테이블별 열 배열로 압축합니다.
+
+    반환값은 {'ids': [...], 'tables': {테이블: {'rows', 'columns', 'interned'}}} 형태이며
+    스크립트의 decodeAppData()가 원래의 행 객체 배열로 되돌립니다.
+    dom_chapter_ids가 주어지면 그 챕터들의 CodeContent 행은 본문 필드를 비우고
+    ContentID와 함께 'dom' 항목에 기록해, 클라이언트가 렌더링된 DOM에서 읽도록 합니다.
+    text_shards({ModelCodeID: 텍스트 샤드 URL})가 주어지면 그 코드들의 CodeContent 행은 본문 필드를 비우고
+    'textShards'에 URL을 기록해, 클라이언트가 코드를 열거나 처음 검색할 때 가져오도록 합니다.
+    """
+    ids = []
+    id_numbers = {}
+    tables = {}
+    for table_name, column_names in CLIENT_COLUMNS.items():
+        records = hierarchy.data.get(table_name, [])
+        dom_rows = []
+        shard_rows = []
+        if table_name == 'CodeContent' and dom_chapter_ids is not None:
+            column_names = ('ContentID',) + column_names
+            dom_rows = [i for i, record in enumerate(records) if record.get('ChapterID') in dom_chapter_ids]
+        if table_name == 'CodeContent' and text_shards:
+            shard_rows = [i for i, record in enumerate(records) if record.get('ModelCodeID') in text_shards]
+        columns = {}
+        interned = []
+        for column in column_names:
+            values = [record.get(column) for record in records]
+            if column in INTERNED_COLUMNS:
+                interned.append(column)
+                for i, value in enumerate(values):
+                    if value is None:
+                        continue
+                    if value not in id_numbers:
+                        id_numbers[value] = len(ids)
+                        ids.append(value)
+                    values[i] = id_numbers[value]
+            if column in CONTENT_TEXT_FIELDS:
+                for i in dom_rows + shard_rows:
+                    values[i] = None
+            columns[column] = values
+        tables[table_name] = {'rows': len(records), 'columns': columns, 'interned': interned}
+        if dom_rows:
+            tables[table_name]['dom'] = {'fields': list(CONTENT_TEXT_FIELDS), 'rows': dom_rows}
+    packed = {'ids': ids, 'tables': tables, 'lookups': build_client_lookups(hierarchy)}
+    if text_shards:
+        packed['textShards'] = text_shards
+    return packed
+
+def dom_text_bytes(hierarchy, dom_chapter_ids):
+    """encode_app_data(hierarchy, dom_chapter_ids)가 비우는 CodeContent 본문 필드의 JSON 바이트 수"""
+    values = [record.get(field) for record in hierarchy.data.get('CodeContent', [])
+              if record.get('ChapterID') in dom_chapter_ids for field in CONTENT_TEXT_FIELDS]
+    # 비운 칸에는 null이 남음
+    return (len(json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            - len(json.dumps([None] * len(values), separators=(',', ':'))))
+
+def content_text_shards(hierarchy, code_ids):
+    """코드별 CodeContent 본문 텍스트 샤드를 {ModelCodeID: {'rows': 행 번호 리스트, 'fields': {필드: 값 리스트}}}로 반환합니다.
+
+    행 번호는 appData.CodeContent의 순서이며, 스크립트는 샤드의 값을 그 행의 CONTENT_TEXT_FIELDS에 채웁니다.
+    """
+    shards = {code_id: {'rows': [], 'fields': {field: [] for field in CONTENT_TEXT_FIELDS}} for code_id in code_ids}
+    for i, record in enumerate(hierarchy.data.get('CodeContent', [])):
+        shard = shards.get(record.get('ModelCodeID'))
+        if shard is None:
+            continue
+        shard['rows'].append(i)
+        for field in CONTENT_TEXT_FIELDS:
+            shard['fields'][field].append(record.get(field))
+    return shards
+
+def write_text_shards(hierarchy, code_ids, shard_dir=None, shard_url=None, written=None):
+    """code_ids의 본문 텍스트 샤드 URL을 {ModelCodeID: URL}로 반환합니다.
+
+    shard_url이 있으면 그 URL만 반환하고 (serve), 없으면 shard_dir에 코드별 JSON 파일을 씁니다.
+    """
+    if shard_url is not None:
+        return {code_id: shard_url(code_id, 'text') for code_id in code_ids}
+    sources = {}
+    total = 0
+    for code_id, shard in content_text_shards(hierarchy, code_ids).items():
+        text = json.dumps(shard, ensure_ascii=False, separators=(',', ':'))
+        total += len(text.encode('utf-8'))
+        sources[code_id] = _write_shard(shard_dir, code_id, 'text', text, written, suffix='json')
+    metrics.count('text_shard_bytes', total)
+    print(f"✓ Moved content text of {len(sources)} codes to text shards ({total:,} bytes)")
+    return sources
+
+# JS parseFloat()가 읽는 숫자 접두사
+JS_FLOAT_RE = re.compile(r'\s*([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)')
+
+def _js_parse_float(value):
+    """JS의 parseFloat(value) || 0 값을 계산합니다 (클라이언트 정렬 순서 재현용)."""
+    if isinstance(value, (int, float)):
+        number = value
+    else:
+        match = JS_FLOAT_RE.match(str(value)) if value is not None else None
+        number = float(match.group(1)) if match else 0
+    return number if number == number else 0
+
+def _js_string(value):
+    """JS 문자열 연결과 같은 방식으로 값을 문자열로 바꿉니다."""
+    if value is None:
+        return 'null'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def client_place_key(version_id, chapter, section, subsection):
+    """스크립트의 placeKey()와 같은 PlaceKey 문자열을 만듭니다."""
+    key = f"{_js_string(version_id)}:{_js_string(chapter)}:{_js_string(section)}"
+    return key if subsection is None or subsection == '' else f"{key}:{_js_string(subsection)}"
+
+def build_client_lookups(hierarchy):
+    """클라이언트 데이터 접근 함수가 쓰는 조회 테이블을 생성합니다.
+
+    각 항목은 {'table': 테이블, 'rows': {키: 행 번호 또는 정렬된 행 번호 목록}}이며
+    스크립트의 decodeLookups()가 레코드 Map으로 바꿉니다.
+    """
+    data = hierarchy.data
+
+    def first_by(table_name, column):
+        # Array.find()처럼 같은 키의 첫 번째 행
+        rows = {}
+        for i, record in enumerate(data.get(table_name, [])):
+            if record.get(column) is not None:
+                rows.setdefault(record[column], i)
+        return {'table': table_name, 'rows': rows}
+
+    def group_by(table_name, key, sort_key=None):
+        records = data.get(table_name, [])
+        groups = defaultdict(list)
+        for i, record in enumerate(records):
+            value = key(record)
+            if value is not None:
+                groups[value].append(i)
+        if sort_key is not None:
+            for rows in groups.values():
+                rows.sort(key=lambda i: sort_key(records[i]))
+        return {'table': table_name, 'rows': dict(groups)}
 
-    # JSON 데이터를 안전하게 JavaScript에 삽입
-    json_data = json.dumps(hierarchy.data, ensure_ascii=False, indent=2)
+    return {
+        'modelCodeById': first_by('ModelCode', 'ModelCodeID'),
+        'versionById': first_by('ModelCodeVersion', 'ModelCodeVersionID'),
+        'chapterById': first_by('CodeChapter', 'ChapterID'),
+        'attachmentById': first_by('CodeAttachment', 'AttachmentID'),
+        'disciplineById': first_by('Discipline', 'DisciplineID'),
+        'disciplineLinkByModelCode': first_by('ModelCodeDiscipline', 'ModelCodeID'),
+        'versionsByModelCode': group_by('ModelCodeVersion', lambda v: v.get('ModelCodeID')),
+        'chaptersByVersion': group_by('CodeChapter', lambda ch: ch.get('ModelCodeVersionID'),
+                                      lambda ch: _js_parse_float(ch.get('Chapter'))),
+        'contentsByChapter': group_by('CodeContent', lambda c: c.get('ChapterID'),
+                                      lambda c: (_js_parse_float(c.get('Section')), _js_parse_float(c.get('Subsection')))),
+        'attachmentsByPlace': group_by('CodeAttachment', lambda att: client_place_key(
+            att.get('ModelCodeVersionID'), att.get('Chapter'), att.get('Section'), att.get('Subsection'))),
+    }
 
-    script_tag.string = f'''
+def build_client_catalog(hierarchy):
+    """페이지 스크립트의 codeCatalog: hierarchy.catalog의 코드 이름('IBC')과 버전 연도(없으면 '')"""
+    catalog = hierarchy.catalog
+    return {
+        'codes': {entry['code_id']: entry['code_base'] for entry in catalog.entries},
+        'years': {version_id: version['year'] for version_id, version in catalog.versions.items()},
+    }
+
+# 검색 색인 posting 플래그와 대상 필드
+POSTING_TITLE = 1
+POSTING_CONTENT = 2
+POSTING_WHOLE_WORD = 4
+# (검색 결과 객체의 필드, 플래그, BM25_FIELD_BOOSTS와 같은 가중치)
+SEARCH_FIELDS = (('titleEN', POSTING_TITLE, 3.0), ('titleKR', POSTING_TITLE, 3.0),
+                 ('contentEN', POSTING_CONTENT, 1.0), ('contentKR', POSTING_CONTENT, 1.0))
+# 영어 토큰은 JS 정규식의 \w 단위로 잘라야 \b 완전 일치 판정과 맞습니다
+SEARCH_WORD_RE = re.compile(r'[a-z0-9_]+')
+SEARCH_HANGUL_RE = re.compile(r'[가-힣]+')
+
+def search_terms(text):
+    """텍스트에서 (검색어, 완전한 단어 여부) 쌍을 추출합니다.
+
+    영어는 소문자 단어 토큰, 한국어는 음절 1-gram과 2-gram입니다.
+    한글은 JS 정규식에서 \\w가 아니므로 n-gram은 한글 구간 전체가 양쪽 모두
+    \\w 글자에 붙어 있을 때만(예: '4.8.1의C') 완전한 단어로 취급합니다.
+    """
+    text = text.lower()
+    for token in SEARCH_WORD_RE.findall(text):
+        yield token, True
+    for match in SEARCH_HANGUL_RE.finditer(text):
+        run = match.group()
+        bounded = (match.start() > 0 and SEARCH_WORD_RE.match(text, match.start() - 1) is not None
+                   and SEARCH_WORD_RE.match(text, match.end()) is not None)
+        for n in (1, 2):
+            for i in range(len(run) - n + 1):
+                yield run[i:i + n], bounded and n == len(run)
+
+def build_search_index(rows):
+    """검색 결과 객체(search_rows)에 대한 역색인을 생성합니다 (페이지 스크립트 buildSearchIndex와 같은 색인).
+
+    문서 번호는 rows의 순서이며 None인 행은 색인하지 않습니다. postings[term]은
+    (문서 번호, 플래그, 빈도) 배열이며 플래그는 POSTING_* 비트의 조합, 빈도는 필드 길이로 정규화하고
+    제목 가중치를 곱한 BM25F 빈도입니다. docs(색인한 문서 수)와 posting 길이로 IDF를 계산합니다.
+    """
+    indexed = [(doc, row) for doc, row in enumerate(rows) if row is not None]
+    # 필드별 평균 길이 (검색어 수)
+    averages = {}
+    for field, _, _ in SEARCH_FIELDS:
+        total = sum(bm25_terms_length(str(row[field])) for _, row in indexed if row[field])
+        averages[field] = (total / len(indexed)) or 1 if indexed else 1
+    # 검색어 → (문서 번호, 플래그, 정규화 빈도) 배열 (문서 순서로 채우므로 같은 문서는 마지막 항목에 합침)
+    postings = defaultdict(lambda: (array('I'), array('B'), array('d')))
+    for doc, row in indexed:
+        for field, field_flag, boost in SEARCH_FIELDS:
+            value = row[field]
+            if not value:
+                continue
+            terms = list(search_terms(str(value)))
+            weight = boost / (1 - BM25_B + BM25_B * len(terms) / averages[field])
+            for term, whole_word in terms:
+                flags = field_flag | (POSTING_WHOLE_WORD if whole_word else 0)
+                docs, doc_flags, frequencies = postings[term]
+                if docs and docs[-1] == doc:
+                    doc_flags[-1] |= flags
+                    frequencies[-1] += weight
+                else:
+                    docs.append(doc)
+                    doc_flags.append(flags)
+                    frequencies.append(weight)
+    return {'docs': len(indexed), 'postings': dict(postings)}
+
+def search_rows(hierarchy):
+    """CodeContent 순서의 검색 결과 객체 리스트 (페이지 스크립트의 buildSearchRows와 같은 필드)
+
+    코드/버전/챕터를 찾을 수 없는 행은 None입니다.
+    """
+    catalog = hierarchy.catalog
+    rows = []
+    for content in hierarchy.data.get('CodeContent', []):
+        model_code = hierarchy.get_related('CodeContent', content, 'ModelCode')
+        version = hierarchy.get_related('CodeContent', content, 'ModelCodeVersion')
+        chapter = hierarchy.get_related('CodeContent', content, 'CodeChapter')
+        if not (model_code and version and chapter):
+            rows.append(None)
+            continue
+        rows.append({
+            'code': catalog.by_code[model_code['ModelCodeID']]['code_base'],
+            'year': int(version['Year']) if version.get('Year') else '',
+            'chapter': chapter['Chapter'],
+            'chapterTitle': chapter.get('TitleEN') or '',
+            'section': content.get('Section') or 'General',
+            'subsection': content.get('Subsection') or '',
+            'titleEN': content.get('TitleEN') or '',
+            'titleKR': content.get('TitleKR') or '',
+            'contentEN': content.get('ContentEN') or '',
+            'contentKR': content.get('ContentKR') or '',
+            'codeId': content.get('ModelCodeID'),
+            'versionId': content.get('ModelCodeVersionID'),
+            'chapterId': content.get('ChapterID'),
+        })
+    return rows
+
+def search_contents(rows, keyword, code_ids=None):
+    """페이지 검색과 같은 기준으로 일치하는 행 번호를 (완전 일치, 부분 일치) 리스트로 반환합니다.
+
+    keyword는 소문자 검색어입니다. 필드에 포함되면 부분 일치이고, 단어 경계로 둘러싸여 있으면
+    완전 일치입니다. keyword가 비어 있으면 code_ids 필터만 적용한 모든 행이 부분 일치입니다.
+    """
+    # JS의 \b처럼 ASCII 단어 글자 기준
+    boundary = re.compile(r'\b' + re.escape(keyword) + r'\b', re.IGNORECASE | re.ASCII)
+    exact = []
+    partial = []
+    for doc, row in enumerate(rows):
+        if row is None or (code_ids is not None and row['codeId'] not in code_ids):
+            continue
+        if not keyword:
+            partial.append(doc)
+            continue
+        fields = [str(row[field]).lower() for field in ('titleEN', 'titleKR', 'contentEN', 'contentKR')]
+        if not any(keyword in field for field in fields):
+            continue
+        (exact if any(boundary.search(field) for field in fields) else partial).append(doc)
+    return exact, partial
+
+class SearchIndexScorer:
+    """build_search_index의 색인으로 페이지 스크립트(createSearchEngine)와 같은 검색 점수를 계산합니다.
+
+    키워드의 영어 단어마다 그 단어를 포함하는 검색어 중 가장 높은 점수, 한글 구간마다 음절 n-gram
+    점수의 합을 같은 순서로 더하므로 페이지와 같은 순위가 됩니다.
+    """
+
+    def __init__(self, search_index):
+        self.index = search_index
+        self._postings = {}
+
+    def _scores(self, term):
+        """검색어의 문서 번호 → 점수 (searchPostings와 같은 계산, 한 번만 복원)"""
+        scores = self._postings.get(term)
+        if scores is None:
+            docs, _, frequencies = self.index['postings'][term]
+            idf = bm25_idf(self.index['docs'], len(docs))
+            k1 = BM25_K1
+            scores = {doc: idf * tf * (k1 + 1) / (k1 + tf) for doc, tf in zip(docs, frequencies)}
+            self._postings[term] = scores
+        return scores
+
+    def _word_scores(self, word):
+        scores = {}
+        for term in self.index['postings']:
+            if word in term:
+                for doc, score in self._scores(term).items():
+                    scores[doc] = max(scores.get(doc, score), score)
+        return scores
+
+    def _hangul_scores(self, run):
+        grams = [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+        scores = None
+        for gram in grams:
+            if gram not in self.index['postings']:
+                return {}
+            postings = self._scores(gram)
+            if scores is None:
+                scores = dict(postings)
+            else:
+                scores = {doc: score + postings[doc] for doc, score in scores.items() if doc in postings}
+        return scores
+
+    def scores(self, keyword):
+        """소문자 키워드의 문서 번호 → 점수 (모든 단어/한글 구간을 포함하는 문서만, 색인할 글자가 없으면 빈 dict)"""
+        parts = ([self._word_scores(word) for word in SEARCH_WORD_RE.findall(keyword)]
+                 + [self._hangul_scores(run) for run in SEARCH_HANGUL_RE.findall(keyword)])
+        if not parts:
+            return {}
+        scores = parts[0]
+        for part in parts[1:]:
+            scores = {doc: score + part[doc] for doc, score in scores.items() if doc in part}
+        return scores
+
+    def rank(self, docs, keyword):
+        """문서 번호 리스트를 점수 높은 순으로 정렬합니다 (같으면 문서 번호 순)."""
+        scores = self.scores(keyword)
+        return sorted(docs, key=lambda doc: (-scores.get(doc, 0), doc))
+
+def content_key(model_code, version, content):
+    """CodeContent 행의 ContentKey (예: 'IBC 2021: Chapter 9 - Section 903.2', schema-meta.json derivedKeys)"""
+    key = (f"{model_code['ModelCodeName'].split(':')[0].strip()} {int(version['Year']) if version.get('Year') else ''}: "
+           f"Chapter {content.get('Chapter')} - Section {content.get('Section') or 'General'}")
+    if content.get('Subsection'):
+        key += f".{content['Subsection']}"
+    return key
+
+def bm25_terms(text):
+    """색인할 BM25 검색어 리스트 (search_terms와 같은 토큰: 영어 단어, 한국어 음절 1-gram/2-gram)"""
+    text = text.lower()
+    terms = SEARCH_WORD_RE.findall(text)
+    for run in SEARCH_HANGUL_RE.findall(text):
+        terms += run
+        terms += map(operator.add, run, run[1:])
+    return terms
+
+def bm25_terms_length(text):
+    """bm25_terms(text)의 길이 (리스트를 만들지 않고 계산)"""
+    text = text.lower()
+    return (len(SEARCH_WORD_RE.findall(text))
+            + sum(2 * len(run) - 1 for run in SEARCH_HANGUL_RE.findall(text)))
+
+def bm25_field_weights(contents):
+    """BM25_FIELD_BOOSTS의 필드별로, 필드 길이 → 검색어 1회당 정규화 빈도 함수를 반환합니다.
+
+    가중치는 boost / (1 - b + b × 길이 / 평균 길이)이며 평균 길이를 구하느라 contents를 한 번 읽습니다.
+    """
+    weights = {}
+    for field, boost in BM25_FIELD_BOOSTS:
+        total = sum(bm25_terms_length(str(content[field])) for content in contents if content.get(field))
+        average = (total / len(contents)) or 1 if contents else 1
+        weights[field] = lambda length, boost=boost, average=average: boost / (1 - BM25_B + BM25_B * length / average)
+    return weights
+
+def bm25_weighted_frequencies(contents):
+    """CodeContent 행마다 {검색어: BM25F 정규화 빈도}를 차례로 생성합니다.
+
+    필드별 검색어 빈도에 bm25_field_weights의 가중치를 곱해 합산합니다 (문서별 빈도를 모두 들고 있지 않도록
+    contents를 두 번 읽습니다).
+    """
+    weights = bm25_field_weights(contents)
+    for content in contents:
+        weighted = defaultdict(float)
+        for field, _ in BM25_FIELD_BOOSTS:
+            value = content.get(field)
+            if not value:
+                continue
+            terms = bm25_terms(str(value))
+            weight = weights[field](len(terms))
+            for term, count in Counter(terms).items():
+                weighted[term] += weight * count
+        yield weighted
+
+def bm25_idf(doc_count, df):
+    """검색어가 df개 문서에 있을 때의 BM25 IDF"""
+    return math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+
+def bm25_query_terms(query):
+    """질의어의 BM25 검색어 (영어 단어, 한글 구간의 음절 2-gram, 한 글자 구간은 1-gram)"""
+    query = query.lower()
+    terms = SEARCH_WORD_RE.findall(query)
+    for run in SEARCH_HANGUL_RE.findall(query):
+        terms += [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+    return list(dict.fromkeys(terms))
+
+class Bm25Index:
+    """CodeContent에 대한 BM25F 검색 색인 (search 서브커맨드)
+
+    필드별 단어 빈도를 필드 길이로 정규화하고 BM25_FIELD_BOOSTS로 가중 합산(BM25F)한 뒤,
+    검색어-문서 쌍의 점수를 색인을 만들 때 미리 계산합니다. 질의는 점수 순 posting에서
+    상위 결과가 확정될 때까지만 읽습니다. 토큰은 페이지 검색 색인과 같습니다 (bm25_terms).
+    """
+
+    def __init__(self, docs, postings):
+        # 문서별 (ContentID, ContentKey, ModelCodeID, TitleEN, TitleKR, 발췌)
+        self.docs = docs
+        # 검색어 -> (문서 번호 array('I'), 점수 array('f'), 문서 번호로 찾는 점수 array('f') 또는 None)
+        # 앞의 두 배열은 점수 높은 순 (같으면 문서 번호 순). 세 번째 배열은 문서 수의
+        # 1/SEARCH_DENSE_RATIO 이상에 나오는 검색어에만 있습니다.
+        self.postings = postings
+        # 검색어 -> 문서 번호 리스트의 점수를 한꺼번에 찾는 함수 (없는 문서는 0점)
+        self._lookups = {term: self._lookup(doc_ids, scores, dense)
+                         for term, (doc_ids, scores, dense) in postings.items()}
+        # ModelCodeID -> 문서 번호 리스트, 문서 번호 -> ModelCodeID 순번 (code_ids 필터용)
+        self._code_docs = defaultdict(list)
+        for doc, (_, _, code_id, *_) in enumerate(docs):
+            self._code_docs[code_id].append(doc)
+        code_numbers = {code_id: i for i, code_id in enumerate(self._code_docs)}
+        self._doc_codes = array('I', (code_numbers[code_id] for _, _, code_id, *_ in docs))
+
+    @staticmethod
+    def _lookup(doc_ids, scores, dense):
+        """문서 번호 리스트 -> 점수들 함수 (dense 배열이 없으면 dict로 찾음)"""
+        if dense is None:
+            table = dict(zip(doc_ids, scores))
+            return lambda batch: map(table.get, batch, repeat(0.0))
+        # itemgetter는 인자가 하나면 튜플이 아니라 값을 반환합니다
+        return lambda batch: operator.itemgetter(*batch)(dense) if len(batch) > 1 else [dense[doc] for doc in batch]
+
+    @classmethod
+    def build(cls, hierarchy):
+        """hierarchy의 CodeContent로 색인을 만듭니다 (코드/버전/챕터를 찾을 수 없는 행은 제외)."""
+        contents = []
+        docs = []
+        for content in hierarchy.data.get('CodeContent', []):
+            model_code = hierarchy.get_related('CodeContent', content, 'ModelCode')
+            version = hierarchy.get_related('CodeContent', content, 'ModelCodeVersion')
+            chapter = hierarchy.get_related('CodeContent', content, 'CodeChapter')
+            if not (model_code and version and chapter):
+                continue
+            snippet = ' '.join(str(content.get('ContentEN') or content.get('ContentKR') or '').split())
+            contents.append(content)
+            docs.append((content.get('ContentID'), content_key(model_code, version, content), content.get('ModelCodeID'),
+                         content.get('TitleEN') or '', content.get('TitleKR') or '', snippet[:SEARCH_SNIPPET_LENGTH]))
+
+        frequencies = defaultdict(lambda: (array('I'), array('f')))
+        for doc, weighted in enumerate(bm25_weighted_frequencies(contents)):
+            for term, tf in weighted.items():
+                doc_ids, values = frequencies[term]
+                doc_ids.append(doc)
+                values.append(tf)
+
+        postings = {}
+        for term, (doc_ids, values) in frequencies.items():
+            idf = bm25_idf(len(docs), len(doc_ids))
+            scores = array('f', (idf * tf * (BM25_K1 + 1) / (BM25_K1 + tf) for tf in values))
+            dense = None
+            if len(doc_ids) * SEARCH_DENSE_RATIO >= len(docs):
+                dense = array('f', bytes(scores.itemsize * len(docs)))
+                for doc, score in zip(doc_ids, scores):
+                    dense[doc] = score
+            # 안정 정렬이므로 점수가 같으면 문서 번호 순
+            order = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+            postings[term] = (array('I', map(doc_ids.__getitem__, order)), array('f', map(scores.__getitem__, order)),
+                              dense)
+        return cls(docs, postings)
+
+    def _totals(self, terms, batch):
+        """batch 문서들의 전체 점수 리스트 (검색어 순서대로 더함)"""
+        totals = None
+        for term in terms:
+            scores = self._lookups[term](batch)
+            totals = scores if totals is None else map(operator.add, totals, scores)
+        return list(totals)
+
+    def _push(self, top, limit, terms, batch, code_mask=None):
+        """batch 문서들의 전체 점수를 구해 top 힙(최대 limit개)에 넣습니다.
+
+        0점인 문서, 이미 힙에 있는 문서와 code_mask에서 빠진 코드의 문서는 넣지 않습니다. 힙에서
+        밀려난 문서는 다시 limit번째 점수를 넘을 수 없으므로 batch에 같은 문서가 여러 번 있어도 됩니다.
+        """
+        totals = self._totals(terms, batch)
+        # limit번째 결과(아직 limit개가 안 되면 0점) 이상인 문서만 파이썬 루프로 옵니다
+        floor = top[0] if len(top) == limit else (0.0, 0)
+        members = {negative_doc for _, negative_doc in top}
+        for total, doc in compress(zip(totals, batch), map(operator.le, repeat(floor[0]), totals)):
+            item = (total, -doc)
+            if item <= floor or item[1] in members:
+                continue
+            if code_mask is not None and not code_mask[self._doc_codes[doc]]:
+                continue
+            members.add(item[1])
+            if len(top) < limit:
+                heapq.heappush(top, item)
+            elif item > top[0]:
+                members.discard(heapq.heapreplace(top, item)[1])
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT, code_ids=None):
+        """점수 높은 순으로 [(문서 번호, 점수)]를 최대 limit개 반환합니다.
+
+        Fagin의 threshold algorithm: 검색어별 posting을 점수 순으로 SEARCH_SCAN_BATCH개씩 돌아가며
+        읽고, 읽은 문서들의 전체 점수는 검색어별로 묶어서 한꺼번에 찾습니다. 아직 읽지 않은
+        문서가 얻을 수 있는 최대 점수(각 posting의 다음 점수 합)가 limit번째 점수 이하가 되면 멈춥니다.
+        code_ids의 문서가 전체의 1/SEARCH_FILTER_SCAN_RATIO 이하이면 posting을 읽지 않고 그 문서들만
+        모두 계산합니다. 절반 이하이면 읽은 문서 중 다른 코드의 문서를 먼저 버리고, 그보다 많으면
+        limit번째 점수를 넘은 문서만 코드를 확인합니다.
+        """
+        terms = [term for term in bm25_query_terms(query) if term in self.postings]
+        if not terms or limit <= 0:
+            return []
+        if code_ids is not None:
+            matched = sum(len(self._code_docs.get(code_id, ())) for code_id in code_ids)
+            if matched * SEARCH_FILTER_SCAN_RATIO <= len(self.docs):
+                if not matched:
+                    return []
+                allowed = [doc for code_id in code_ids for doc in self._code_docs.get(code_id, ())]
+                totals = self._totals(terms, allowed)
+                # limit번째 점수 이상인 문서만 (점수, -문서 번호) 튜플로 만들어 정렬합니다
+                floor = heapq.nlargest(limit, totals)[-1]
+                hits = heapq.nlargest(limit, ((total, -doc) for total, doc in
+                                              compress(zip(totals, allowed), map(operator.le, repeat(floor), totals))
+                                              if total > 0))
+                return [(-negative_doc, score) for score, negative_doc in hits]
+            # ModelCodeID 순번 -> 포함 여부
+            code_mask = bytes(code_id in code_ids for code_id in self._code_docs)
+            narrow = matched * 2 <= len(self.docs)
+        top = []  # (점수, -문서 번호) 최소 힙
+        postings = [self.postings[term] for term in terms]
+        depth = 0
+        while True:
+            batch = []
+            for doc_ids, _, _ in postings:
+                batch += doc_ids[depth:depth + SEARCH_SCAN_BATCH]
+            if code_ids is None:
+                self._push(top, limit, terms, batch)
+            elif narrow:
+                batch = list(compress(batch, map(code_mask.__getitem__, map(self._doc_codes.__getitem__, batch))))
+                if batch:
+                    self._push(top, limit, terms, batch)
+            else:
+                self._push(top, limit, terms, batch, code_mask)
+            depth += SEARCH_SCAN_BATCH
+            if not any(depth < len(doc_ids) for doc_ids, _, _ in postings):
+                break
+            threshold = sum(scores[depth] for _, scores, _ in postings if depth < len(scores))
+            if len(top) == limit and top[0][0] >= threshold:
+                break
+        return [(-negative_doc, score) for score, negative_doc in sorted(top, reverse=True)]
+
+    def save(self, path, sources):
+        """색인과 소스 파일 서명을 저장합니다 (임시 파일에 쓴 뒤 교체)."""
+        header = {'version': SEARCH_INDEX_VERSION,
+                  'sources': {str(source): DataSnapshot.signature(source) for source in sources}}
+        path = Path(path)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump((self.docs, self.postings), f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path, sources):
+        """소스 파일이 바뀌지 않았으면 저장된 색인을, 아니면 None을 반환합니다."""
+        try:
+            with open(path, 'rb') as f:
+                header = pickle.load(f)
+                if header.get('version') != SEARCH_INDEX_VERSION:
+                    return None
+                if not DataSnapshot.sources_unchanged(header['sources'], sources):
+                    return None
+                return cls(*pickle.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, TypeError, ValueError) as e:
+            print(f"⚠ Ignoring unreadable search index {path}: {e}")
+            return None
+
+def build_app_script(hierarchy, dom_chapter_ids=None, text_shards=None):
+    """페이지에 삽입할 JavaScript(데이터 + 기능)를 생성합니다.
+
+    dom_chapter_ids와 text_shards는 encode_app_data()에 그대로 전달됩니다.
+    """
+    # JSON 데이터를 안전하게 JavaScript에 삽입 (열 단위 압축)
+    with metrics.phase('encode_app_data'):
+        json_data = json.dumps(encode_app_data(hierarchy, dom_chapter_ids, text_shards), ensure_ascii=False,
+                               separators=(',', ':'))
+    packed_size = len(json_data.encode('utf-8'))
+    metrics.count('app_data_bytes', packed_size)
+    print(f"✓ appData payload: {packed_size:,} bytes")
+    if dom_chapter_ids is not None:
+        dropped_size = dom_text_bytes(hierarchy, dom_chapter_ids)
+        metrics.count('app_data_dom_text_bytes', dropped_size)
+        print(f"✓ Content text read from rendered DOM: {dropped_size:,} bytes of text left out of appData")
+    code_catalog = json.dumps(build_client_catalog(hierarchy), ensure_ascii=False, separators=(',', ':'))
+
+    return f'''
 // === Data Layer ===
-const appData = {json_data};
+// 열 단위로 압축된 데이터 (encode_app_data): interned 열의 값은 ids의 번호
+const appDataPacked = {json_data};
+
+let contentElements = null;
+
+// 미리 렌더링된 콘텐츠 행(data-content-id)의 data-field 요소 텍스트
+function contentFieldText(contentId, field) {{
+    if (!contentElements) {{
+        contentElements = new Map();
+        document.querySelectorAll('[data-content-id]').forEach(el => contentElements.set(el.dataset.contentId, el));
+    }}
+    const element = contentElements.get(contentId);
+    const fieldElement = element && element.querySelector(`[data-field="${{field}}"]`);
+    return fieldElement ? fieldElement.textContent : null;
+}}
+
+function decodeAppData(packed) {{
+    const data = {{}};
+    Object.entries(packed.tables).forEach(([table, {{ rows, columns, interned, dom }}]) => {{
+        const decoders = Object.entries(columns).map(([name, values]) => interned.includes(name)
+            ? [name, i => values[i] === null ? null : packed.ids[values[i]]]
+            : [name, i => values[i]]);
+        const records = new Array(rows);
+        for (let i = 0; i < rows; i++) {{
+            const record = {{}};
+            decoders.forEach(([name, decode]) => {{ record[name] = decode(i); }});
+            records[i] = record;
+        }}
+        // dom 행의 본문 필드는 데이터에 싣지 않고 렌더링된 DOM에서 읽음
+        if (dom) {{
+            dom.rows.forEach(i => dom.fields.forEach(field => {{
+                Object.defineProperty(records[i], field, {{
+                    get() {{ return contentFieldText(this.ContentID, field); }},
+                    enumerable: true
+                }});
+            }}));
+        }}
+        data[table] = records;
+    }});
+    return data;
+}}
+
+const appData = decodeAppData(appDataPacked);
+
+// 샤드 출력: ModelCodeID → 아직 가져오지 않은 CodeContent 본문 텍스트 샤드 URL (그 행의 본문 필드는 null)
+const contentTextShards = new Map(Object.entries(appDataPacked.textShards || {{}}));
+
+// 본문 텍스트 샤드 {{ rows, fields }}를 가져옴 (content_text_shards, 검색 워커에서도 사용)
+function fetchTextShard(src) {{
+    return fetch(src).then(response => {{
+        if (!response.ok) throw new Error('HTTP ' + response.status);
+        return response.json();
+    }});
+}}
+
+// === Code Catalog (build_client_catalog) ===
+// ModelCodeID → 코드 이름, ModelCodeVersionID → 연도 (표시 이름을 행/화면마다 다시 파싱하지 않음)
+const codeCatalog = {code_catalog};
+
+// 생성기가 만든 조회 테이블 (build_client_lookups): 행 번호를 레코드로 바꿔 Map으로 만듦
+function decodeLookups(packed, data) {{
+    const lookups = {{}};
+    Object.entries(packed.lookups).forEach(([name, {{ table, rows }}]) => {{
+        const records = data[table];
+        lookups[name] = new Map(Object.entries(rows).map(([key, value]) =>
+            [key, Array.isArray(value) ? value.map(i => records[i]) : records[value]]));
+    }});
+    return lookups;
+}}
+
+const appLookups = decodeLookups(appDataPacked, appData);
 
 // === Schema-based Data Access Functions ===
 function getModelCodeVersions(modelCodeId) {{
-    return appData.ModelCodeVersion.filter(v => v.ModelCodeID === modelCodeId);
+    return appLookups.versionsByModelCode.get(modelCodeId) || [];
+}}
+
+function getModelCodeVersion(versionId) {{
+    return appLookups.versionById.get(versionId);
 }}
 
+// Chapter 순으로 정렬된 목록
 function getChapters(versionId) {{
-    return appData.CodeChapter.filter(ch => ch.ModelCodeVersionID === versionId)
-        .sort((a, b) => a.Chapter - b.Chapter);
+    return appLookups.chaptersByVersion.get(versionId) || [];
+}}
+
+function getChapter(chapterId) {{
+    return appLookups.chapterById.get(chapterId);
 }}
 
+// Section, Subsection 순으로 정렬된 목록
 function getContents(chapterId) {{
-    return appData.CodeContent.filter(c => c.ChapterID === chapterId)
-        .sort((a, b) => {{
-            const aSection = parseFloat(a.Section) || 0;
-            const bSection = parseFloat(b.Section) || 0;
-            if (aSection !== bSection) return aSection - bSection;
-
-            const aSubsection = parseFloat(a.Subsection) || 0;
-            const bSubsection = parseFloat(b.Subsection) || 0;
-            return aSubsection - bSubsection;
-        }});
+    return appLookups.contentsByChapter.get(chapterId) || [];
+}}
+
+// PlaceKey: ModelCodeVersionID:Chapter:Section[:Subsection] (schema-meta.json derivedKeys)
+function placeKey(versionId, chapter, section, subsection) {{
+    const key = versionId + ':' + chapter + ':' + section;
+    return subsection === null || subsection === undefined || subsection === '' ? key : key + ':' + subsection;
 }}
 
 function getAttachments(versionId, chapter, section, subsection) {{
-    return appData.CodeAttachment.filter(att =>
-        att.ModelCodeVersionID === versionId &&
-        att.Chapter === String(chapter) &&
-        att.Section === String(section) &&
-        att.Subsection === subsection
-    );
+    return appLookups.attachmentsByPlace.get(placeKey(versionId, chapter, section, subsection)) || [];
+}}
+
+function getAttachment(attachmentId) {{
+    return appLookups.attachmentById.get(attachmentId);
 }}
 
 function getModelCode(modelCodeId) {{
-    return appData.ModelCode.find(mc => mc.ModelCodeID === modelCodeId);
+    return appLookups.modelCodeById.get(modelCodeId);
+}}
+
+// 코드 제목 (예: 'IBC 2021', 연도가 없는 버전이면 코드 이름만)
+function getCodeDisplayName(modelCodeId, versionId) {{
+    const year = codeCatalog.years[versionId];
+    return codeCatalog.codes[modelCodeId] + (year ? ' ' + year : '');
 }}
 
 function getDiscipline(modelCodeId) {{
-    const mcd = appData.ModelCodeDiscipline.find(mcd => mcd.ModelCodeID === modelCodeId);
+    const mcd = appLookups.disciplineLinkByModelCode.get(modelCodeId);
     if (mcd) {{
-        return appData.Discipline.find(d => d.DisciplineID === mcd.DisciplineID);
+        return appLookups.disciplineById.get(mcd.DisciplineID);
     }}
     return null;
 }}
@@ -919,12 +3435,9 @@ function loadChapters(versionId, codeId) {{
 
     // 코드 제목 업데이트
     const modelCode = getModelCode(codeId);
-    const version = appData.ModelCodeVersion.find(v => v.ModelCodeVersionID === versionId);
 
     if (modelCode) {{
-        const codeName = modelCode.ModelCodeName.split(':')[0].trim();
-        const year = version && version.Year ? ' ' + Math.floor(version.Year) : '';
-        document.getElementById('codeTitle').textContent = codeName + year;
+        document.getElementById('codeTitle').textContent = getCodeDisplayName(codeId, versionId);
         document.getElementById('codeSubtitle').textContent = modelCode.Description || '';
     }}
 
@@ -935,7 +3448,7 @@ function loadChapters(versionId, codeId) {{
 }}
 
 function loadChapterContent(chapterId, versionId) {{
-    const chapter = appData.CodeChapter.find(ch => ch.ChapterID === chapterId);
+    const chapter = getChapter(chapterId);
     if (!chapter) return;
 
     // 챕터 활성화 표시
@@ -1064,7 +3577,7 @@ function loadChapterContent(chapterId, versionId) {{
 
 // Attachment modal function
 function openAttachmentModal(attachmentId) {{
-    const attachment = appData.CodeAttachment.find(a => a.AttachmentID === attachmentId);
+    const attachment = getAttachment(attachmentId);
     if (!attachment) return;
 
     alert(`${{attachment.Type}} ${{attachment.Number || ''}}\\n${{attachment.AttachTitleEN || ''}}\\n${{attachment.AttachContentEN || 'Content not available'}}`);
@@ -1200,6 +3713,46 @@ function loadCodeFromSidebar(versionId, codeId) {{
     switchToLibraryCode(codeId, versionId);
 }}
 
+// 샤드 출력: 코드별 챕터/콘텐츠 HTML을 처음 열 때 가져와 삽입 (이후 재사용)
+const codeShardLoads = new Map();
+
+function loadCodeShard(codeId) {{
+    if (!codeShardLoads.has(codeId)) {{
+        const targets = [
+            document.getElementById('chapters-' + codeId),
+            document.getElementById('content-' + codeId)
+        ].filter(el => el && el.dataset.shardSrc);
+
+        const loads = targets.map(el =>
+            fetch(el.dataset.shardSrc)
+                .then(response => {{
+                    if (!response.ok) throw new Error('HTTP ' + response.status);
+                    return response.text();
+                }})
+                .then(html => {{
+                    el.innerHTML = html;
+                    delete el.dataset.shardSrc;
+                }})
+        );
+        // 코드의 CodeContent 본문 텍스트를 appData에 채움
+        const textSrc = contentTextShards.get(codeId);
+        if (textSrc) {{
+            loads.push(fetchTextShard(textSrc).then(shard => {{
+                Object.entries(shard.fields).forEach(([field, values]) => {{
+                    shard.rows.forEach((doc, i) => {{ appData.CodeContent[doc][field] = values[i]; }});
+                }});
+                contentTextShards.delete(codeId);
+            }}));
+        }}
+
+        codeShardLoads.set(codeId, Promise.all(loads).catch(error => {{
+            console.error('Failed to load shard for codeId:', codeId, error);
+            codeShardLoads.delete(codeId);
+        }}));
+    }}
+    return codeShardLoads.get(codeId);
+}}
+
 function switchToLibraryCode(codeId, versionId) {{
     console.log('Switching to code:', codeId, 'version:', versionId);
 
@@ -1249,13 +3802,11 @@ function switchToLibraryCode(codeId, versionId) {{
     }}
 
     // Update header with code info
-    const modelCode = appData.ModelCode.find(mc => mc.ModelCodeID === codeId);
-    const version = appData.ModelCodeVersion.find(v => v.ModelCodeVersionID === versionId);
+    const modelCode = getModelCode(codeId);
+    const version = getModelCodeVersion(versionId);
 
     if (modelCode && version) {{
-        const codeName = modelCode.ModelCodeName.split(':')[0].trim();
-        const year = version.Year ? ' ' + Math.floor(version.Year) : '';
-        document.getElementById('codeTitle').textContent = codeName + year;
+        document.getElementById('codeTitle').textContent = getCodeDisplayName(codeId, versionId);
         document.getElementById('codeSubtitle').textContent = modelCode.Description || '';
     }}
 
@@ -1265,12 +3816,388 @@ function switchToLibraryCode(codeId, versionId) {{
     if (contentContainer) {{
         contentContainer.scrollTo({{ top: 0, behavior: 'instant' }});
     }}
+
+    return loadCodeShard(codeId);
+}}
+
+// === Search Engine ===
+// 같은 코드를 Web Worker(searchWorkerMain)와, Worker를 만들 수 없을 때 메인 스레드에서 사용합니다.
+// rows[doc]은 appData.CodeContent[doc]의 검색 결과 객체이며 코드/버전/챕터 정보가 없으면 null입니다.
+
+// rows에 대한 역색인 (build_search_index와 같은 색인, 첫 검색 때 워커에서 한 번 생성)
+// postings: 검색어 -> {{ docs, flags, tfs }} (문서 번호, 플래그, 필드 길이로 정규화하고 제목 가중치를 곱한 빈도)
+// docs: 색인한 문서 수 (IDF 계산용)
+function buildSearchIndex(rows) {{
+    // [필드, 플래그, 가중치] (SEARCH_FIELDS), BM25 b, 플래그 (POSTING_WHOLE_WORD)
+    const fields = {json.dumps(SEARCH_FIELDS)};
+    const b = {BM25_B};
+    const SEARCH_WHOLE_WORD = {POSTING_WHOLE_WORD};
+
+    // search_terms와 같은 [검색어, 완전한 단어 여부] 목록: 영어 단어, 한글 음절 1-gram/2-gram
+    function searchTerms(text) {{
+        const terms = (text.match(/[a-z0-9_]+/g) || []).map(token => [token, true]);
+        for (const match of text.matchAll(/[가-힣]+/g)) {{
+            const run = match[0];
+            const end = match.index + run.length;
+            const bounded = match.index > 0 && /[a-z0-9_]/.test(text[match.index - 1]) && /[a-z0-9_]/.test(text[end] || '');
+            for (const n of [1, 2]) {{
+                for (let i = 0; i + n <= run.length; i++) terms.push([run.slice(i, i + n), bounded && n === run.length]);
+            }}
+        }}
+        return terms;
+    }}
+
+    // searchTerms(text).length (bm25_terms_length)
+    function termsLength(text) {{
+        return (text.match(/[a-z0-9_]+/g) || []).length
+            + (text.match(/[가-힣]+/g) || []).reduce((total, run) => total + 2 * run.length - 1, 0);
+    }}
+
+    const indexed = [];
+    rows.forEach((row, doc) => {{
+        if (row) indexed.push(doc);
+    }});
+    const texts = fields.map(([field]) => indexed.map(doc => rows[doc][field] ? String(rows[doc][field]).toLowerCase() : ''));
+    // 필드별 평균 길이 (검색어 수)
+    const averages = texts.map(values => values.reduce((total, text) => total + (text ? termsLength(text) : 0), 0) / indexed.length || 1);
+
+    const postings = new Map();
+    indexed.forEach((doc, i) => {{
+        fields.forEach(([, fieldFlag, boost], f) => {{
+            if (!texts[f][i]) return;
+            const terms = searchTerms(texts[f][i]);
+            const weight = boost / (1 - b + b * terms.length / averages[f]);
+            terms.forEach(([term, wholeWord]) => {{
+                const flags = fieldFlag | (wholeWord ? SEARCH_WHOLE_WORD : 0);
+                let posting = postings.get(term);
+                if (!posting) postings.set(term, posting = {{ docs: [], flags: [], tfs: [] }});
+                // 문서 순서로 채우므로 같은 문서는 마지막 항목에 합침
+                const last = posting.docs.length - 1;
+                if (last >= 0 && posting.docs[last] === doc) {{
+                    posting.flags[last] |= flags;
+                    posting.tfs[last] += weight;
+                }} else {{
+                    posting.docs.push(doc);
+                    posting.flags.push(flags);
+                    posting.tfs.push(weight);
+                }}
+            }});
+        }});
+    }});
+    return {{ docs: indexed.length, postings }};
+}}
+
+function createSearchEngine(searchIndex, rows) {{
+    // posting 플래그 (build_search_index의 POSTING_WHOLE_WORD), BM25 k1
+    const SEARCH_WHOLE_WORD = {POSTING_WHOLE_WORD};
+    const k1 = {BM25_K1};
+
+    const searchPostingsCache = new Map();
+
+    // 검색어의 posting을 문서 번호 -> [플래그, BM25 점수] Map으로 복원 (한 번만)
+    // 점수 = idf × tf(k1 + 1) / (k1 + tf), idf는 색인한 문서 수와 posting 길이로 계산
+    function searchPostings(term) {{
+        let postings = searchPostingsCache.get(term);
+        if (!postings) {{
+            postings = new Map();
+            const {{ docs, flags, tfs }} = searchIndex.postings.get(term);
+            const idf = Math.log(1 + (searchIndex.docs - docs.length + 0.5) / (docs.length + 0.5));
+            docs.forEach((doc, i) => postings.set(doc, [flags[i], idf * tfs[i] * (k1 + 1) / (k1 + tfs[i])]));
+            searchPostingsCache.set(term, postings);
+        }}
+        return postings;
+    }}
+
+    // 영어 단어를 포함하는 모든 토큰의 합집합
+    // (값: [같은 토큰이 완전한 단어로 있으면 true, 포함하는 토큰 중 가장 높은 점수])
+    function wordPostings(word) {{
+        const docs = new Map();
+        searchIndex.postings.forEach((_, term) => {{
+            if (!term.includes(word)) return;
+            const whole = term === word;
+            searchPostings(term).forEach(([flags, score], doc) => {{
+                const isWhole = whole && (flags & SEARCH_WHOLE_WORD) !== 0;
+                const match = docs.get(doc);
+                if (!match) docs.set(doc, [isWhole, score]);
+                else docs.set(doc, [match[0] || isWhole, Math.max(match[1], score)]);
+            }});
+        }});
+        return docs;
+    }}
+
+    // 한글 구간은 음절 2-gram(한 글자면 1-gram) posting의 교집합
+    // (값: [두 글자 이하 구간이 완전한 단어로 있으면 true, n-gram 점수 합])
+    function hangulPostings(run) {{
+        const grams = run.length === 1 ? [run] : Array.from({{ length: run.length - 1 }}, (_, i) => run.slice(i, i + 2));
+        let docs = null;
+        for (const gram of grams) {{
+            if (!searchIndex.postings.has(gram)) return new Map();
+            const postings = searchPostings(gram);
+            if (docs === null) {{
+                docs = new Map(Array.from(postings, ([doc, [flags, score]]) => [doc, [grams.length === 1 && (flags & SEARCH_WHOLE_WORD) !== 0, score]]));
+            }} else {{
+                for (const [doc, match] of docs) {{
+                    const posting = postings.get(doc);
+                    if (posting) match[1] += posting[1];
+                    else docs.delete(doc);
+                }}
+            }}
+        }}
+        return docs;
+    }}
+
+    // 원문 필드로 포함/완전 일치 판정: null(불일치), true(완전 일치), false(부분 일치)
+    function matchSearchContent(row, keyword, wordBoundaryRegex) {{
+        const fields = [row.titleEN, row.titleKR, row.contentEN, row.contentKR].map(value => value.toLowerCase());
+        if (!fields.some(field => field.includes(keyword))) return null;
+        return fields.some(field => wordBoundaryRegex.test(field));
+    }}
+
+    // 소문자 키워드를 포함하는 문서 번호 -> {{ 완전 일치 여부, BM25 점수 }} (문서 순서, rows가 null인 문서 제외)
+    // 점수는 색인의 단어/n-gram 점수 합이며, 색인할 수 있는 글자가 없는 키워드는 0
+    function searchContents(keyword) {{
+        const words = keyword.match(/[a-z0-9_]+/g) || [];
+        const runs = keyword.match(/[가-힣]+/g) || [];
+        const wordBoundaryRegex = new RegExp('\\\\b' + keyword.replace(/[.*+?^${{}}()|[\\]\\\\]/g, '\\\\$&') + '\\\\b', 'i');
+
+        // 색인할 수 있는 글자가 없으면 전체 문서를 원문으로 검사
+        let candidates = null;
+        if (words.length + runs.length > 0) {{
+            for (const part of [...words.map(wordPostings), ...runs.map(hangulPostings)]) {{
+                if (candidates === null) {{
+                    candidates = part;
+                }} else {{
+                    for (const [doc, match] of candidates) {{
+                        const other = part.get(doc);
+                        if (other) match[1] += other[1];
+                        else candidates.delete(doc);
+                    }}
+                }}
+                if (candidates.size === 0) break;
+            }}
+        }}
+
+        // 단어 하나이거나 두 글자 이하 한글이면 posting만으로 판정이 끝나고, 그 외에는 후보만 원문으로 확인
+        const resolved = candidates !== null && (
+            (words.length === 1 && words[0] === keyword) ||
+            (runs.length === 1 && runs[0] === keyword && keyword.length <= 2));
+        const docs = candidates !== null ? Array.from(candidates.keys()).sort((a, b) => a - b)
+                                         : rows.map((_, doc) => doc);
+        const matches = new Map();
+        docs.forEach(doc => {{
+            if (!rows[doc]) return;
+            const isExactMatch = resolved ? candidates.get(doc)[0]
+                                          : matchSearchContent(rows[doc], keyword, wordBoundaryRegex);
+            if (isExactMatch !== null) matches.set(doc, {{ isExactMatch, score: candidates !== null ? candidates.get(doc)[1] : 0 }});
+        }});
+        return matches;
+    }}
+
+    // 결과 카드에 표시할 강조된 필드
+    function snippet(row, keyword, isExactMatch) {{
+        if (!keyword) return {{ titleEN: row.titleEN, titleKR: row.titleKR, contentEN: row.contentEN, contentKR: row.contentKR }};
+        return {{
+            titleEN: highlightKeyword(row.titleEN, keyword, isExactMatch),
+            titleKR: highlightKeyword(row.titleKR, keyword, isExactMatch),
+            contentEN: highlightKeyword(row.contentEN, keyword, isExactMatch),
+            contentKR: highlightKeyword(row.contentKR, keyword, isExactMatch)
+        }};
+    }}
+
+    // 질의 결과 전체: 키워드가 있으면 완전 일치 → 부분 일치 순이며 각각 BM25 점수 높은 순(같으면 문서 순서),
+    // 없으면 코드 필터만 적용한 문서 순서
+    function query(keyword, modelCodeIds) {{
+        const codes = new Set(modelCodeIds);
+        const exact = [];
+        const partial = [];
+        const filtered = [];
+        if (keyword) {{
+            const scores = new Map();
+            searchContents(keyword).forEach(({{ isExactMatch, score }}, doc) => {{
+                if (!codes.has(rows[doc].codeId)) return;
+                scores.set(doc, score);
+                (isExactMatch ? exact : partial).push(doc);
+            }});
+            const byScore = (a, b) => scores.get(b) - scores.get(a) || a - b;
+            exact.sort(byScore);
+            partial.sort(byScore);
+        }} else {{
+            rows.forEach((row, doc) => {{
+                if (row && codes.has(row.codeId)) filtered.push(doc);
+            }});
+        }}
+        return {{
+            keyword, exactCount: exact.length, partialCount: partial.length, filteredCount: filtered.length,
+            docs: [...exact, ...partial, ...filtered]
+        }};
+    }}
+
+    // 결과의 offset부터 limit개를 결과 카드 항목으로 만듦
+    function items(result, offset, limit) {{
+        return result.docs.slice(offset, offset + limit).map((doc, i) => {{
+            const isExactMatch = offset + i < result.exactCount;
+            return {{ result: rows[doc], isExactMatch, snippet: snippet(rows[doc], result.keyword, isExactMatch) }};
+        }});
+    }}
+
+    return {{ query, items }};
+}}
+
+// Web Worker 진입점: init 메시지로 검색 결과 객체를 한 번 받아 색인(buildSearchIndex)을 만들고 질의에 답함
+// (샤드 출력이면 색인 전에 아직 가져오지 않은 본문 텍스트 샤드를 가져와 채움)
+// query → start(전체 개수) + 처음 limit개, page → 같은 질의 결과의 다음 구간
+// 각 구간은 batch 메시지 여러 개로 나눠 보내고 done으로 마침
+function searchWorkerMain(scope) {{
+    let ready = null;
+    let engine = null;
+    let latestId = 0;
+    let current = null;
+
+    function applyTextShard(rows, shard) {{
+        shard.rows.forEach((doc, i) => {{
+            const row = rows[doc];
+            if (!row) return;
+            row.titleEN = shard.fields.TitleEN[i] || '';
+            row.titleKR = shard.fields.TitleKR[i] || '';
+            row.contentEN = shard.fields.ContentEN[i] || '';
+            row.contentKR = shard.fields.ContentKR[i] || '';
+        }});
+    }}
+
+    function sendRange(id, result, offset, limit, batchSize) {{
+        const end = Math.min(result.docs.length, offset + limit);
+        for (let start = offset; start < end; start += batchSize) {{
+            scope.postMessage({{ id, type: 'batch', offset: start, items: engine.items(result, start, Math.min(batchSize, end - start)) }});
+        }}
+        scope.postMessage({{ id, type: 'done', offset: end }});
+    }}
+
+    scope.onmessage = event => {{
+        const message = event.data;
+        if (message.type === 'init') {{
+            ready = Promise.all(message.textShards.map(src => fetchTextShard(src).then(shard => applyTextShard(message.rows, shard))))
+                .catch(error => console.error('Failed to load content text shards:', error))
+                .then(() => {{ engine = createSearchEngine(buildSearchIndex(message.rows), message.rows); }});
+        }} else if (message.type === 'query') {{
+            // 평가 전에 더 새로운 질의가 도착하면 이 질의는 버림
+            latestId = message.id;
+            ready.then(() => setTimeout(() => {{
+                if (message.id !== latestId) return;
+                const result = engine.query(message.keyword, message.modelCodeIds);
+                current = {{ id: message.id, result }};
+                scope.postMessage({{
+                    id: message.id, type: 'start', exactCount: result.exactCount,
+                    partialCount: result.partialCount, filteredCount: result.filteredCount
+                }});
+                sendRange(message.id, result, 0, message.limit, message.batchSize);
+            }}));
+        }} else if (message.type === 'page') {{
+            if (current && current.id === message.id) {{
+                sendRange(message.id, current.result, message.offset, message.limit, message.batchSize);
+            }}
+        }} else if (message.type === 'cancel') {{
+            latestId = message.id;
+            current = null;
+        }}
+    }};
+}}
+
+const SEARCH_BATCH_SIZE = 50;
+const SEARCH_PAGE_SIZE = 20;
+const SEARCH_DEBOUNCE_MS = 200;
+let searchWorker = null;
+let searchQueryId = 0;
+let searchHandler = null;
+
+// 워커에 한 번 보내는 검색 결과 객체 (검색/고급 검색 결과 카드와 모달에서 사용)
+function buildSearchRows() {{
+    return appData.CodeContent.map(content => {{
+        const modelCode = getModelCode(content.ModelCodeID);
+        const version = getModelCodeVersion(content.ModelCodeVersionID);
+        const chapter = getChapter(content.ChapterID);
+        if (!(modelCode && version && chapter)) return null;
+
+        return {{
+            code: codeCatalog.codes[content.ModelCodeID],
+            year: codeCatalog.years[content.ModelCodeVersionID],
+            chapter: chapter.Chapter,
+            chapterTitle: chapter.TitleEN || '',
+            section: content.Section || 'General',
+            subsection: content.Subsection || '',
+            titleEN: content.TitleEN || '',
+            titleKR: content.TitleKR || '',
+            contentEN: content.ContentEN || '',
+            contentKR: content.ContentKR || '',
+            codeId: content.ModelCodeID,
+            versionId: content.ModelCodeVersionID,
+            chapterId: content.ChapterID
+        }};
+    }});
+}}
+
+function getSearchWorker() {{
+    if (searchWorker) return searchWorker;
+    try {{
+        const source = [highlightKeyword, fetchTextShard, buildSearchIndex, createSearchEngine, searchWorkerMain].join('\\n\\n') + '\\nsearchWorkerMain(self);';
+        searchWorker = new Worker(URL.createObjectURL(new Blob([source], {{ type: 'text/javascript' }})));
+    }} catch (error) {{
+        // Worker를 만들 수 없는 환경에서는 같은 엔진을 메인 스레드에서 비동기로 실행
+        const port = {{ postMessage: data => setTimeout(() => searchWorker.onmessage({{ data }})) }};
+        searchWorker = {{ postMessage: data => setTimeout(() => port.onmessage({{ data }})) }};
+        searchWorkerMain(port);
+    }}
+    // 가장 최근 질의의 응답만 처리
+    searchWorker.onmessage = event => {{
+        if (searchHandler && event.data.id === searchQueryId) searchHandler(event.data);
+    }};
+    // 아직 가져오지 않은 본문 텍스트 샤드는 워커가 가져옴 (Blob 워커에서도 열리도록 절대 URL)
+    const textShards = Array.from(contentTextShards.values(), src => new URL(src, document.baseURI).href);
+    searchWorker.postMessage({{ type: 'init', rows: buildSearchRows(), textShards }});
+    return searchWorker;
+}}
+
+// 워커에 질의를 보내고 handler로 start/batch/done 메시지를 받음 (처음 limit개까지)
+function runSearch(keyword, modelCodeIds, limit, handler) {{
+    const worker = getSearchWorker();
+    searchQueryId += 1;
+    searchHandler = handler;
+    worker.postMessage({{
+        type: 'query', id: searchQueryId, keyword, limit,
+        modelCodeIds: Array.from(modelCodeIds), batchSize: SEARCH_BATCH_SIZE
+    }});
+}}
+
+// 현재 질의 결과의 offset부터 limit개를 더 요청 (같은 handler가 받음)
+function requestSearchPage(offset, limit) {{
+    getSearchWorker().postMessage({{ type: 'page', id: searchQueryId, offset, limit, batchSize: SEARCH_BATCH_SIZE }});
+}}
+
+// 진행 중인 질의를 취소하고 이후 응답을 버림
+function cancelSearch() {{
+    if (!searchWorker) return;
+    searchQueryId += 1;
+    searchHandler = null;
+    searchWorker.postMessage({{ type: 'cancel', id: searchQueryId }});
+}}
+
+let topSearchTimer = null;
+let topSearchState = null;
+let topSearchObserver = null;
+
+// 입력 중 검색: 마지막 입력 후 SEARCH_DEBOUNCE_MS가 지나면 검색 (입력값은 유지)
+function scheduleTopSearch() {{
+    clearTimeout(topSearchTimer);
+    topSearchTimer = setTimeout(() => performTopSearch(false), SEARCH_DEBOUNCE_MS);
 }}
 
 // Search function for top search bar
-function performTopSearch() {{
+function performTopSearch(clearInput = true) {{
+    clearTimeout(topSearchTimer);
     const query = document.getElementById('topSearchInput').value.trim();
-    if (!query) return;
+    if (!query) {{
+        cancelSearch();
+        return;
+    }}
 
     // Switch to search results section (not advanced search)
     document.querySelectorAll('.section-content').forEach(s => s.classList.remove('active'));
@@ -1279,69 +4206,41 @@ function performTopSearch() {{
     // Update sidebar
     document.querySelectorAll('.sidebar-item').forEach(item => item.classList.remove('active'));
 
-    // Perform search across all codes with the keyword
+    // Perform search across all codes with the keyword (검색 워커에서 실행)
     const modelCodeIds = new Set(['MC001', 'MC007', 'MC008', 'MC009']);
-    const exactMatches = [];
-    const partialMatches = [];
     const keyword = query.toLowerCase();
 
-    appData.CodeContent.forEach(content => {{
-        if (!modelCodeIds.has(content.ModelCodeID)) return;
-
-        const titleEN = (content.TitleEN || '').toLowerCase();
-        const titleKR = (content.TitleKR || '').toLowerCase();
-        const contentEN = (content.ContentEN || '').toLowerCase();
-        const contentKR = (content.ContentKR || '').toLowerCase();
-
-        // Check if any field contains the keyword
-        if (titleEN.includes(keyword) || titleKR.includes(keyword) ||
-            contentEN.includes(keyword) || contentKR.includes(keyword)) {{
-
-            // Get code info
-            const modelCode = appData.ModelCode.find(mc => mc.ModelCodeID === content.ModelCodeID);
-            const version = appData.ModelCodeVersion.find(v => v.ModelCodeVersionID === content.ModelCodeVersionID);
-            const chapter = appData.CodeChapter.find(ch => ch.ChapterID === content.ChapterID);
-
-            if (modelCode && version && chapter) {{
-                const result = {{
-                    code: modelCode.ModelCodeName.split(':')[0].trim(),
-                    year: version.Year ? Math.floor(version.Year) : '',
-                    chapter: chapter.Chapter,
-                    chapterTitle: chapter.TitleEN || '',
-                    section: content.Section || 'General',
-                    subsection: content.Subsection || '',
-                    titleEN: content.TitleEN || '',
-                    titleKR: content.TitleKR || '',
-                    contentEN: content.ContentEN || '',
-                    contentKR: content.ContentKR || '',
-                    codeId: content.ModelCodeID,
-                    versionId: content.ModelCodeVersionID,
-                    chapterId: content.ChapterID
-                }};
-
-                // Check for exact match
-                const wordBoundaryRegex = new RegExp('\\\\b' + keyword.replace(/[.*+?^${{}}()|[\\]\\\\]/g, '\\\\$&') + '\\\\b', 'i');
-                const isExactMatch = wordBoundaryRegex.test(titleEN) || wordBoundaryRegex.test(titleKR) ||
-                                   wordBoundaryRegex.test(contentEN) || wordBoundaryRegex.test(contentKR);
-
-                if (isExactMatch) {{
-                    exactMatches.push(result);
-                }} else {{
-                    partialMatches.push(result);
-                }}
-            }}
-        }}
-    }});
-
-    // Display results in search results section
-    displayTopSearchResults(exactMatches, partialMatches, keyword);
+    // Display the first page in search results section; later pages load on scroll
+    runSearch(keyword, modelCodeIds, SEARCH_PAGE_SIZE, message => displayTopSearchResults(message, keyword));
 
     // Clear the top search input
-    document.getElementById('topSearchInput').value = '';
+    if (clearInput) document.getElementById('topSearchInput').value = '';
+}}
+
+// 결과 목록 끝의 sentinel이 보이면 다음 페이지를 요청
+function loadMoreTopSearchResults() {{
+    const state = topSearchState;
+    if (!state || state.loading || state.loaded >= state.total) return;
+    state.loading = true;
+    requestSearchPage(state.loaded, SEARCH_PAGE_SIZE);
+}}
+
+function observeTopSearchSentinel(sentinel) {{
+    if (!('IntersectionObserver' in window)) return;
+    if (!topSearchObserver) {{
+        topSearchObserver = new IntersectionObserver(entries => {{
+            if (entries.some(entry => entry.isIntersecting)) loadMoreTopSearchResults();
+        }});
+    }}
+    // 다시 관찰하면 현재 교차 상태가 바로 전달되어, 화면을 채울 때까지 이어서 로드됨
+    topSearchObserver.unobserve(sentinel);
+    topSearchObserver.observe(sentinel);
 }}
 
 // Display top search results with detailed preview (5 lines)
-function displayTopSearchResults(exactMatches, partialMatches, keyword) {{
+// message: 검색 워커의 start(전체 개수) / batch(결과 일부) / done(요청한 구간 끝) 메시지
+// 결과 목록과 sentinel은 질의가 바뀌어도 같은 컨테이너를 재사용
+function displayTopSearchResults(message, keyword) {{
     const searchResultsSection = document.getElementById('searchResultsSection');
     if (!searchResultsSection) return;
 
@@ -1362,34 +4261,44 @@ function displayTopSearchResults(exactMatches, partialMatches, keyword) {{
         resultsContainer = searchResultsSection.querySelector('.search-results-container');
     }}
 
-    // Update keyword display
-    const keywordDisplay = searchResultsSection.querySelector('#topSearchKeyword');
-    if (keywordDisplay) {{
-        keywordDisplay.textContent = `"${{keyword}}" 검색 결과 ${{exactMatches.length + partialMatches.length}}개`;
-    }}
+    let list = resultsContainer.querySelector('.space-y-6');
+    let sentinel = resultsContainer.querySelector('.search-results-sentinel');
 
-    const allResults = [...exactMatches, ...partialMatches];
+    if (message.type === 'start') {{
+        const total = message.exactCount + message.partialCount;
+        topSearchState = {{ total, loaded: 0, loading: true }};
+
+        // Update keyword display (전체 결과 개수)
+        const keywordDisplay = searchResultsSection.querySelector('#topSearchKeyword');
+        if (keywordDisplay) {{
+            keywordDisplay.textContent = `"${{keyword}}" 검색 결과 ${{total}}개`;
+        }}
 
-    if (allResults.length === 0) {{
-        resultsContainer.innerHTML = '<p class="text-gray-500 text-center py-8">검색 결과가 없습니다</p>';
+        if (total === 0) {{
+            resultsContainer.innerHTML = '<p class="text-gray-500 text-center py-8">검색 결과가 없습니다</p>';
+        }} else if (list && sentinel) {{
+            list.replaceChildren();
+        }} else {{
+            resultsContainer.innerHTML = '<div class="space-y-6"></div><div class="search-results-sentinel h-1"></div>';
+        }}
         return;
     }}
+    if (message.type === 'done') {{
+        if (topSearchState) {{
+            topSearchState.loading = false;
+            if (sentinel && topSearchState.loaded < topSearchState.total) observeTopSearchSentinel(sentinel);
+        }}
+        return;
+    }}
+    if (message.type !== 'batch' || !list) return;
+    if (topSearchState) topSearchState.loaded = message.offset + message.items.length;
 
-    let html = '<div class="space-y-6">';
-
-    allResults.forEach((result, index) => {{
+    const html = message.items.map(({{ result, isExactMatch, snippet }}) => {{
         // Fix "Section General" to just "General"
         const sectionNum = result.section === 'General' ? 'General' : result.section + (result.subsection ? '.' + result.subsection : '');
-        const isExactMatch = index < exactMatches.length;
-
-        // Highlight keyword
-        const highlightedTitleEN = highlightKeyword(result.titleEN, keyword, isExactMatch);
-        const highlightedTitleKR = highlightKeyword(result.titleKR, keyword, isExactMatch);
-        const highlightedContentEN = highlightKeyword(result.contentEN, keyword, isExactMatch);
-        const highlightedContentKR = highlightKeyword(result.contentKR, keyword, isExactMatch);
 
         // Use reference.txt design with bg-gray-50 and location header
-        html += `
+        return `
             <div class="bg-gray-50 p-4 rounded-lg relative search-result-item"
                  data-result='${{JSON.stringify(result).replace(/'/g, "\\'")}}'
                  onmousedown="handleResultMouseDown(event)"
@@ -1408,18 +4317,16 @@ function displayTopSearchResults(exactMatches, partialMatches, keyword) {{
                     <span class="text-xs bg-[#F8E9A1] text-[#24305E] px-2 py-0.5 rounded">건축</span>
                 </div>
                 <div class="flex items-center gap-2 mb-2">
-                    <h4 class="font-semibold text-[#24305E] text-sm">${{sectionNum}}${{result.titleEN ? ' ' + highlightedTitleEN : ''}}</h4>
+                    <h4 class="font-semibold text-[#24305E] text-sm">${{sectionNum}}${{result.titleEN ? ' ' + snippet.titleEN : ''}}</h4>
                 </div>
-                ${{result.titleKR ? `<p class="text-gray-600 text-sm leading-relaxed mb-1 line-clamp-1">${{highlightedTitleKR}}</p>` : ''}}
-                ${{result.contentEN ? `<p class="text-gray-700 text-xs leading-relaxed mb-1 line-clamp-2">${{highlightedContentEN}}</p>` : ''}}
-                ${{result.contentKR ? `<p class="text-gray-600 text-xs leading-relaxed mb-2 line-clamp-2">${{highlightedContentKR}}</p>` : ''}}
+                ${{result.titleKR ? `<p class="text-gray-600 text-sm leading-relaxed mb-1 line-clamp-1">${{snippet.titleKR}}</p>` : ''}}
+                ${{result.contentEN ? `<p class="text-gray-700 text-xs leading-relaxed mb-1 line-clamp-2">${{snippet.contentEN}}</p>` : ''}}
+                ${{result.contentKR ? `<p class="text-gray-600 text-xs leading-relaxed mb-2 line-clamp-2">${{snippet.contentKR}}</p>` : ''}}
             </div>
         `;
-    }});
+    }}).join('');
 
-    html += '</div>';
-
-    resultsContainer.innerHTML = html;
+    list.insertAdjacentHTML('beforeend', html);
 }}
 
 function performSearch() {{
@@ -1440,7 +4347,6 @@ function performSearch() {{
     console.log('Fire categories:', selectedFireCategories);
 
     // Filter by selected codes
-    let searchResults = [];
     let modelCodeIds = new Set();
 
     // Add codes based on selected categories
@@ -1462,67 +4368,23 @@ function performSearch() {{
         modelCodeIds = new Set(['MC001', 'MC007', 'MC008', 'MC009']);
     }}
 
-    // Search in CodeContent - separate exact and partial matches
+    // Search in the worker - separate exact and partial matches
     const exactMatches = [];
     const partialMatches = [];
     const allFilteredResults = [];
 
-    appData.CodeContent.forEach(content => {{
-        if (!modelCodeIds.has(content.ModelCodeID)) return;
-
-        // Get code info first
-        const modelCode = appData.ModelCode.find(mc => mc.ModelCodeID === content.ModelCodeID);
-        const version = appData.ModelCodeVersion.find(v => v.ModelCodeVersionID === content.ModelCodeVersionID);
-        const chapter = appData.CodeChapter.find(ch => ch.ChapterID === content.ChapterID);
-
-        if (modelCode && version && chapter) {{
-            const result = {{
-                code: modelCode.ModelCodeName.split(':')[0].trim(),
-                year: version.Year ? Math.floor(version.Year) : '',
-                chapter: chapter.Chapter,
-                chapterTitle: chapter.TitleEN || '',
-                section: content.Section || 'General',
-                subsection: content.Subsection || '',
-                titleEN: content.TitleEN || '',
-                titleKR: content.TitleKR || '',
-                contentEN: content.ContentEN || '',
-                contentKR: content.ContentKR || '',
-                codeId: content.ModelCodeID,
-                versionId: content.ModelCodeVersionID,
-                chapterId: content.ChapterID
-            }};
-
-            // If keyword is provided, filter by keyword
-            if (keyword) {{
-                const titleEN = (content.TitleEN || '').toLowerCase();
-                const titleKR = (content.TitleKR || '').toLowerCase();
-                const contentEN = (content.ContentEN || '').toLowerCase();
-                const contentKR = (content.ContentKR || '').toLowerCase();
-
-                // Check if any field contains the keyword
-                if (titleEN.includes(keyword) || titleKR.includes(keyword) ||
-                    contentEN.includes(keyword) || contentKR.includes(keyword)) {{
-
-                    // Check for exact match (keyword as whole word)
-                    const wordBoundaryRegex = new RegExp('\\\\b' + keyword.replace(/[.*+?^${{}}()|[\\]\\\\]/g, '\\\\$&') + '\\\\b', 'i');
-                    const isExactMatch = wordBoundaryRegex.test(titleEN) || wordBoundaryRegex.test(titleKR) ||
-                                       wordBoundaryRegex.test(contentEN) || wordBoundaryRegex.test(contentKR);
-
-                    if (isExactMatch) {{
-                        exactMatches.push(result);
-                    }} else {{
-                        partialMatches.push(result);
-                    }}
-                }}
-            }} else {{
-                // No keyword - just filter by category
-                allFilteredResults.push(result);
-            }}
+    runSearch(keyword, modelCodeIds, Infinity, message => {{
+        if (message.type === 'batch') {{
+            message.items.forEach(({{ result, isExactMatch }}) => {{
+                if (!keyword) allFilteredResults.push(result);
+                else if (isExactMatch) exactMatches.push(result);
+                else partialMatches.push(result);
+            }});
+        }} else if (message.type === 'done') {{
+            // Display results with exact matches first
+            displaySearchResults(exactMatches, partialMatches, allFilteredResults, keyword);
         }}
     }});
-
-    // Display results with exact matches first
-    displaySearchResults(exactMatches, partialMatches, allFilteredResults, keyword);
 }}
 
 // Helper function to highlight keyword in text - with different colors for exact vs partial
@@ -1761,26 +4623,27 @@ function navigateToLibraryFromModal() {{
         closeSearchResultModal();
 
         // Switch to library and load the code
-        switchToLibraryCode(result.codeId, result.versionId);
-
-        // Scroll to the section after a short delay
-        setTimeout(() => {{
-            scrollToSection(result.chapterId, result.section);
-        }}, 500);
+        switchToLibraryCode(result.codeId, result.versionId).then(() => {{
+            // Scroll to the section after a short delay
+            setTimeout(() => {{
+                scrollToSection(result.chapterId, result.section);
+            }}, 500);
+        }});
     }}
 }}
 
 function openSearchResult(codeId, versionId, chapterId, section) {{
     // Switch to library and load the code
-    switchToLibraryCode(codeId, versionId);
-
-    // Scroll to the section after a short delay
-    setTimeout(() => {{
-        scrollToSection(chapterId, section);
-    }}, 500);
+    switchToLibraryCode(codeId, versionId).then(() => {{
+        // Scroll to the section after a short delay
+        setTimeout(() => {{
+            scrollToSection(chapterId, section);
+        }}, 500);
+    }});
 }}
 
 function clearSearchInput() {{
+    clearTimeout(topSearchTimer);
     document.getElementById('topSearchInput').value = '';
 }}
 
@@ -1938,46 +4801,608 @@ document.addEventListener('DOMContentLoaded', function() {{
         topSearchInput.addEventListener('keypress', function(e) {{
             if (e.key === 'Enter') performTopSearch();
         }});
+        // 입력 중 검색 (debounce)
+        topSearchInput.addEventListener('input', scheduleTopSearch);
     }}
 }});
     '''
 
-    # script를 body 끝에 추가
-    body_tag = soup.find('body')
-    if body_tag:
-        body_tag.append(script_tag)
+def parse_args(argv=None):
+    """명령행 인자를 파싱합니다."""
+    parser = argparse.ArgumentParser(description="US Code Navigator - Schema-based HTML Generator")
+    parser.add_argument('--render-mode', choices=['splice', 'soup'], default='splice',
+                        help="splice: 템플릿 조각 이어붙이기 (기본값), soup: BeautifulSoup DOM 삽입")
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help="코드/챕터 콘텐츠를 N개 프로세스로 병렬 렌더링 (기본값: 1)")
+    parser.add_argument('--shards', action='store_true',
+                        help=f"첫 번째 코드만 인라인하고 나머지 코드의 챕터 리스트/본문 HTML과 CodeContent 본문 텍스트는 "
+                             f"{SHARD_DIR.name}/ 샤드로 분리 (코드를 열 때, 텍스트는 첫 검색 때도 가져옴, HTTP로 서빙 필요)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f"챕터 렌더 캐시({CACHE_DIR.name}/)를 사용하지 않음")
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help=f"데이터 스냅샷({SNAPSHOT_FILE.name})을 사용하지 않고 항상 JSON에서 로드")
+    parser.add_argument('--stream', action='store_true',
+                        help="JSON 배열을 레코드 단위로 읽어 바로 인덱싱 (대용량 데이터의 최대 메모리 절감)")
+    parser.add_argument('--storage', choices=STORAGE_BACKENDS, default='dict',
+                        help="dict: JSON 레코드 그대로 저장 (기본값), compact: 열 배치를 공유하는 CompactRecord로 저장, "
+                             f"sqlite: {SQLITE_FILE.name} 데이터베이스에서 SQL로 조회 (소스가 그대로면 빌드 간 재사용)")
+    parser.add_argument('--benchmark-storage', action='store_true',
+                        help="10만/100만 합성 CodeContent 행으로 dict/compact 저장 방식의 메모리를 비교하고 종료")
+    parser.add_argument('--watch', action='store_true',
+                        help="데이터를 메모리에 둔 채 JSON 파일/reference.txt가 바뀔 때마다 바뀐 행과 챕터만 반영해 다시 빌드")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"cProfile과 tracemalloc으로 빌드를 프로파일링해 {REPORT_FILE.name}에 함께 기록 "
+                             f"(통계 파일: {REPORT_FILE.with_suffix('.prof').name})")
+    parser.add_argument('--benchmark-build', nargs='*', type=int, metavar='SCALE',
+                        help=f"합성 데이터(기본 1/10/100배)로 빌드 단계별 시간/메모리/출력 크기를 측정해 {BENCHMARK_FILE.name}에 추가하고 종료")
+    parser.add_argument('--benchmark-startup', action='store_true',
+                        help="1배/50배 데이터로 JSON 로드와 스냅샷 로드 시간을 비교하고 종료")
+    parser.add_argument('--content-source', choices=['data', 'dom'], default='data',
+                        help="data: 검색용 본문을 appData에 포함 (기본값), dom: 미리 렌더링된 본문 DOM에서 읽음")
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    serve_parser = subparsers.add_parser(
+        'serve', help="데이터를 한 번 로드하고 셸 페이지와 코드/챕터 조각, 검색 결과를 로컬 HTTP 서버로 제공")
+    serve_parser.add_argument('--host', default=SERVE_HOST, help=f"바인딩할 주소 (기본값: {SERVE_HOST})")
+    serve_parser.add_argument('--port', type=int, default=SERVE_PORT, help=f"포트 (기본값: {SERVE_PORT}, 0이면 임의 포트)")
+    serve_parser.add_argument('--cache-size', type=int, default=SERVE_CACHE_SIZE, metavar='N',
+                              help=f"응답 LRU 캐시 항목 수 (기본값: {SERVE_CACHE_SIZE})")
+    serve_parser.add_argument('--quiet', action='store_true', help="요청 로그를 출력하지 않음")
+    search_parser = subparsers.add_parser(
+        'search', help=f"BM25 순위로 CodeContent를 검색 (색인은 {SEARCH_INDEX_FILE.name}에 저장해 재사용)")
+    search_parser.add_argument('query', nargs='+', help="검색어 (영어 단어, 한국어)")
+    search_parser.add_argument('--limit', '-n', type=int, default=SEARCH_RESULT_LIMIT, metavar='N',
+                               help=f"출력할 결과 수 (기본값: {SEARCH_RESULT_LIMIT})")
+    search_parser.add_argument('--codes', metavar='ID,...', help="쉼표로 구분한 ModelCodeID로 결과를 제한")
+    search_parser.add_argument('--json', action='store_true', help="결과를 JSON으로 출력")
+    search_parser.add_argument('--rebuild', action='store_true', help="저장된 색인을 무시하고 다시 만듦")
+    args = parser.parse_args(argv)
+    if args.shards and args.render_mode != 'splice':
+        parser.error("--shards requires --render-mode splice")
+    if args.shards and args.content_source == 'dom':
+        parser.error("--shards cannot be combined with --content-source dom")
+    if args.watch and args.storage == 'sqlite':
+        parser.error("--watch requires in-memory storage (--storage dict or compact)")
+    if args.watch and args.profile:
+        parser.error("--watch cannot be combined with --profile")
+    if args.command == 'serve':
+        if args.storage == 'sqlite':
+            parser.error("serve requires in-memory storage (--storage dict or compact)")
+        if args.watch or args.profile:
+            parser.error("serve cannot be combined with --watch or --profile")
+        if args.cache_size < 1:
+            parser.error("--cache-size must be at least 1")
+    if args.command == 'search' and args.limit < 1:
+        parser.error("--limit must be at least 1")
+    return args
+
+def build_output(args, hierarchy, cache):
+    """hierarchy로 HTML을 생성해 OUTPUT_FILE에 씁니다 (임시 파일에 쓴 뒤 교체). 출력 바이트 수를 반환합니다."""
+    print("\nGenerating HTML...")
+    with metrics.phase('generate_html'):
+        final_html = generate_html(hierarchy, render_mode=args.render_mode, jobs=args.jobs, cache=cache,
+                                   shard_dir=SHARD_DIR if args.shards else None,
+                                   content_source=args.content_source)
+    if cache is not None:
+        removed = cache.prune()
+        if removed:
+            print(f"✓ Removed {removed} stale render cache entries")
 
-    return str(soup)
+    # HTML 파일 저장
+    print(f"\nWriting HTML to {OUTPUT_FILE}...")
+    with metrics.phase('write'):
+        output = final_html.encode('utf-8')
+        tmp_path = OUTPUT_FILE.with_name(OUTPUT_FILE.name + '.tmp')
+        tmp_path.write_bytes(output)
+        tmp_path.replace(OUTPUT_FILE)
+    metrics.count('output_bytes', len(output))
+    return len(output)
+
+def run_build(args):
+    """데이터를 로드하고 HTML을 생성해 OUTPUT_FILE에 씁니다. 출력 바이트 수를 반환합니다."""
+    # 스키마/JSON 데이터 로드와 데이터 계층 구조 생성 (바뀌지 않았으면 스냅샷 사용)
+    with metrics.phase('load'):
+        hierarchy = load_hierarchy(snapshot=None if args.no_snapshot else DataSnapshot(SNAPSHOT_FILE),
+                                   stream=args.stream, storage=args.storage)
+    cache = None if args.no_cache else RenderCache(CACHE_DIR)
+    output_size = build_output(args, hierarchy, cache)
+    if args.profile:
+        # 압축 전 크기 비교용 (전체 데이터를 한 번 더 직렬화하므로 --profile에서만)
+        with metrics.phase('app_data_full_size'):
+            full_size = len(json.dumps(hierarchy.data, ensure_ascii=False, indent=2,
+                                       default=record_json_default).encode('utf-8'))
+        metrics.count('app_data_full_bytes', full_size)
+        packed_size = metrics.counters['app_data_bytes']
+        print(f"✓ appData payload: {full_size:,} bytes (indented JSON) → {packed_size:,} bytes "
+              f"({100 * packed_size / full_size:.0f}%)")
+    return output_size
+
+class SourcePoller:
+    """JSON 소스 파일과 reference.txt의 (크기, mtime)을 기억해 바뀐 파일을 찾습니다 (--watch, serve)"""
+
+    def __init__(self):
+        self.paths = {key: BASE_DIR / filename for key, filename in JSON_FILES.items()}
+        self.signatures = {key: self._signature(path) for key, path in self.paths.items()}
+        self.reference_signature = self._signature(REFERENCE_FILE)
+
+    @staticmethod
+    def _signature(path):
+        stat = path.stat()
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def poll(self):
+        """바뀐 테이블의 새 레코드 {테이블 이름: 레코드 리스트}와 reference.txt 변경 여부를 반환합니다."""
+        try:
+            current = {key: self._signature(path) for key, path in self.paths.items()}
+            reference_signature = self._signature(REFERENCE_FILE)
+        except FileNotFoundError:
+            # 편집기가 파일을 교체하는 중이면 다음 확인 때 다시 봄
+            return {}, False
+
+        tables = {}
+        for key, signature in current.items():
+            if signature == self.signatures[key]:
+                continue
+            # 읽지 못한 파일도 서명을 기록해, 다시 저장될 때까지 경고를 반복하지 않음
+            self.signatures[key] = signature
+            try:
+                with open(self.paths[key], 'r', encoding='utf-8') as f:
+                    tables[key] = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠ Skipping {self.paths[key].name}: {e}")
+        reference_changed = reference_signature != self.reference_signature
+        self.reference_signature = reference_signature
+        return tables, reference_changed
+
+    def apply(self, hierarchy):
+        """바뀐 테이블의 행을 hierarchy에 반영하고 변경 요약 리스트를 반환합니다 (바뀐 것이 없으면 빈 리스트).
+
+        reference.txt가 바뀌었으면 다음 빌드에서 템플릿을 다시 파싱하게 합니다.
+        """
+        tables, reference_changed = self.poll()
+        summary = []
+        for key, records in tables.items():
+            with metrics.phase('update_table'):
+                changes = hierarchy.update_table(key, records)
+            if changes:
+                added = sum(1 for previous, _ in changes if previous is None)
+                removed = sum(1 for _, record in changes if record is None)
+                summary.append(f"{key} +{added} ~{len(changes) - added - removed} -{removed}")
+        if reference_changed:
+            _page_templates.clear()
+            summary.append(REFERENCE_FILE.name)
+        return summary
+
+def watch(args, interval=WATCH_INTERVAL):
+    """JSON 파일과 reference.txt를 주기적으로 확인해 바뀔 때마다 다시 빌드합니다 (Ctrl+C로 종료).
+
+    hierarchy와 파싱된 템플릿은 메모리에 유지합니다. 바뀐 테이블은 PK로 비교해 바뀐 행만
+    인덱스에 반영하고, 챕터 본문은 메모리 렌더 캐시로 입력이 바뀐 챕터만 다시 렌더링합니다.
+    """
+    poller = SourcePoller()
+    with metrics.phase('load'):
+        hierarchy = load_hierarchy(snapshot=None if args.no_snapshot else DataSnapshot(SNAPSHOT_FILE),
+                                   storage=args.storage)
+    cache = None if args.no_cache else MemoryRenderCache()
+    build_output(args, hierarchy, cache)
+    write_build_report(REPORT_FILE, args)
+    print(f"\nWatching {len(poller.paths)} JSON files and {REFERENCE_FILE.name} for changes (Ctrl+C to stop)...")
+
+    try:
+        while True:
+            time.sleep(interval)
+            start = time.perf_counter()
+            metrics.reset()
+            summary = poller.apply(hierarchy)
+            if not summary:
+                continue
 
-def main():
-    """메인 실행 함수"""
-    print("=" * 70)
-    print("US Code Navigator - Schema-based HTML Generator")
-    print("=" * 70)
+            if cache is not None:
+                cache.reset_stats()
+            with contextlib.redirect_stdout(io.StringIO()):
+                build_output(args, hierarchy, cache)
+            elapsed = time.perf_counter() - start
+            write_build_report(REPORT_FILE, args)
+            rendered = f", {cache.misses} chapter(s) re-rendered" if cache is not None else ''
+            print(f"[{time.strftime('%H:%M:%S')}] {', '.join(summary)}{rendered} → "
+                  f"{OUTPUT_FILE.name} rebuilt in {elapsed * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+class LruCache:
+    """최근에 쓰인 항목을 maxsize개까지 보관하는 스레드 안전 캐시 (serve 응답)"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """캐시된 값을 반환합니다. 없으면 KeyError."""
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                self.misses += 1
+                raise
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """값을 저장하고, maxsize를 넘으면 가장 오래 쓰이지 않은 항목을 버립니다."""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+def serve_fragment_url(code_id, part):
+    """serve 모드에서 코드의 챕터 리스트/본문 조각(part='text'이면 본문 텍스트 샤드)을 가져오는 URL"""
+    return f"/fragments/{quote(str(code_id), safe='')}-{part}.{'json' if part == 'text' else 'html'}"
+
+class LibraryService:
+    """serve 모드의 응답을 만듭니다.
+
+    DataHierarchy는 한 번만 로드하고, 셸 페이지·코드/챕터 조각·검색 결과는 요청 시 기존
+    렌더링 함수로 만들어 (데이터 버전, 경로, 쿼리) 키의 LRU 캐시에 둡니다. 소스 파일이 바뀌면
+    바뀐 행만 반영하고 데이터 버전을 올립니다. 렌더링과 반영은 한 번에 하나씩 실행합니다.
+    """
+
+    def __init__(self, hierarchy, poller=None, cache_size=SERVE_CACHE_SIZE):
+        self.hierarchy = hierarchy
+        self.poller = poller
+        self.cache = LruCache(cache_size)
+        self.version = 0
+        self._lock = threading.RLock()
+        self._last_poll = time.monotonic()
+        self._reset_views()
+
+    def _reset_views(self):
+        """데이터 버전마다 한 번 만드는 linker, 코드 목록, 검색 행과 점수 계산기를 버립니다."""
+        self._linker = None
+        self._codes = None
+        self._rows = None
+        self._scorer = None
+
+    def refresh(self):
+        """마지막 확인 후 WATCH_INTERVAL이 지났으면 소스 파일을 확인해 바뀐 행을 반영합니다."""
+        if self.poller is None or time.monotonic() - self._last_poll < WATCH_INTERVAL:
+            return
+        with self._lock:
+            if time.monotonic() - self._last_poll < WATCH_INTERVAL:
+                return
+            summary = self.poller.apply(self.hierarchy)
+            self._last_poll = time.monotonic()
+            if summary:
+                self.version += 1
+                self._reset_views()
+                print(f"[{time.strftime('%H:%M:%S')}] {', '.join(summary)} → data version {self.version}")
+
+    def get(self, target):
+        """요청 대상(경로 + 쿼리)의 (본문, Content-Type, ETag, 캐시 적중 여부)를 반환합니다.
+
+        없는 경로/코드/챕터는 LookupError, 잘못된 쿼리 값은 ValueError를 냅니다.
+        """
+        self.refresh()
+        url = urlsplit(target)
+        key = (self.version, url.path, url.query)
+        try:
+            return self.cache.get(key) + (True,)
+        except KeyError:
+            pass
+        with self._lock:
+            # 기다리는 동안 다른 요청이 같은 응답을 만들었을 수 있음
+            if key not in self.cache:
+                body, content_type = self._render(unquote(url.path), parse_qs(url.query))
+                etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+                self.cache.put(key, (body, content_type, etag))
+            return self.cache.get(key) + (False,)
+
+    def _render(self, path, query):
+        """경로별 응답 본문과 Content-Type을 만듭니다."""
+        if path in ('/', '/index.html'):
+            with contextlib.redirect_stdout(io.StringIO()):
+                page = generate_html(self.hierarchy, shard_url=serve_fragment_url)
+            return page.encode('utf-8'), 'text/html; charset=utf-8'
+
+        if path == '/search':
+            return json.dumps(self._search(query), ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8'
+
+        match = SERVE_FRAGMENT_RE.fullmatch(path)
+        if match:
+            model_code, latest_version, chapter_list = self._code_entry(match['code_id'])
+            if match['part'] == 'chapters':
+                items, element_filter = render_chapter_groups(self.hierarchy, chapter_list), CHAPTER_GROUP_FILTER
+            else:
+                items, = render_all_chapter_contents(self.hierarchy, self._get_linker(),
+                                                     [(model_code, latest_version, chapter_list)])
+                element_filter = CONTENT_BLOCK_FILTER
+            return fragment_html(items, element_filter).encode('utf-8'), 'text/html; charset=utf-8'
+
+        match = SERVE_TEXT_RE.fullmatch(path)
+        if match:
+            model_code, _, _ = self._code_entry(match['code_id'])
+            code_id = model_code['ModelCodeID']
+            shard = content_text_shards(self.hierarchy, [code_id])[code_id]
+            return json.dumps(shard, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 'application/json; charset=utf-8'
+
+        match = SERVE_CHAPTER_RE.fullmatch(path)
+        if match:
+            model_code, latest_version, chapter_list = self._code_entry(match['code_id'])
+            chapter = next((ch for ch in chapter_list if str(ch['ChapterID']) == match['chapter_id']), None)
+            if chapter is None:
+                raise LookupError(f"Unknown chapter {match['chapter_id']}")
+            block = render_chapter_content(self.hierarchy, self._get_linker(), model_code, latest_version, chapter)
+            return fragment_html([block] if block else [], CONTENT_BLOCK_FILTER).encode('utf-8'), 'text/html; charset=utf-8'
+
+        raise LookupError(path)
+
+    def _get_linker(self):
+        if self._linker is None:
+            self._linker = CrossReferenceLinker(self.hierarchy)
+        return self._linker
+
+    def _code_entry(self, code_id):
+        """코드의 (model_code, latest_version, chapter_list)를 반환합니다."""
+        if self._codes is None:
+            self._codes = {str(entry[0]['ModelCodeID']): entry for entry in library_codes(self.hierarchy)}
+        try:
+            return self._codes[code_id]
+        except KeyError:
+            raise LookupError(f"Unknown code {code_id}") from None
+
+    def _search(self, query):
+        """q(검색어), codes(쉼표로 구분한 ModelCodeID), offset, limit 쿼리로 검색 결과를 만듭니다.
+
+        완전 일치 → 부분 일치 순이며 각각 페이지 검색과 같은 BM25 점수 순입니다.
+        검색어가 비어 있으면 페이지 검색(performTopSearch)처럼 빈 결과를 반환합니다.
+        """
+        keyword = query.get('q', [''])[0].strip().lower()
+        codes = query.get('codes', [''])[0]
+        code_ids = {code_id for code_id in codes.split(',') if code_id} or None
+        try:
+            offset = int(query.get('offset', ['0'])[0])
+            limit = int(query.get('limit', [str(SERVE_SEARCH_LIMIT)])[0])
+        except ValueError:
+            raise ValueError("offset and limit must be integers") from None
+        if offset < 0 or limit < 0:
+            raise ValueError("offset and limit must not be negative")
+
+        exact, partial = [], []
+        if keyword:
+            if self._rows is None:
+                self._rows = search_rows(self.hierarchy)
+            if self._scorer is None:
+                self._scorer = SearchIndexScorer(build_search_index(self._rows))
+            exact, partial = search_contents(self._rows, keyword, code_ids)
+            exact = self._scorer.rank(exact, keyword)
+            partial = self._scorer.rank(partial, keyword)
+        ordered = exact + partial
+        return {
+            'query': keyword,
+            'exactCount': len(exact),
+            'partialCount': len(partial),
+            'offset': offset,
+            'results': [dict(self._rows[doc], isExactMatch=i < len(exact))
+                        for i, doc in enumerate(ordered[offset:offset + limit], offset)],
+        }
 
-    # 스키마 로드
-    schema = load_schema()
+class LibraryRequestHandler(BaseHTTPRequestHandler):
+    """serve 모드의 GET/HEAD 요청 처리 (ETag가 If-None-Match와 같으면 304)"""
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        try:
+            body, content_type, etag, cached = self.server.service.get(self.path)
+        except LookupError:
+            self.send_error(404)
+            return
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+
+        tags = {tag.strip().removeprefix('W/') for tag in self.headers.get('If-None-Match', '').split(',')}
+        status = 304 if etag in tags or '*' in tags else 200
+        self.send_response(status)
+        self.send_header('ETag', etag)
+        # 데이터가 바뀔 수 있으므로 매번 ETag로 재검증
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Cache', 'HIT' if cached else 'MISS')
+        if status == 304:
+            self.end_headers()
+            return
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+class LibraryServer(ThreadingHTTPServer):
+    """요청마다 스레드를 쓰는 serve 모드 HTTP 서버"""
+
+    def __init__(self, address, service, quiet=False):
+        super().__init__(address, LibraryRequestHandler)
+        self.service = service
+        self.quiet = quiet
+
+def serve(args):
+    """DataHierarchy를 한 번 로드하고 셸 페이지, 코드/챕터 조각, 검색 결과를 HTTP로 제공합니다 (Ctrl+C로 종료).
+
+    외부 서비스 없이 로컬에서만 동작하며, 소스 파일이 바뀌면 다음 요청 때 반영합니다.
+    """
+    poller = SourcePoller()
+    with metrics.phase('load'):
+        hierarchy = load_hierarchy(snapshot=None if args.no_snapshot else DataSnapshot(SNAPSHOT_FILE),
+                                   storage=args.storage)
+    service = LibraryService(hierarchy, poller, cache_size=args.cache_size)
+
+    # 첫 요청이 기다리지 않도록 셸 페이지를 미리 렌더링
+    start = time.perf_counter()
+    page, _, _, _ = service.get('/')
+    print(f"✓ Rendered shell page ({len(page) / 1024:.0f} KB) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    server = LibraryServer((args.host, args.port), service, quiet=args.quiet)
+    host, port = server.server_address[:2]
+    print(f"\nServing http://{host}:{port}/ (Ctrl+C to stop)")
+    print("  /fragments/<ModelCodeID>-chapters.html, /fragments/<ModelCodeID>-content.html")
+    print(f"  /fragments/<ModelCodeID>/<ChapterID>.html, /search?q=<keyword>&codes=<ID,...>&offset=0&limit={SERVE_SEARCH_LIMIT}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped serving.")
+    finally:
+        server.server_close()
+
+def search(args):
+    """BM25 색인으로 CodeContent를 검색해 순위별 결과를 출력합니다 (--json이면 JSON).
+
+    색인은 SEARCH_INDEX_FILE에 저장해 두고 소스 파일이 바뀌었을 때만 다시 만듭니다.
+    결과 외의 진행 메시지는 stderr로 출력합니다.
+    """
+    sources = data_sources()
+    with contextlib.redirect_stdout(sys.stderr):
+        index = None if args.rebuild else Bm25Index.load(SEARCH_INDEX_FILE, sources)
+        if index is None:
+            start = time.perf_counter()
+            hierarchy = load_hierarchy(snapshot=None if args.no_snapshot else DataSnapshot(SNAPSHOT_FILE),
+                                       stream=args.stream, storage=args.storage)
+            index = Bm25Index.build(hierarchy)
+            index.save(SEARCH_INDEX_FILE, sources)
+            print(f"✓ Built search index for {len(index.docs)} rows, {len(index.postings)} terms "
+                  f"in {time.perf_counter() - start:.2f}s ({SEARCH_INDEX_FILE.name})")
+
+    query = ' '.join(args.query)
+    code_ids = set(args.codes.split(',')) if args.codes else None
+    start = time.perf_counter()
+    hits = index.search(query, args.limit, code_ids)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    results = []
+    for rank, (doc, score) in enumerate(hits, 1):
+        content_id, key, model_code_id, title_en, title_kr, snippet = index.docs[doc]
+        results.append({'rank': rank, 'score': round(score, 4), 'ContentID': content_id, 'ContentKey': key,
+                        'ModelCodeID': model_code_id, 'TitleEN': title_en, 'TitleKR': title_kr, 'snippet': snippet})
+    if args.json:
+        json.dump({'query': query, 'elapsedMs': round(elapsed_ms, 3), 'results': results},
+                  sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return
+
+    for result in results:
+        print(f"{result['rank']:>3}. {result['ContentKey']}  ({result['score']:.2f})")
+        titles = ' / '.join(' '.join(title.split()) for title in (result['TitleEN'], result['TitleKR']) if title.strip())
+        if titles:
+            print(f"     {titles}")
+        if result['snippet']:
+            print(f"     {result['snippet']}")
+    print(f"{len(results)} results ({elapsed_ms:.2f} ms)", file=sys.stderr)
+
+def profile_report(profiler, top=PROFILE_TOP_ENTRIES):
+    """cProfile 결과와 tracemalloc 스냅샷을 리포트용 dict로 정리합니다."""
+    stats = pstats.Stats(profiler).stats
+    functions = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        'functions': [{'function': f"{path}:{line}({name})", 'calls': calls, 'primitive_calls': primitive,
+                       'total_seconds': total, 'cumulative_seconds': cumulative}
+                      for (path, line, name), (primitive, calls, total, cumulative, _) in functions],
+        'memory': {
+            'traced_current_bytes': current,
+            'traced_peak_bytes': peak,
+            'top': [{'location': str(stat.traceback), 'size_bytes': stat.size, 'count': stat.count}
+                    for stat in snapshot.statistics('lineno')[:top]],
+        },
+    }
 
-    # JSON 데이터 로드
-    data = load_json_data()
+def write_build_report(path, args, profile=None):
+    """빌드 시간/카운터(와 프로파일)를 JSON 리포트로 씁니다."""
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'generator_version': GENERATOR_VERSION,
+        'output_file': str(OUTPUT_FILE),
+        'options': vars(args),
+        'timings': metrics.timings,
+        'counters': dict(sorted(metrics.counters.items())),
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+    if profile is not None:
+        report['profile'] = profile
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
 
-    # 데이터 계층 구조 생성
-    print("\nBuilding data hierarchy from schema...")
-    hierarchy = DataHierarchy(schema, data)
-    print(f"✓ Data hierarchy built with {len(hierarchy.relationships)} table relationships")
+def main(argv=None):
+    """메인 실행 함수"""
+    args = parse_args(argv)
+    if args.command == 'search':
+        # 결과만 stdout으로 (스크립트에서 --json 출력을 그대로 읽을 수 있게)
+        search(args)
+        return
 
-    # HTML 생성
-    print("\nGenerating HTML...")
-    final_html = generate_html(hierarchy)
+    print("=" * 70)
+    print("US Code Navigator - Schema-based HTML Generator")
+    print("=" * 70)
 
-    # HTML 파일 저장
-    print(f"\nWriting HTML to {OUTPUT_FILE}...")
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write(final_html)
+    if args.benchmark_startup:
+        benchmark_startup()
+        return
+    if args.benchmark_build is not None:
+        benchmark_build(args.benchmark_build or (1, 10, 100))
+        return
+    if args.benchmark_storage:
+        benchmark_storage()
+        return
+
+    if args.watch:
+        watch(args)
+        return
+    if args.command == 'serve':
+        serve(args)
+        return
+
+    metrics.reset()
+    profiler = None
+    if args.profile:
+        tracemalloc.start()
+        profiler = cProfile.Profile()
+        profiler.runcall(run_build, args)
+    else:
+        run_build(args)
+
+    profile = None
+    if profiler is not None:
+        profile = profile_report(profiler)
+        tracemalloc.stop()
+        profiler.dump_stats(REPORT_FILE.with_suffix('.prof'))
+    write_build_report(REPORT_FILE, args, profile)
 
     print("=" * 70)
     print(f"✓ Success! HTML file generated: {OUTPUT_FILE}")
     print(f"✓ All JSON data integrated with schema-based relationships")
+    peak = peak_rss_bytes()
+    if peak is not None:
+        print(f"✓ Peak RSS: {peak / (1024 * 1024):.1f} MB")
+    print(f"✓ Build report: {REPORT_FILE}" + (f" (cProfile stats: {REPORT_FILE.with_suffix('.prof').name})" if profiler else ''))
+    print("Phase timings:")
+    print(metrics.summary())
     print("=" * 70)
 
 if __name__ == "__main__":